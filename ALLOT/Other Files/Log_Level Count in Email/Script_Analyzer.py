@@ -10,9 +10,12 @@ from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.mime.base import MIMEBase
 from email import encoders
-from pycparser import c_ast, parse_file
+from pycparser import c_ast, c_parser
 from tabulate import tabulate
 
+# Shared analyzer helpers (preprocessor) from the ALLOT package (pip install -e . at the repository root)
+from preprocessor import PreprocessError, default_preprocessor
+
 # Set global configuration values
 SMTP_SERVER = 'smtp-mail.outlook.com'
 SMTP_PORT = 587
@@ -40,6 +43,8 @@ class ScriptAnalyzer:
             'Debug': 0,
             'Trace': 0
         }
+        # AST of the preprocessed script, parsed once and shared by the checks
+        self._ast = None
         logging.basicConfig(filename=self.log_file, level=logging.INFO,
                             format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -187,8 +192,7 @@ class ScriptAnalyzer:
 
     def check_naming_conventions(self):
         try:
-            processed_script = self.preprocess_cpp_file()
-            ast = parse_file(processed_script)
+            ast = self.parse_script()
 
             class NamingConventionVisitor(c_ast.NodeVisitor):
                 def __init__(self):
@@ -238,23 +242,31 @@ class ScriptAnalyzer:
             self.log_counts['Error'] += 1  # Increment error count
 
     def preprocess_cpp_file(self):
-        processed_file_path = self.script_path.parent / f"{self.script_path.stem}_processed.cpp"
+        # cpp output is read from a pipe and cached by content, so no *_processed.cpp is written
         try:
-            command = ['cpp', '-o', str(processed_file_path), str(self.script_path)]
-            result = subprocess.run(command, check=True, capture_output=True, text=True)
-        except subprocess.CalledProcessError as e:
+            with open(self.script_path, 'rb') as script_file:
+                raw = script_file.read()
+            return default_preprocessor.preprocess(self.script_path, raw)
+        except PreprocessError as e:
             logging.error(f"Error during preprocessing: {e}")
             if e.stderr:
                 logging.error(f"cpp error: {e.stderr}")
         except Exception as e:
             logging.error(f"Error during preprocessing: {str(e)}")
 
-        return processed_file_path
+        return None
+
+    def parse_script(self):
+        if self._ast is None:
+            processed_script = self.preprocess_cpp_file()
+            if processed_script is None:
+                raise RuntimeError(f"Preprocessing failed for {self.script_path}")
+            self._ast = c_parser.CParser().parse(processed_script, str(self.script_path))
+        return self._ast
 
     def check_modularization(self):
         try:
-            processed_script = self.preprocess_cpp_file()
-            ast = parse_file(processed_script)
+            ast = self.parse_script()
 
             class ModularizationVisitor(c_ast.NodeVisitor):
                 def __init__(self):
@@ -4,6 +4,7 @@ import logging
 import subprocess
 import smtplib
 import platform
+import threading
 from pathlib import Path
 from datetime import datetime
 from email.mime.multipart import MIMEMultipart
@@ -11,6 +12,8 @@ from email.mime.text import MIMEText
 from email.mime.base import MIMEBase
 from email import encoders
 from pycparser import c_ast, parse_file
+from cpp_lexer import TokenStream
+from identifier_index import IdentifierIndex
 
 # Set global configuration values
 SMTP_SERVER = 'smtp-mail.outlook.com'
@@ -46,6 +49,10 @@ class ScriptAnalyzer:
         }
         logging.basicConfig(filename=self.log_file, level=logging.INFO,
                             format='%(asctime)s - %(levelname)s - %(message)s')
+        # C/C++ token stream of the script and its identifier index, built on first use and shared by the checks
+        self._tokens = None
+        self._identifier_index = None
+        self._build_locks = {attribute: threading.Lock() for attribute in ('_tokens', '_identifier_index')}
         
         # Initialize error count
         self.error_count = 0
@@ -57,6 +64,29 @@ class ScriptAnalyzer:
         log_file_name = f"Logs-{self.script_path.stem}-at-{current_datetime}.log"
         return log_folder / log_file_name
 
+    def shared_state(self, attribute, build):
+        # Lazily built state shared by the checks, built once even when called from several threads
+        value = getattr(self, attribute)
+        if value is None:
+            with self._build_locks[attribute]:
+                value = getattr(self, attribute)
+                if value is None:
+                    value = build()
+                    setattr(self, attribute, value)
+        return value
+
+    def read_script(self):
+        with open(self.script_path, "r") as script_file:
+            return script_file.read()
+
+    @property
+    def tokens(self):
+        return self.shared_state('_tokens', lambda: TokenStream(self.read_script()))
+
+    @property
+    def identifier_index(self):
+        return self.shared_state('_identifier_index', lambda: IdentifierIndex.from_stream(self.tokens))
+
     def check_include_directive(self):
         try:
             with open(self.script_path, "r") as script_file:
@@ -393,26 +423,11 @@ class ScriptAnalyzer:
 
     def check_code_reuse(self):
         try:
-            with open(self.script_path, "r") as script_file:
-                lines = script_file.readlines()
+            # Definitions and call sites come from the token stream: a name in a comment or a string is not a call
+            index = self.identifier_index
 
-            function_definitions = []
-            for line_number, line in enumerate(lines, start=1):
-                if line.startswith("int ") or line.startswith("void "):
-                    function_name = re.search(r'\b[a-zA-Z_][a-zA-Z0-9_]*\s*\(', line)
-                    if function_name:
-                        function_definitions.append((function_name.group().strip(), line_number))
-
-            function_calls = {}
-            for line_number, line in enumerate(lines, start=1):
-                for function_name, _ in function_definitions:
-                    if function_name in line:
-                        if function_name in function_calls:
-                            function_calls[function_name].append(line_number)
-                        else:
-                            function_calls[function_name] = [line_number]
-
-            for function_name, call_line_numbers in function_calls.items():
+            for function_name in index.definitions:
+                call_line_numbers = index.calls_to(function_name)
                 if len(call_line_numbers) > 1:
                     logging.warning(f"Function '{function_name}' called multiple times. Consider refactoring for code reuse. Call locations: {', '.join(map(str, call_line_numbers))}")
                     self.counts['code_reuse_check'] += 1
@@ -1,22 +1,39 @@
-import re
 import os
+import time
+import hashlib
 import logging
-import subprocess
-import smtplib
+import threading
 from pathlib import Path
+from functools import partial
 from datetime import datetime
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.mime.base import MIMEBase
 from email import encoders
+from source_buffer import SourceBuffer
+from line_engine import LineEngine
+from line_rules import build_line_rules
+from repetition import find_maximal_repeats, find_repeated_windows
+from identifier_index import IdentifierIndex
+from cpp_lexer import TokenStream
+from concurrent.futures import ThreadPoolExecutor
+from preprocessor import PreprocessError, default_preprocessor
+from result_cache import CachedAnalysis, result_key
+from findings_collector import FindingsCollector
+from mail_transport import default_transport
 
 # Set global configuration values
 SMTP_SERVER = 'smtp-mail.outlook.com'
 SMTP_PORT = 587
 
+# Bump when a check changes what it reports, so cached results of older versions are not reused
+ANALYZER_VERSION = '2'
+
 # Set global indentation, line count, iteration values and List of all module names
 SEQUENCE_LENGTH = 3  # Minimum number of lines in a sequence to consider it for refactoring
 REPETITION_THRESHOLD = 3  # Determine the threshold for suggesting refactoring as a function
+CHECK_WORKERS = 1  # Threads running the checks of one script; 1 runs them one after another
+REPETITION_MODE = 'window'  # 'window': every repeated SEQUENCE_LENGTH window, 'maximal': each longest repeated block once
 INDENTATION_SPACES = 4
 EXPECTED_LINE_COUNT = 1500
 MODULES_ALL = ["sys", "nedbg", "sys_util", "messages", "halApi", "hal_card", 
@@ -24,17 +41,57 @@ MODULES_ALL = ["sys", "nedbg", "sys_util", "messages", "halApi", "hal_card",
                "HRM_State", "HRM_StateElection", "HRM_StateDisabledMaster", 
                "HRM_StateDisabledSlave", "HRM_PeerClient", "HRM_SystemMgrClient", 
                "HRM_StateStandby", "acprof", "platform", "HRM_DataSyncDefs"]
+# Checks in the order run_analysis runs them: (count key, method, description used when the check
+# raises). Checks without a description let the error abort the analysis, as they always have.
+CHECKS = [
+    ('include_directive_check', 'check_include_directive', None),
+    ('total_lines_check', 'check_total_lines', 'total lines'),
+    ('indentation_check', 'check_indentation', 'indentation'),
+    ('naming_conventions_check', 'check_naming_conventions', 'naming conventions'),
+    ('modularization_check', 'check_modularization', 'modularization'),
+    ('file_encoding_check', 'check_file_encoding', None),
+    ('consistency_check', 'check_consistency', 'consistency'),
+    ('excess_whitespace_check', 'check_excess_whitespace', 'whitespace'),
+]
 ITERATION_VALUES = {
     'MAX_FUNCTION_COUNT': 3,  # Maximum number of functions expected in the script
     'MAX_SUBROUTINE_COUNT': 3  # Maximum number of subroutines expected in the script
 }
 
 class ScriptAnalyzer:
-    def __init__(self, script_path, recipient_email, sender_email, sender_password):
+    def __init__(self, script_path, recipient_email, sender_email, sender_password, modules=None, repetition_mode=None,
+                 clone_index=None, result_cache=None, results_store=None, preprocessor=None, max_workers=None,
+                 log_folder=None, send_report=True, source=None, mail_transport=None, finding_writer=None):
         self.script_path = Path(script_path)
         self.recipient_email = recipient_email
         self.sender_email = sender_email
         self.sender_password = sender_password
+        # Module names whose '<module>::' symbol prefix is reported; defaults to MODULES_ALL
+        self.modules = tuple(modules) if modules is not None else tuple(MODULES_ALL)
+        self.repetition_mode = repetition_mode or REPETITION_MODE
+        # Optional CloneIndex of the wider code base, checked for blocks copied from other files
+        self.clone_index = clone_index
+        # Optional ResultCache shared between analyzers; a script seen before replays its stored findings
+        self.result_cache = result_cache
+        self.cache_hit = False
+        # Optional ResultsStore recording every run with its counts, timings and findings
+        self.results_store = results_store
+        # cpp runner for parser-based checks; the shared one caches output across analyzers
+        self.preprocessor = preprocessor if preprocessor is not None else default_preprocessor
+        self.max_workers = max_workers or CHECK_WORKERS
+        # Per-thread counts and log of checks running in the worker pool
+        self._check_local = threading.local()
+        # This analysis's own log, written to log_file in one go at the end. An optional finding_writer
+        # (report_formats.JsonLinesWriter or SarifWriter) also gets every finding as it is logged
+        self.finding_writer = finding_writer
+        self._log = FindingsCollector(listener=partial(finding_writer.add, str(self.script_path)) if finding_writer else None)
+        # Wall-clock seconds each check took
+        self.check_seconds = {}
+        # Where the log is written (default: a Logs folder next to the script) and whether it is emailed
+        self.log_folder = Path(log_folder) if log_folder is not None else self.script_path.parent / "Logs"
+        self.send_report = send_report
+        # How the report email leaves: a MailTransport, an Outbox spool, or None for the shared transport
+        self.mail_transport = mail_transport
         self.log_file = self.get_log_file_name()
         self.counts = {
             'total_lines_check': 0,
@@ -44,88 +101,234 @@ class ScriptAnalyzer:
             'consistency_check': 0,
             'excess_whitespace_check': 0
         }
-        logging.basicConfig(filename=self.log_file, level=logging.INFO,
-                            format='%(asctime)s - %(levelname)s - %(message)s')
+        if self.clone_index is not None:
+            self.counts['cross_file_clone_check'] = 0
+        # Script contents, read once on first use and shared by every check; a SourceBuffer passed in
+        # (e.g. an archive member held in memory) is used as is and script_path only names it
+        self._source = source
+        # Findings of the line-local rules, filled by one fused pass over the script
+        self._line_rule_results = None
+        # C/C++ token stream of the script, lexed once on first use and shared by the checks
+        self._tokens = None
+        # Identifier occurrences and call graph, built on first use and shared by the checks
+        self._identifier_index = None
+        self._build_locks = {attribute: threading.Lock() for attribute in
+                             ('_source', '_line_rule_results', '_tokens', '_identifier_index')}
 
         # Initialize error count
         self.error_count = 0
 
     def get_log_file_name(self):
         current_datetime = datetime.now().strftime("%H-%M-%S-on-%d-%m-%Y")
-        log_folder = self.script_path.parent / "Logs"
+        log_folder = self.log_folder
         log_folder.mkdir(parents=True, exist_ok=True)  # Create Logs folder if it doesn't exist
         os.chmod(log_folder, 0o777)  # Set permission to 777
         log_file_name = f"Logs-{self.script_path.stem}-at-{current_datetime}.log"
         return log_folder / log_file_name
 
+    def shared_state(self, attribute, build):
+        # Lazily built state shared by the checks, built once even when checks run in parallel
+        value = getattr(self, attribute)
+        if value is None:
+            with self._build_locks[attribute]:
+                value = getattr(self, attribute)
+                if value is None:
+                    value = build()
+                    setattr(self, attribute, value)
+        return value
+
+    @property
+    def counts(self):
+        # A check running in a worker thread updates its own copy, merged back in check order
+        return getattr(self._check_local, 'counts', self._counts)
+
+    @counts.setter
+    def counts(self, counts):
+        self._counts = counts
+
+    @property
+    def log(self):
+        # Like counts: a check running in a worker thread logs into its own collector, merged back in check order
+        return getattr(self._check_local, 'log', self._log)
+
+    @property
+    def current_check(self):
+        # Check whose findings are being logged (None outside checks)
+        return self.log.check
+
+    @current_check.setter
+    def current_check(self, check):
+        self.log.check = check
+
+    @property
+    def source(self):
+        return self.shared_state('_source', lambda: SourceBuffer.from_path(self.script_path))
+
+    @property
+    def tokens(self):
+        return self.shared_state('_tokens', lambda: TokenStream.from_source(self.source))
+
+    @property
+    def identifier_index(self):
+        return self.shared_state('_identifier_index', lambda: IdentifierIndex.from_stream(self.tokens))
+
+    def run_line_rules(self):
+        # Walk the script once for every line-local check; each check then reports its own share
+        return self.shared_state('_line_rule_results',
+                                 lambda: LineEngine(build_line_rules(INDENTATION_SPACES, self.modules)).run(self.source))
+
+    def report_line_rule(self, check):
+        rule = self.run_line_rules()[check]
+        self.log.extend(rule.findings)
+        rule.apply_count(self.counts)
+        if rule.error is not None:
+            raise rule.error
+
     def run_analysis(self):
         try:
             # Print start of script analysis
             print("Starting Script Analysis.")
             # Creating Log with Analysis in Log Directory
-            logging.info("Starting Script Analysis.")
-
-            # Check for mandatory #include directive
-            self.check_include_directive()
-
-            try:
-                # Check script indentation
-                self.check_total_lines()
-            except Exception as e:
-                logging.error(f"Error during total lines check: {str(e)}")
-
-            try:
-                # Check script indentation
-                self.check_indentation()
-            except Exception as e:
-                logging.error(f"Error during indentation check: {str(e)}")
-
-            try:
-                # Check naming conventions
-                self.check_naming_conventions()
-            except Exception as e:
-                logging.error(f"Error during naming conventions check: {str(e)}")
-
-            try:
-                # Check modularization
-                self.check_modularization()
-            except Exception as e:
-                logging.error(f"Error during modularization check: {str(e)}")
-
-            # Check file encoding
-            self.check_file_encoding()
-
-            try:
-                # Check consistency
-                self.check_consistency()
-            except Exception as e:
-                logging.error(f"Error during consistency check: {str(e)}")
-
-            try:
-                # Check whitespace usage
-                self.check_excess_whitespace()
-            except Exception as e:
-                logging.error(f"Error during whitespace check: {str(e)}")
+            self.log.info("Starting Script Analysis.")
+
+            started_at = time.time()
+            started = time.perf_counter()
+            # Entries logged from here to the end of the clone check are this analysis's findings
+            first_finding = len(self._log.entries)
+            cache_key = self.result_cache_key()
+            cached = self.result_cache.get(cache_key) if cache_key is not None else None
+            if cached is not None:
+                # Same script and settings as an earlier run: replay its findings instead of re-running the checks
+                cached.replay(self)
+                self.cache_hit = True
+            else:
+                self.run_checks()
+                if cache_key is not None:
+                    self.result_cache.put(cache_key, CachedAnalysis(self.counts, self._log.entries[first_finding:]))
+
+            if self.clone_index is not None:
+                self.current_check = 'cross_file_clone_check'
+                try:
+                    # Check for blocks that also appear in other indexed files
+                    self.check_cross_file_clones()
+                except Exception as e:
+                    self.log.error(f"Error during cross-file clone check: {str(e)}")
+                self.current_check = None
+            findings = self._log.entries[first_finding:]
+            seconds = time.perf_counter() - started
 
             # Print summary of the analysis results
             print("Script Analysis completed.")
             # Creating Log with Analysis in Log Directory
-            logging.info("Script Analysis completed.")
+            self.log.info("Script Analysis completed.")
 
             # Add summary table to log
             self.add_summary_to_log()
 
-            # Email the log file
-            sender_email = self.sender_email
-            sender_password = self.sender_password
-            recipient_email = self.recipient_email
-            attachment_path = self.log_file
-            send_email(sender_email, sender_password, recipient_email, attachment_path, self.counts)
+            if self.results_store is not None:
+                self.store_results(findings, started_at, seconds)
+
+            if self.send_report:
+                # Email the log file
+                sender_email = self.sender_email
+                sender_password = self.sender_password
+                recipient_email = self.recipient_email
+                attachment_path = self.log_file
+                send_email(sender_email, sender_password, recipient_email, attachment_path, self.counts,
+                           transport=self.mail_transport)
 
         except Exception as e:
-            logging.error(f"Error during analysis: {str(e)}")
+            self.log.error(f"Error during analysis: {str(e)}")
             self.error_count += 1
-            logging.error(f"Error count: {self.error_count}")  # Log the error count
+            self.log.error(f"Error count: {self.error_count}")  # Log the error count
+        finally:
+            # Entries logged after the summary, e.g. a failed email
+            self._log.write(self.log_file)
+
+    def run_checks(self):
+        if self.max_workers > 1:
+            self.run_checks_parallel()
+            return
+        for check, method_name, description in CHECKS:
+            self.current_check = check
+            self.run_check(check, method_name, description)
+        self.current_check = None
+
+    def run_check(self, check, method_name, description):
+        started = time.perf_counter()
+        try:
+            getattr(self, method_name)()
+        except Exception as e:
+            if description is None:
+                raise
+            self.log.error(f"Error during {description} check: {str(e)}")
+        finally:
+            self.check_seconds[check] = time.perf_counter() - started
+
+    def run_checks_parallel(self):
+        # Checks run in a thread pool, each with its own copy of the counts and its own log collector.
+        # Log entries and count changes are then applied check by check in CHECKS order, so the log, the
+        # counts and their order come out exactly as in a sequential run.
+        counts_before = dict(self._counts)
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='check') as pool:
+                futures = [pool.submit(self.run_buffered_check, counts_before, *entry) for entry in CHECKS]
+                for future in futures:
+                    check_log, check_counts, error = future.result()
+                    self._log.extend(check_log.entries, check_log.times)
+                    if error is not None:
+                        # A check without an error description aborts the analysis, as in a sequential run
+                        raise error
+                    for key, count in check_counts.items():
+                        change = count - counts_before.get(key, 0)
+                        if change or key not in self._counts:
+                            self._counts[key] = self._counts.get(key, 0) + change
+        finally:
+            self.current_check = None
+
+    def run_buffered_check(self, counts_before, check, method_name, description):
+        local = self._check_local
+        local.counts = dict(counts_before)
+        local.log = FindingsCollector(check)
+        try:
+            self.run_check(check, method_name, description)
+            error = None
+        except Exception as e:
+            error = e
+        finally:
+            check_log, check_counts = local.log, local.counts
+            del local.log, local.counts
+        return check_log, check_counts, error
+
+    def config_fingerprint(self):
+        # Everything besides the script bytes that changes what the checks report
+        return '|'.join(map(str, (ANALYZER_VERSION, self.source.encoding, self.modules, self.repetition_mode, SEQUENCE_LENGTH,
+                                  REPETITION_THRESHOLD, INDENTATION_SPACES, EXPECTED_LINE_COUNT)))
+
+    def content_hash(self):
+        # SHA-256 of the script bytes, or None when the script cannot be read
+        try:
+            return hashlib.sha256(self.source.raw).hexdigest()
+        except OSError:
+            return None
+
+    def result_cache_key(self):
+        if self.result_cache is None:
+            return None
+        content_hash = self.content_hash()
+        if content_hash is None:
+            # Unreadable script: let the checks report it as usual
+            return None
+        return result_key(content_hash, self.config_fingerprint())
+
+    def store_results(self, findings, started_at, seconds):
+        try:
+            content_hash = self.content_hash()
+            config_version = self.config_fingerprint() if content_hash is not None else ANALYZER_VERSION
+            self.results_store.record_run(self.script_path, content_hash, config_version, self.counts, findings,
+                                          started_at, seconds, self.check_seconds, self.cache_hit)
+        except Exception as e:
+            self.log.error(f"Error while storing analysis results: {str(e)}")
 
     def add_summary_to_log(self):
 
@@ -150,315 +353,199 @@ class ScriptAnalyzer:
             summary += " No Issues observed after Analyzing the Script\n"
 
         summary += "---------------------------------------------\n"
-        with open(self.log_file, 'a') as log_file:
-            log_file.write(summary)
+        # The log so far and the summary table reach the file in one write, before the report is emailed
+        self._log.write(self.log_file, summary)
 
     def check_include_directive(self):
         try:
-            with open(self.script_path, "r") as script_file:
-                lines = script_file.readlines()
-
-                first_non_comment_line = None
-                for line_number, line in enumerate(lines, start=1):
-                    if not line.strip() or line.strip().startswith("//") or line.strip().startswith("/*"):
-                        continue
-                    first_non_comment_line = line_number
-                    break
-
-                if not first_non_comment_line or not lines[first_non_comment_line - 1].strip().startswith("#include "):
-                    logging.error("Mandatory '#include ' directive missing at the beginning of the file.")
-                    self.counts['include_directive_check'] = 1  # Increment the count
+            self.report_line_rule('include_directive_check')
         except FileNotFoundError:
-            logging.error(f"File not found: {self.script_path}")
+            self.log.error(f"File not found: {self.script_path}")
         except Exception as e:
-            logging.error(f"Error during include directive check: {str(e)}")
+            self.log.error(f"Error during include directive check: {str(e)}")
 
     def check_total_lines(self):
         try:
-            with open(self.script_path, "r") as script_file:
-                lines = script_file.readlines()
-                total_lines = len(lines)
-                if total_lines > EXPECTED_LINE_COUNT:
-                    logging.warning(f'Total number of lines ({total_lines}) exceeds the recommended maximum of {EXPECTED_LINE_COUNT} lines.')
-                    self.counts['total_lines_check'] += 1
-            logging.info(f"Total lines check completed - Count: {self.counts['total_lines_check']}")
+            total_lines = len(self.source.lines)
+            if total_lines > EXPECTED_LINE_COUNT:
+                self.log.report('too_many_lines', None, total_lines, EXPECTED_LINE_COUNT)
+                self.counts['total_lines_check'] += 1
+            self.log.info(f"Total lines check completed - Count: {self.counts['total_lines_check']}")
         except FileNotFoundError:
-            logging.error(f"File not found: {self.script_path}")
+            self.log.error(f"File not found: {self.script_path}")
         except Exception as e:
-            logging.error(f"Error during total lines check: {str(e)}")
+            self.log.error(f"Error during total lines check: {str(e)}")
 
     def check_indentation(self):
         try:
-            with open(self.script_path, "r") as script_file:
-                lines = script_file.readlines()
-
-                inside_function = False
-                indentation_level = 0
-
-                for line_number, line in enumerate(lines, start=1):
-                    if not line.strip() or line.strip().startswith("//") or line.strip().startswith("/*"):
-                        continue
-
-                    if "\t" in line:
-                        logging.warning(f"Indentation issue at line {line_number}: TAB space used. Convert TABs to spaces.")
-                        self.counts['indentation_check'] += 1
-
-                    if "{" in line and not line.strip().endswith("{"):
-                        logging.warning(f"Brace placement issue at line {line_number}: Opening brace should be on the same line as the control statement.")
-                        self.counts['indentation_check'] += 1
-
-                    if line.strip().startswith("#include"):
-                        if not re.match(r'^#include\s+\S+', line.strip()):
-                            logging.warning(f"Syntax issue at line {line_number}: Incorrect syntax - Include.")
-                        continue
-                    
-                    if line.strip().startswith("Using"):
-                        if not re.match(r'^Using\s+\S+', line.strip()):
-                            logging.warning(f"Syntax issue at line {line_number}: Incorrect syntax - Using.")
-                        continue
-
-                    if line.strip().startswith("typedef"):
-                        if not re.match(r'^typedef\s+\S+\s+\S+;', line.strip()):
-                            logging.warning(f"Syntax issue at line {line_number}: Incorrect syntax - Typedef.")
-                        continue
-
-                    if "{" in line and "(" in line and not inside_function:
-                        if line.strip().endswith("{"):
-                            inside_function = True
-                            continue
-
-                    if inside_function:
-                        control_structures = ["if", "else if", "else", "switch", "for", "while", "do", "case", "default"]
-                        for control_structure in control_structures:
-                            if control_structure in line.strip():
-                                if not line.startswith(" " * INDENTATION_SPACES * indentation_level):
-                                    logging.warning(f"Indentation issue at line {line_number}: Incorrect indentation for {control_structure} statement.")
-                                    self.counts['indentation_check'] += 1
-                                if line.strip().endswith("{"):
-                                    indentation_level += 1
-                            if line.strip().startswith("}"):
-                                indentation_level -= 1
-                                if indentation_level == 0:
-                                    inside_function = False
-                                    continue
-
-                    if "do" in line.strip() and "{" in line.strip():
-                        indentation_level += 1
-                    if "while" in line.strip() and ";" in line.strip() and "do" not in line.strip():
-                        indentation_level -= 1
-
-                    if not line.startswith(" " * INDENTATION_SPACES * indentation_level) and line.strip() not in ["{", "}"]:
-                        logging.warning(f"Indentation issue at line {line_number}: Incorrect indentation.")
-                        self.counts['indentation_check'] += 1
-
-            logging.info(f"Indentation check completed - Count: {self.counts['indentation_check']}")
+            self.report_line_rule('indentation_check')
+            self.log.info(f"Indentation check completed - Count: {self.counts['indentation_check']}")
         except FileNotFoundError:
-            logging.error(f"File not found: {self.script_path}")
+            self.log.error(f"File not found: {self.script_path}")
         except Exception as e:
-            logging.error(f"Error during indentation check: {str(e)}")
+            self.log.error(f"Error during indentation check: {str(e)}")
 
     def check_naming_conventions(self):
-        reserved_names = ['int', 'short', 'long', 'long long', 'float', 'double', 'long double', 'char', 'wchar_t', 'char16_t', 'char32_t', 'bool', 'void', 'enum', 'struct', 'union']
         try:
-            with open(self.script_path, "r") as script_file:
-                for line_number, line in enumerate(script_file, start=1):
-                    line = line.strip()
-
-                    # Check for symbols prefix corresponding to all module names
-                    for module in MODULES_ALL:
-                        if line.startswith(module + "::"):
-                            logging.warning(f"Symbol with prefix '{module}::' found at line {line_number}")
-                            self.counts['naming_conventions_check'] += 1
-
-                    # Check for lower-case variables/functions with reserved data types
-                    if re.match(r'^\s*(?:' + '|'.join(reserved_names) + r')\s+[a-z_]\w*\s*;', line.strip()):
-                        # Check if the variable or function name is not in lowercase
-                        if not re.match(r'^\s*(?:' + '|'.join(reserved_names) + r')\s+[a-z_]\w*\s*;', line.strip()):
-                            logging.warning(f"Variable/function not starting with lower-case letter found at line {line_number}")
-                            self.counts['naming_conventions_check'] += 1
-
-
-
-                    # Check for upper-case types/classes
-                    if re.match(r'\b(class|struct|enum|union|namespace)\s', line):
-                        if not re.match(r'\b(class|struct|enum|union|namespace)\s+[A-Z]\w*\s+\w+(?:::\w+)?\s*{?$', line):
-                            logging.warning(f"class names not starting with Upper-Case letter found at line {line_number}")
-                            self.counts['naming_conventions_check'] += 1
-                    
-                    # Check for upper case type/class name or the TYPE keyword convention
-                    if (re.search(r'\bTYPE\s', line) and re.search(r';\s*END\s+TYPE\s', line)):
-                        if not (re.search(r'\bTYPE\s*\(\s*[a-zA-Z]+\s*\)\s*;', line) and re.search(r';\s*END\s+TYPE\s+[a-zA-Z]+\s*;', line)):
-                            logging.warning(f"TYPE keyword not starting with Upper-Case letter found at line {line_number}")
-                            self.counts['naming_conventions_check'] += 1
-
-                    # Check for upper-case constants
-                    if re.match(r'^#define\s+[A-Z_]+\s+', line):
-                        if re.match(r'#define [A-Z_]+ .*', line):
-                            logging.warning(f"Constant not all upper-case found at line {line_number}")
-                            self.counts['naming_conventions_check'] += 1
-
-                    # Check for global variables starting with 'g_'
-                    if re.match(r'\b(g_[a-zA-Z_]\w*)\b', line):
-                        logging.warning(f"Global variable not starting with 'g_' found at line {line_number}")
-                        self.counts['naming_conventions_check'] += 1
-
-                    # Check for members starting with 'm_'
-                    if re.match(r'(\w+)::\1', line):
-                        if not re.match(r'(\w+)::\1\s*\((.*?)\)\s*:\s*\w+\s*\([^)]*\)\s*(?:...).*m_\w+\s*\([^)]*\)*\s*{', line):
-                            logging.warning(f"Member not starting with 'm_' found at line {line_number}")
-                            self.counts['naming_conventions_check'] += 1
-
-                    # Check for pointers starting with 'p'
-                    for match in re.finditer(r'(?<!/)\*\s*\w+', line):
-                        word = match.group()[1:].lstrip()
-                        if not word.startswith('p'):
-                            logging.warning(f"Pointer not starting with 'p', word: '{word}' and found at line {line_number}")
-                            self.counts['naming_conventions_check'] += 1
-
-            logging.info(f"Naming conventions check completed - Count: {self.counts['naming_conventions_check']}")
+            self.report_line_rule('naming_conventions_check')
+            self.log.info(f"Naming conventions check completed - Count: {self.counts['naming_conventions_check']}")
 
         except FileNotFoundError:
-            logging.error(f"File not found: {self.script_path}")
+            self.log.error(f"File not found: {self.script_path}")
         except Exception as e:
-            logging.error(f"Error during naming conventions check: {str(e)}")
+            self.log.error(f"Error during naming conventions check: {str(e)}")
 
-    def preprocess_cpp_file(self):
-        processed_file_path = self.script_path.parent / f"{self.script_path.stem}_processed.cpp"
+    def preprocess_cpp_file(self, include_dirs=(), defines=()):
+        # Preprocessed text of the script for a parser, or None when cpp fails; nothing is written to disk
         try:
-            command = ['cpp', '-o', str(processed_file_path), str(self.script_path)]
-            subprocess.run(command, check=True, capture_output=True, text=True)
-        except subprocess.CalledProcessError as e:
-            logging.error(f"Error during preprocessing: {e}")
+            return self.preprocessor.preprocess(self.script_path, self.source.raw, include_dirs, defines)
+        except PreprocessError as e:
+            self.log.error(f"Error during preprocessing: {e}")
             if e.stderr:
-                logging.error(f"cpp error: {e.stderr}")
+                self.log.error(f"cpp error: {e.stderr}")
         except Exception as e:
-            logging.error(f"Error during preprocessing: {str(e)}")
-
-        return processed_file_path
+            self.log.error(f"Error during preprocessing: {str(e)}")
+        return None
     
     def check_modularization(self):
         try:
-            with open(self.script_path, "r") as script_file:
-                lines = script_file.readlines()
-
-            repeated_sequences = {}
-            # Create sequences of lines
-            for start_index in range(len(lines) - SEQUENCE_LENGTH + 1):
-                sequence = tuple(lines[start_index:start_index + SEQUENCE_LENGTH])
-                if all(len(line.strip()) > 1 for line in sequence):  # Check if all lines have more than one character
-                    if sequence in repeated_sequences:
-                        repeated_sequences[sequence].append(start_index + 1)  # Line numbers start from 1
-                    else:
-                        repeated_sequences[sequence] = [start_index + 1]
+            lines = self.source.lines
 
-            for sequence, line_numbers in repeated_sequences.items():
-                if len(line_numbers) >= REPETITION_THRESHOLD and len(sequence) > 1:
-                    # Remove leading and trailing whitespace from the sequence for better readability in the log
-                    formatted_sequence = ''.join(sequence).strip()
-                    warning_message = f"Repetition detected: Sequence '{formatted_sequence}' repeated {len(line_numbers)} times. Consider refactoring as a function. Lines: {', '.join(map(str, line_numbers))}"
-                    logging.warning(warning_message)
-                    self.counts['modularization_check'] += 1
+            if self.repetition_mode == 'maximal':
+                self.report_maximal_repeats(lines)
+            else:
+                self.report_repeated_windows(lines)
 
-            logging.info(f"Modularization check completed - Count: {self.counts['modularization_check']}")
+            self.log.info(f"Modularization check completed - Count: {self.counts['modularization_check']}")
 
         except FileNotFoundError:
-            logging.error(f"File not found: {self.script_path}")
+            self.log.error(f"File not found: {self.script_path}")
         except Exception as e:
-            logging.error(f"Error during modularization check: {str(e)}")
+            self.log.error(f"Error during modularization check: {str(e)}")
+
+    def report_repeated_windows(self, lines):
+        # Repeated windows of SEQUENCE_LENGTH lines where every line has more than one character
+        repeated_sequences = find_repeated_windows(lines, SEQUENCE_LENGTH, REPETITION_THRESHOLD,
+                                                   eligible=lambda line: len(line.strip()) > 1)
+
+        for first_index, start_indexes in repeated_sequences:
+            if SEQUENCE_LENGTH > 1:
+                sequence = lines[first_index:first_index + SEQUENCE_LENGTH]
+                line_numbers = [start_index + 1 for start_index in start_indexes]  # Line numbers start from 1
+                # Remove leading and trailing whitespace from the sequence for better readability in the log
+                formatted_sequence = ''.join(sequence).strip()
+                self.log.report('repeated_sequence', line_numbers[0], formatted_sequence, len(line_numbers),
+                                ', '.join(map(str, line_numbers)))
+                self.counts['modularization_check'] += 1
+
+    def report_maximal_repeats(self, lines):
+        # Each repeated block is reported once at its full length, not as overlapping windows
+        repeated_blocks = find_maximal_repeats(lines, SEQUENCE_LENGTH, REPETITION_THRESHOLD,
+                                               eligible=lambda line: len(line.strip()) > 1)
+
+        for block_length, start_indexes in repeated_blocks:
+            formatted_block = ''.join(lines[start_indexes[0]:start_indexes[0] + block_length]).strip()
+            line_ranges = ', '.join(f"{start_index + 1}-{start_index + block_length}" for start_index in start_indexes)
+            self.log.report('repeated_block', start_indexes[0] + 1, block_length, formatted_block, len(start_indexes), line_ranges)
+            self.counts['modularization_check'] += 1
 
     def check_file_encoding(self):
         try:
-            with open(self.script_path, 'rb') as f:
-                encoding = ''
-                for line in f:
-                    try:
-                        line.decode('utf-8')
-                    except UnicodeDecodeError as e:
-                        encoding = str(e)
-                        logging.error(f"File is not UTF-8 encoded - Please save the file in UTF-8 Format: {e}")
-                        if 'file_encoding_check' in self.counts:
-                            self.counts['file_encoding_check'] += 1
-                        else:
-                            self.counts['file_encoding_check'] = 1
-                        break
-                if not encoding:
-                    logging.info("File is UTF-8 encoded - Expected")
+            encoding = ''
+            for line_number, line in enumerate(self.source.raw_lines, start=1):
+                try:
+                    line.decode('utf-8')
+                except UnicodeDecodeError as e:
+                    encoding = str(e)
+                    self.log.report('not_utf8', line_number, encoding, severity=logging.ERROR)
+                    if 'file_encoding_check' in self.counts:
+                        self.counts['file_encoding_check'] += 1
+                    else:
+                        self.counts['file_encoding_check'] = 1
+                    break
+            if not encoding:
+                self.log.info("File is UTF-8 encoded - Expected")
 
             if 'file_encoding_check' not in self.counts:
                 self.counts['file_encoding_check'] = 0
 
-            logging.info(f"File encoding check completed - Count: {self.counts['file_encoding_check']}")
+            self.log.info(f"File encoding check completed - Count: {self.counts['file_encoding_check']}")
 
         except FileNotFoundError:
-            logging.error(f"File not found: {self.script_path}")
+            self.log.error(f"File not found: {self.script_path}")
         except Exception as e:
-            logging.error(f"Error during file encoding check: {str(e)}")
+            self.log.error(f"Error during file encoding check: {str(e)}")
 
     def check_consistency(self):
         try:
-            with open(self.script_path, "r") as script_file:
-                lines = script_file.readlines()
-
-            # Check for consistent use of tabs or spaces for indentation
-            indentation_type = None
-            for line_number, line in enumerate(lines, start=1):
-                try:
-                    leading_whitespace = len(line) - len(line.lstrip())
-                    if leading_whitespace < len(line):
-                        if line[leading_whitespace] == '\t':
-                            if indentation_type is None:
-                                indentation_type = 'tabs'
-                            elif indentation_type != 'tabs':
-                                logging.warning(f"Inconsistent use of tabs and spaces for indentation at line {line_number}")
-                                self.counts['consistency_check'] += 1
-                        else:
-                            if indentation_type is None:
-                                indentation_type = 'spaces'
-                            elif indentation_type != 'spaces':
-                                logging.warning(f"Inconsistent use of tabs and spaces for indentation at line {line_number}")
-                                self.counts['consistency_check'] += 1
-                except IndexError as ie:
-                    logging.error(f"IndexError at line {line_number}: {line} - {str(ie)}")
-                    self.counts['consistency_check'] += 1
-
-            # Check for consistent line endings (CRLF or LF)
-            line_endings = set()
-            for line_number, line in enumerate(lines, start=1):
-                if '\r\n' in line:
-                    line_endings.add('CRLF')
-                elif '\n' in line:
-                    line_endings.add('LF')
-
-            if len(line_endings) > 1:
-                logging.warning('Inconsistent line endings found in the script. Use either CRLF(line break "\r\n") or LF(line break "\n"), not both.')
-                self.counts['consistency_check'] += 1
-
-            logging.info(f"Consistency check completed - Count: {self.counts['consistency_check']}")
+            self.report_line_rule('consistency_check')
+            self.log.info(f"Consistency check completed - Count: {self.counts['consistency_check']}")
 
         except FileNotFoundError:
-            logging.error(f"File not found: {self.script_path}")
+            self.log.error(f"File not found: {self.script_path}")
         except Exception as e:
-            logging.error(f"Error during consistency check: {str(e)}")
+            self.log.error(f"Error during consistency check: {str(e)}")
 
     def check_excess_whitespace(self):
         try:
-            with open(self.script_path, "r") as script_file:
-                lines = script_file.readlines()
+            self.report_line_rule('excess_whitespace_check')
+            self.log.info(f"Excess whitespace check completed - Count: {self.counts['excess_whitespace_check']}")
 
-            for line_number, line in enumerate(lines, start=1):
-                stripped_line = line.strip()
-                if stripped_line and re.search(r'\\s{2,}', stripped_line):
-                    logging.warning(f"Excess whitespace detected: Line {line_number} '{stripped_line}' has more than one space between words.")
-                    self.counts['excess_whitespace_check'] += 1
+        except FileNotFoundError:
+            self.log.error(f"File not found: {self.script_path}")
+        except Exception as e:
+            self.log.error(f"Error during excess whitespace check: {str(e)}")
 
-            logging.info(f"Excess whitespace check completed - Count: {self.counts['excess_whitespace_check']}")
+    def check_cross_file_clones(self):
+        try:
+            for start, end, path, other_start, other_end in self.clone_index.find_clones(self.source.lines, exclude_path=self.script_path):
+                self.log.report('cross_file_clone', start, end, path, other_start, other_end)
+                self.counts['cross_file_clone_check'] += 1
+
+            self.log.info(f"Cross-file clone check completed - Count: {self.counts['cross_file_clone_check']}")
 
         except FileNotFoundError:
-            logging.error(f"File not found: {self.script_path}")
+            self.log.error(f"File not found: {self.script_path}")
         except Exception as e:
-            logging.error(f"Error during excess whitespace check: {str(e)}")
+            self.log.error(f"Error during cross-file clone check: {str(e)}")
+
+# Map the check names to more understandable terms for the email body
+CHECK_DISPLAY_NAMES = {
+    'total_lines_check': 'Line Count Verification',
+    'indentation_check': 'Indentation Consistency Inspection',
+    'naming_conventions_check': 'Naming Standards Assessment',
+    'modularization_check': 'Module Structure Evaluation',
+    'consistency_check': 'Code Uniformity Check',
+    'excess_whitespace_check': 'Whitespace Reduction Analysis',
+    'file_encoding_check':'File Format Consistency Verification',
+    'cross_file_clone_check': 'Cross-File Duplication Check'
+}
+
+def counts_table(rows, headers=("Code Quality Metric", "Anomaly Frequency")):
+    # HTML table of (label, count) rows, styled for the report emails
+    table = "<table style='border-collapse: collapse; border: 4px solid black; width: 50%; background-color: #F0F0F0; margin-left: auto; margin-right: auto;'>"
+    table += f"<tr><th style='border: 2px solid black; padding: 15px; text-align: left; background-color: #ADD8E6; color: black;'><b>{headers[0]}</b></th><th style='border: 2px solid black; padding: 15px; text-align: center; background-color: #ADD8E6; color: black; padding-left: 10px; padding-right: 10px;'><b>{headers[1]}</b></th></tr>"
+    for label, count in rows:
+        table += f"<tr><td style='border: 2px solid black; padding: 15px; text-align: left;'>{label}</td><td style='border: 2px solid black; padding: 15px; text-align: center;'>{count}</td></tr>"  # Reduce the cell size of the counts column, change the border color to black, increase the padding to 15px, and left-align the text in the first column
+    table += "</table>"
+    return table
+
+def attach_file(message, filename, data):
+    # Instance of MIMEBase and named as p
+    p = MIMEBase('application', 'octet-stream')
+
+    # To change the payload into encoded form
+    p.set_payload(data)
 
-def send_email(sender_email, sender_password, recipient_email, attachment_path, counts):
+    # encode into base64
+    encoders.encode_base64(p)
+
+    p.add_header('Content-Disposition', "attachment; filename= %s" % filename)  # Use filename instead of attachment_path
+
+    # attach the instance 'p' to instance 'msg'
+    message.attach(p)
+
+def send_email(sender_email, sender_password, recipient_email, attachment_path, counts, transport=None):
     # Create a multipart message
     message = MIMEMultipart()
     message['From'] = sender_email
@@ -473,30 +560,8 @@ def send_email(sender_email, sender_password, recipient_email, attachment_path,
     body = "Please find attached the log file for the script analysis.<br><br>"
     body += "<u><b><font size='4.5' color='#000000'>Summary:</font></b></u><br><br>"
 
-    # Create a table for counts with added CSS for better styling
-    table = "<table style='border-collapse: collapse; border: 4px solid black; width: 50%; background-color: #F0F0F0; margin-left: auto; margin-right: auto;'>"
-    table += "<tr><th style='border: 2px solid black; padding: 15px; text-align: left; background-color: #ADD8E6; color: black;'><b>Code Quality Metric</b></th><th style='border: 2px solid black; padding: 15px; text-align: center; background-color: #ADD8E6; color: black; padding-left: 10px; padding-right: 10px;'><b>Anomaly Frequency</b></th></tr>"
-    
-
-    # Define a dictionary to map the check names to more understandable terms
-    check_names = {
-        'total_lines_check': 'Line Count Verification',
-        'indentation_check': 'Indentation Consistency Inspection',
-        'naming_conventions_check': 'Naming Standards Assessment',
-        'modularization_check': 'Module Structure Evaluation',
-        'consistency_check': 'Code Uniformity Check',
-        'excess_whitespace_check': 'Whitespace Reduction Analysis',
-        'file_encoding_check':'File Format Consistency Verification'
-    }
-
-    for check, count in counts.items():
-        # Replace the check name with the corresponding term in the email body
-        check_name = check_names.get(check, check)
-        table += f"<tr><td style='border: 2px solid black; padding: 15px; text-align: left;'>{check_name}</td><td style='border: 2px solid black; padding: 15px; text-align: center;'>{count}</td></tr>"  # Reduce the cell size of the counts column, change the border color to black, increase the padding to 15px, and left-align the text in the first column
-    table += "</table>"
-
-    # Adding Table to the Message body
-    body += table
+    # Adding Table of the counts to the Message body
+    body += counts_table((CHECK_DISPLAY_NAMES.get(check, check), count) for check, count in counts.items())
 
     # Add a couple of line breaks and the desired text
     body += "<br><br>Please Refer to the Attached Log for the detailed Analysis<br><br>Regards<br>"
@@ -504,33 +569,15 @@ def send_email(sender_email, sender_password, recipient_email, attachment_path,
     message.attach(MIMEText(body, 'html'))
 
     # Open the file to be sent  
-    filename = os.path.basename(attachment_path)
-    attachment = open(attachment_path, "rb")
-
-    # Instance of MIMEBase and named as p
-    p = MIMEBase('application', 'octet-stream')
-
-    # To change the payload into encoded form
-    p.set_payload((attachment).read())
-
-    # encode into base64
-    encoders.encode_base64(p)
-
-    p.add_header('Content-Disposition', "attachment; filename= %s" % filename)  # Use filename instead of attachment_path
-
-    # attach the instance 'p' to instance 'msg'
-    message.attach(p)
+    with open(attachment_path, "rb") as attachment:
+        attach_file(message, os.path.basename(attachment_path), attachment.read())
 
-    # Create SMTP session for sending the mail
-    session = smtplib.SMTP(SMTP_SERVER, SMTP_PORT)
-    session.starttls()  # Enable security
-    session.login(sender_email, sender_password)  # Login
+    # Send over the transport's open session for this sender, logging in only when it has none
     text = message.as_string()
-    session.sendmail(sender_email, recipient_email, text)  # Send email
-    session.quit()  # Terminate the session
+    (transport or default_transport).send(SMTP_SERVER, SMTP_PORT, sender_email, sender_password, recipient_email, text)
 
 # Main program
 if __name__ == "__main__":
     # Analyze the script
     script_analyzer = ScriptAnalyzer(script_path, recipient_email, sender_email, sender_password)
-    script_analyzer.run_analysis()
\ No newline at end of file
+    script_analyzer.run_analysis()
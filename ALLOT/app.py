@@ -1,9 +1,17 @@
 import os
+import uuid
+import atexit
 import shutil
-import logging
-from flask import Flask, render_template, request, redirect, url_for, flash
+from functools import partial
+from flask import Flask, Response, render_template, request, url_for, jsonify
 from werkzeug.utils import secure_filename
-from Script_Analyzer import ScriptAnalyzer
+from archive import ARCHIVE_MAX_MEMBERS, ARCHIVE_MAX_TOTAL_BYTES, is_archive
+from result_cache import RESULT_CACHE_SIZE
+from digest import DIGEST_MAX_REPORTS, DigestQueue
+from outbox import Outbox
+from report_formats import iter_sarif, read_json_lines
+from Script_Analyzer import ANALYZER_VERSION
+from jobs import JOB_QUEUE_SIZE, JOB_WORKERS, JobQueue, JobQueueFull, run_archive_job, run_script_job, start_worker
 
 app = Flask(__name__)
 app.secret_key = 'supersecretkey'
@@ -16,6 +24,47 @@ sender_password = 'civiC@3547'
 SMTP_SERVER = 'smtp-mail.outlook.com'
 SMTP_PORT = 587
 
+# Optional cross-file clone index (built with `python clone_index.py build <root>`), kept outside Uploads
+CLONE_INDEX_PATH = os.environ.get('CLONE_INDEX_PATH')
+
+# Findings of recently analyzed scripts (per job worker), so re-uploading an unchanged file skips the checks
+RESULT_CACHE_SIZE = int(os.environ.get('RESULT_CACHE_SIZE', RESULT_CACHE_SIZE))
+
+# Optional SQLite store of every run and its findings (query with `python results_store.py top <check>`)
+RESULTS_STORE_PATH = os.environ.get('RESULTS_STORE_PATH')
+
+# Threads running the checks of one upload (1 runs them one after another)
+CHECK_WORKERS = int(os.environ.get('CHECK_WORKERS', 1))
+
+# Limits of uploaded .zip/.tar.gz archives, whose members are analyzed by the job worker handling the upload
+archive_limits = {'max_members': int(os.environ.get('ARCHIVE_MAX_MEMBERS', ARCHIVE_MAX_MEMBERS)),
+                  'max_total_bytes': int(os.environ.get('ARCHIVE_MAX_TOTAL_BYTES', ARCHIVE_MAX_TOTAL_BYTES))}
+
+# Report emails are spooled durably here (kept outside Uploads, which is cleared at start) and sent by a
+# background sender in this process with retries, so neither analysis nor uploads wait on the mail server
+OUTBOX_DIR = os.environ.get('OUTBOX_DIR', os.path.join(os.path.dirname(os.path.realpath(__file__)), 'Outbox'))
+outbox = Outbox(OUTBOX_DIR, passwords={sender_email: sender_password})
+atexit.register(outbox.close)
+
+# Uploads are analyzed by a bounded pool of job workers; the request only queues them
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', JOB_WORKERS))
+JOB_QUEUE_SIZE = int(os.environ.get('JOB_QUEUE_SIZE', JOB_QUEUE_SIZE))
+worker_settings = {'sender_email': sender_email, 'sender_password': sender_password,
+                   'result_cache_size': RESULT_CACHE_SIZE, 'results_store_path': RESULTS_STORE_PATH,
+                   'clone_index_path': CLONE_INDEX_PATH, 'check_workers': CHECK_WORKERS,
+                   'archive_limits': archive_limits, 'outbox_dir': OUTBOX_DIR}
+job_queue = JobQueue(JOB_WORKERS, JOB_QUEUE_SIZE, initializer=start_worker, initargs=(worker_settings,))
+
+# Digest mode: with DIGEST_WINDOW set (seconds), reports are held per recipient and sent as one email
+# when the window ends or DIGEST_MAX_REPORTS are waiting, instead of one email per upload
+DIGEST_WINDOW = float(os.environ.get('DIGEST_WINDOW', 0))
+digest = DigestQueue(sender_email, sender_password, DIGEST_WINDOW, int(os.environ.get('DIGEST_MAX_REPORTS', DIGEST_MAX_REPORTS)),
+                     transport=outbox) if DIGEST_WINDOW > 0 else None
+if digest is not None:
+    atexit.register(digest.close)
+# Registered last so it runs first at exit: running jobs finish and hand their reports to the digest and outbox
+atexit.register(job_queue.close)
+
 # Delete the existing directory if it exists
 if os.path.exists(UPLOAD_FOLDER):
     shutil.rmtree(UPLOAD_FOLDER)
@@ -33,34 +82,85 @@ def index():
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def open_findings(path):
+    # The findings file line by line, so large ones are never read into memory at once
+    with open(path) as findings_file:
+        yield from findings_file
+
+def hold_report(recipient_email, name, future):
+    # Done callback of a job in digest mode: keeps its log for the recipient's next digest
+    if future.cancelled() or future.exception() is not None:
+        return
+    result = future.result()
+    digest.add(recipient_email, result.get('log_file') or result['report'], result['counts'], name)
+
 @app.route('/upload', methods=['POST'])
 def upload_file():
+    # Saves the upload and queues its analysis; returns the job id at once (poll /jobs/<id> for progress)
     recipient_email = request.form.get('recipient_email')  # Retrieve recipient email from the form
     if 'file' not in request.files:
-        flash('No file part')
-        return redirect(request.url)
+        return jsonify(error='No file part'), 400
     file = request.files['file']
     if file.filename == '':
-        flash('No selected file')
-        return redirect(request.url)
-    if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
-        # Save the uploaded file to the uploads folder
-        file_path = os.path.join(UPLOAD_FOLDER, filename)
-        file.save(file_path)
-        analyzer = ScriptAnalyzer(file_path, recipient_email, sender_email, sender_password)
-        try:
-            analyzer.run_analysis()
-            # Remove all handlers from the logger
-            for handler in logging.root.handlers[:]:
-                logging.root.removeHandler(handler)
-            flash('File successfully uploaded and analyzed. Email sent successfully')
-        except Exception as e:
-            flash(f'Error analyzing the file and sending email: {str(e)}', 'error')
-        return redirect(url_for('index'))
+        return jsonify(error='No selected file'), 400
+    if not (is_archive(file.filename) or allowed_file(file.filename)):
+        return jsonify(error='Allowed file types are .cpp, .zip and .tar.gz'), 400
+    filename = secure_filename(file.filename)
+    # Each upload gets its own folder, so queued uploads of the same name do not overwrite each other
+    upload_id = uuid.uuid4().hex
+    upload_folder = os.path.join(UPLOAD_FOLDER, upload_id)
+    os.makedirs(upload_folder)
+    file_path = os.path.join(upload_folder, filename)
+    file.save(file_path)
+    # Findings as JSON lines, served by /jobs/<id>/result?format=jsonl or sarif
+    findings_path = os.path.join(upload_folder, 'findings.jsonl')
+    try:
+        if is_archive(filename):
+            job = job_queue.submit('archive', filename, run_archive_job, file_path, recipient_email,
+                                   os.path.join(upload_folder, 'Logs'), os.path.join(upload_folder, f"Report-{filename}.log"),
+                                   digest is None, findings_path, job_id=upload_id)
+        else:
+            job = job_queue.submit('script', filename, run_script_job, file_path, recipient_email, digest is None,
+                                   findings_path, job_id=upload_id)
+    except JobQueueFull as e:
+        shutil.rmtree(upload_folder, ignore_errors=True)
+        return jsonify(error=str(e)), 503
+    if digest is not None:
+        job.future.add_done_callback(partial(hold_report, recipient_email, filename))
     else:
-        flash('Allowed file types are .cpp', 'error')
-        return redirect(request.url)
+        # The worker has spooled the report by the time the job is done
+        job.future.add_done_callback(lambda _: outbox.wake())
+    return jsonify(job_id=job.id, status=job.status, status_url=url_for('job_status', job_id=job.id),
+                   result_url=url_for('job_result', job_id=job.id)), 202
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify(error='Unknown job'), 404
+    return jsonify(job.to_dict())
+
+@app.route('/jobs/<job_id>/result')
+def job_result(job_id):
+    # 200 with the result once done, 202 while queued or running, 500 when the analysis or email failed.
+    # ?format=jsonl returns the findings as JSON lines, ?format=sarif as a SARIF 2.1.0 log; both are streamed
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify(error='Unknown job'), 404
+    output_format = request.args.get('format', 'json')
+    if output_format not in ('json', 'jsonl', 'sarif'):
+        return jsonify(error='Formats are json, jsonl and sarif'), 400
+    status = job.status
+    if status == 'done' and output_format == 'jsonl':
+        return Response(open_findings(job.result['findings_file']), mimetype='application/x-ndjson')
+    if status == 'done' and output_format == 'sarif':
+        return Response(iter_sarif(read_json_lines(job.result['findings_file']), ANALYZER_VERSION),
+                        mimetype='application/sarif+json')
+    if status == 'done':
+        return jsonify(id=job.id, status=status, result=job.result)
+    if status == 'failed':
+        return jsonify(id=job.id, status=status, error=job.error), 500
+    return jsonify(job.to_dict()), 202
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
@@ -0,0 +1,155 @@
+import os
+import logging
+import tarfile
+import zipfile
+from collections import deque
+from pathlib import PurePosixPath
+
+from batch import BATCH_CHUNK_SIZE, BatchSummary, analyze_file
+from clone_index import SOURCE_EXTENSIONS
+
+ARCHIVE_SUFFIXES = ('.zip', '.tar.gz', '.tgz')
+ARCHIVE_MAX_MEMBERS = 10000  # Entries read from one archive, source or not
+ARCHIVE_MAX_TOTAL_BYTES = 256 * 1024 * 1024  # Uncompressed bytes decompressed from one archive
+ARCHIVE_MAX_PENDING = 8  # Chunks of members read ahead of the analysis, so a large archive is not held in memory at once
+
+
+class ArchiveLimitError(ValueError):
+    """An archive has more members or more uncompressed data than the limits allow."""
+
+
+def is_archive(filename):
+    return filename.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def member_path(name):
+    # Archive member name as a relative POSIX path, without '..' or absolute parts
+    parts = [part for part in PurePosixPath(name.replace('\\', '/')).parts if part not in ('/', '..', '.')]
+    return PurePosixPath(*parts) if parts else None
+
+
+class _Budget:
+    # Counts members and uncompressed bytes against the limits of one archive
+
+    def __init__(self, max_members, max_total_bytes):
+        self.max_members = max_members
+        self.max_total_bytes = max_total_bytes
+        self.members = 0
+        self.total_bytes = 0
+
+    def add_member(self):
+        self.members += 1
+        if self.members > self.max_members:
+            raise ArchiveLimitError(f"Archive has more than {self.max_members} members")
+
+    def add_bytes(self, count):
+        self.total_bytes += count
+        if self.total_bytes > self.max_total_bytes:
+            raise ArchiveLimitError(f"Archive expands to more than {self.max_total_bytes} bytes")
+
+    def read(self, member_file):
+        # Reads at most one byte past the remaining budget, whatever size the archive header claims
+        data = member_file.read(self.max_total_bytes - self.total_bytes + 1)
+        self.add_bytes(len(data))
+        return data
+
+
+def _zip_members(stream, budget, extensions):
+    # zipfile needs a seekable stream for the central directory; members are still decompressed one at a time
+    with zipfile.ZipFile(stream) as archive:
+        for info in archive.infolist():
+            budget.add_member()
+            path = member_path(info.filename)
+            if info.is_dir() or path is None or path.suffix.lower() not in extensions:
+                continue
+            with archive.open(info) as member_file:
+                yield str(path), budget.read(member_file)
+
+
+def _tar_members(stream, budget, extensions):
+    # Stream mode reads the archive front to back without seeking; skipped members are still decompressed
+    with tarfile.open(fileobj=stream, mode='r|*') as archive:
+        for member in archive:
+            budget.add_member()
+            path = member_path(member.name)
+            if not member.isfile() or path is None or path.suffix.lower() not in extensions:
+                budget.add_bytes(member.size if member.isfile() else 0)
+                continue
+            yield str(path), budget.read(archive.extractfile(member))
+
+
+def iter_archive_members(stream, filename, max_members=ARCHIVE_MAX_MEMBERS, max_total_bytes=ARCHIVE_MAX_TOTAL_BYTES,
+                         extensions=SOURCE_EXTENSIONS):
+    """Yield (member path, bytes) for each source file of a .zip or .tar.gz archive, in archive order.
+
+    Nothing is extracted to disk. Raises ArchiveLimitError as soon as a limit
+    is exceeded, and zipfile.BadZipFile or tarfile.TarError for corrupt input.
+    """
+    budget = _Budget(max_members, max_total_bytes)
+    members = _zip_members if filename.lower().endswith('.zip') else _tar_members
+    yield from members(stream, budget, extensions)
+
+
+def _analyze_chunk(jobs):
+    return [analyze_file(*job) for job in jobs]
+
+
+def analyze_archive(stream, filename, pool, log_dir, options=None, max_members=ARCHIVE_MAX_MEMBERS,
+                    max_total_bytes=ARCHIVE_MAX_TOTAL_BYTES, max_pending=ARCHIVE_MAX_PENDING, chunk_size=BATCH_CHUNK_SIZE):
+    """Analyze the source members of an archive on a process pool; yields FileResults in archive order.
+
+    Members are submitted in chunks of chunk_size as soon as they are read,
+    while the next ones are being decompressed. With pool None they are
+    analyzed one by one in this process, e.g. in a job worker that is
+    already one of several processes. Member paths are reported as
+    '<archive name>/<member>' and their logs are written under log_dir,
+    mirroring the archive's folders.
+    """
+    root = os.path.basename(filename)
+    if pool is None:
+        for name, raw in iter_archive_members(stream, filename, max_members, max_total_bytes):
+            yield analyze_file(f"{root}/{name}", root, log_dir, options, raw)
+        return
+    pending = deque()
+    chunk = []
+    try:
+        for name, raw in iter_archive_members(stream, filename, max_members, max_total_bytes):
+            chunk.append((f"{root}/{name}", root, log_dir, options, raw))
+            if len(chunk) < chunk_size:
+                continue
+            pending.append(pool.submit(_analyze_chunk, chunk))
+            chunk = []
+            if len(pending) >= max_pending:
+                yield from pending.popleft().result()
+        if chunk:
+            pending.append(pool.submit(_analyze_chunk, chunk))
+        while pending:
+            yield from pending.popleft().result()
+    finally:
+        # Limit exceeded, corrupt archive or consumer gone: drop the work not started yet
+        for future in pending:
+            future.cancel()
+
+
+def write_archive_report(report_path, summary, results):
+    """Write the combined report of an archive: the batch summary, then the findings of each member."""
+    with open(report_path, 'w') as report:
+        report.write(summary.format())
+        for result in results:
+            if result.error:
+                report.write(f"\n{result.path}: FAILED ({result.error})\n")
+            elif result.findings:
+                report.write(f"\n{result.path}:\n")
+            for finding in result.findings:
+                report.write(f"  {logging.getLevelName(finding.severity)} [{finding.check}] {finding.message}\n")
+
+
+def summarize_archive(stream, filename, pool, log_dir, options=None, **limits):
+    # Runs the whole archive and returns its BatchSummary with the FileResults, for the combined report
+    summary = BatchSummary()
+    results = []
+    for result in analyze_archive(stream, filename, pool, log_dir, options, **limits):
+        summary.add(result)
+        results.append(result)
+    return summary, results
+
@@ -0,0 +1,167 @@
+import io
+import os
+import sys
+import glob
+import json
+import time
+import logging
+import argparse
+from pathlib import Path
+from collections import Counter, namedtuple
+from contextlib import redirect_stdout
+from concurrent.futures import ProcessPoolExecutor
+
+from Script_Analyzer import ANALYZER_VERSION, ScriptAnalyzer
+from source_buffer import SourceBuffer
+from clone_index import SOURCE_EXTENSIONS
+from report_formats import JsonLinesWriter, SarifWriter, finding_record
+
+BATCH_CHUNK_SIZE = 8  # Files handed to a worker at a time; keeps per-file IPC small on large trees
+DEFAULT_LOG_DIR = 'Batch-Logs'
+
+# findings: the WARNING and ERROR Findings of the log; error: set when the analysis itself failed
+FileResult = namedtuple('FileResult', 'path counts findings seconds error')
+
+
+def iter_sources(target, extensions=SOURCE_EXTENSIONS):
+    # Source files under a directory, or matching a glob pattern, in a stable order
+    if os.path.isdir(target):
+        for directory, directory_names, file_names in os.walk(target):
+            directory_names[:] = sorted(name for name in directory_names if name != 'Logs')
+            for file_name in sorted(file_names):
+                if os.path.splitext(file_name)[1].lower() in extensions:
+                    yield os.path.join(directory, file_name)
+    else:
+        for path in sorted(glob.glob(target, recursive=True)):
+            if os.path.isfile(path):
+                yield path
+
+
+def analyze_file(path, root=None, log_dir=DEFAULT_LOG_DIR, options=None, raw=None):
+    """Run the checks on one file without emailing it and return a FileResult.
+
+    The log is written under log_dir, mirroring the file's place below root,
+    so files with the same name in different folders keep separate logs.
+    When raw is given, those bytes are analyzed and path only names them.
+    """
+    relative_parent = Path(os.path.relpath(path, root)).parent if root else Path()
+    started = time.perf_counter()
+    analyzer = None
+    try:
+        source = SourceBuffer(raw, path=path) if raw is not None else None
+        analyzer = ScriptAnalyzer(path, None, None, None, log_folder=Path(log_dir) / relative_parent,
+                                  send_report=False, source=source, **(options or {}))
+        with redirect_stdout(io.StringIO()):
+            analyzer.run_analysis()
+        # Findings cross the process boundary as their parts; messages are rendered by whoever reports them
+        findings = tuple(finding for finding in analyzer.log.entries if finding.severity >= logging.WARNING)
+        error = None if analyzer.error_count == 0 else "analysis failed, see log"
+        return FileResult(path, dict(analyzer.counts), findings, time.perf_counter() - started, error)
+    except Exception as e:
+        counts = dict(analyzer.counts) if analyzer is not None else {}
+        return FileResult(path, counts, (), time.perf_counter() - started, str(e))
+
+
+def _analyze_in_worker(job):
+    return analyze_file(*job)
+
+
+def analyze_tree(target, max_workers=None, log_dir=DEFAULT_LOG_DIR, options=None, chunk_size=BATCH_CHUNK_SIZE):
+    """Analyze every source file under a directory (or matching a glob) across a process pool.
+
+    Yields one FileResult per file as results arrive, in file order.
+    """
+    root = target if os.path.isdir(target) else None
+    jobs = ((path, root, log_dir, options) for path in iter_sources(target))
+    if max_workers == 1:
+        yield from map(_analyze_in_worker, jobs)
+        return
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        yield from pool.map(_analyze_in_worker, jobs, chunksize=chunk_size)
+
+
+class BatchSummary:
+    """Totals over the files of one batch run."""
+
+    def __init__(self):
+        self.files = 0
+        self.files_with_issues = 0
+        self.failed = []
+        self.totals = Counter()
+        self.worst = {}  # check -> (count, path) of the file with the most issues of that check
+        self.seconds = 0.0
+
+    def add(self, result):
+        self.files += 1
+        self.seconds += result.seconds
+        if result.error:
+            self.failed.append((result.path, result.error))
+        if any(count > 0 for count in result.counts.values()):
+            self.files_with_issues += 1
+        for check, count in result.counts.items():
+            self.totals[check] += count
+            if count > self.worst.get(check, (0, None))[0]:
+                self.worst[check] = (count, result.path)
+
+    def format(self, wall_seconds=None):
+        summary = "\n---------------------------------------------\n"
+        summary += f"  Batch summary: {self.files} files, {self.files_with_issues} with issues, {len(self.failed)} failed\n"
+        summary += "--------------------------------\n"
+        summary += "\tCheck\t\t\t\t Count\t Worst file\n"
+        summary += "--------------------------------\n"
+        for check, count in self.totals.items():
+            if count >= 1:
+                worst_count, worst_path = self.worst[check]
+                summary += f" {check.ljust(25)}{str(count).ljust(8)}{worst_path} ({worst_count})\n"
+        for path, error in self.failed:
+            summary += f" Failed: {path}: {error}\n"
+        if wall_seconds is not None:
+            summary += f" Analysis time {self.seconds:.2f} s over {wall_seconds:.2f} s wall clock\n"
+        summary += "---------------------------------------------\n"
+        return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze every C/C++ source under a directory or matching a glob.")
+    parser.add_argument('target', help="directory or glob pattern, e.g. 'src/**/*.cpp'")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument('--log-dir', default=DEFAULT_LOG_DIR, help="folder receiving the per-file logs")
+    parser.add_argument('--repetition-mode', choices=['window', 'maximal'], default=None)
+    parser.add_argument('--jsonl', action='store_true', help="print each file's result as a JSON line")
+    parser.add_argument('--findings', choices=['jsonl', 'sarif'], default=None,
+                        help="print every finding as a JSON line or the whole run as a SARIF 2.1.0 log; "
+                             "the summary goes to stderr")
+    parser.add_argument('--quiet', action='store_true', help="only print the summary")
+    args = parser.parse_args(argv)
+
+    options = {'repetition_mode': args.repetition_mode} if args.repetition_mode else None
+    summary = BatchSummary()
+    writer = None
+    if args.findings == 'jsonl':
+        writer = JsonLinesWriter(sys.stdout)
+    elif args.findings == 'sarif':
+        writer = SarifWriter(sys.stdout, ANALYZER_VERSION)
+    started = time.perf_counter()
+    for result in analyze_tree(args.target, args.workers, args.log_dir, options):
+        summary.add(result)
+        if writer is not None:
+            # Written file by file as results arrive, so memory does not grow with the number of findings
+            for finding in result.findings:
+                writer.add(result.path, finding)
+        elif args.jsonl:
+            print(json.dumps(dict(result._asdict(), findings=[finding_record(result.path, finding)
+                                                              for finding in result.findings])))
+        elif not args.quiet:
+            issues = sum(result.counts.values())
+            status = f"FAILED ({result.error})" if result.error else f"{issues} issues"
+            print(f"{result.path}: {status}")
+    if writer is not None:
+        writer.close()
+        print(summary.format(time.perf_counter() - started), end='', file=sys.stderr)
+    elif not args.jsonl:
+        print(summary.format(time.perf_counter() - started), end='')
+    return 1 if summary.failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
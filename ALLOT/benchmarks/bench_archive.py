@@ -0,0 +1,71 @@
+# Analysis of an uploaded archive of --files sources (For_Review cycled, one folder per copy):
+# streaming the members into the process pool versus extracting the archive to disk and
+# running batch.analyze_tree over it. Reading the members alone is timed too.
+import io
+import os
+import argparse
+import tarfile
+import zipfile
+import tempfile
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+from bench_utils import FOR_REVIEW_DIR, best_of, print_table
+from archive import iter_archive_members, summarize_archive
+from batch import BatchSummary, analyze_tree, iter_sources
+
+
+def build_archives(files):
+    sources = [(Path(path).name, Path(path).read_bytes()) for path in iter_sources(str(FOR_REVIEW_DIR))]
+    members = [(f"src/copy{index // len(sources)}/{sources[index % len(sources)][0]}", sources[index % len(sources)][1])
+               for index in range(files)]
+    zip_buffer = io.BytesIO()
+    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, data in members:
+            archive.writestr(name, data)
+    tar_buffer = io.BytesIO()
+    with tarfile.open(fileobj=tar_buffer, mode='w:gz') as archive:
+        for name, data in members:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    return {'project.zip': zip_buffer.getvalue(), 'project.tar.gz': tar_buffer.getvalue()}
+
+
+def extract_and_batch(filename, data, work, workers):
+    target = Path(work) / "extracted"
+    if filename.endswith('.zip'):
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            archive.extractall(target)
+    else:
+        with tarfile.open(fileobj=io.BytesIO(data), mode='r:gz') as archive:
+            archive.extractall(target, filter='data')
+    summary = BatchSummary()
+    for result in analyze_tree(str(target), workers, Path(work) / "extract-logs"):
+        summary.add(result)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--files', type=int, default=5000, help="source members in the archive")
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    archives = build_archives(args.files)
+    rows = []
+    with tempfile.TemporaryDirectory() as work, ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for filename, data in archives.items():
+            read_seconds, members = best_of(lambda: sum(1 for _ in iter_archive_members(io.BytesIO(data), filename)), repeat=3)
+            stream_seconds, (summary, _) = best_of(
+                lambda: summarize_archive(io.BytesIO(data), filename, pool, Path(work) / "logs"), repeat=1)
+            extract_seconds, extracted = best_of(lambda: extract_and_batch(filename, data, work, args.workers), repeat=1)
+            assert summary.files == extracted.files == members and summary.totals == extracted.totals
+            rows.append([filename, f"{len(data) / 1e6:.1f}", f"{read_seconds:.2f}", f"{stream_seconds:.1f}",
+                         f"{summary.files / stream_seconds:.0f}", f"{extract_seconds:.1f}"])
+    print_table(f"Archive of {args.files} sources ({os.cpu_count()} CPUs)",
+                ["archive", "MB", "read members s", "streamed s", "files/s", "extract + batch s"], rows)
+
+
+if __name__ == "__main__":
+    main()
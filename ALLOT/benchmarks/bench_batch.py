@@ -0,0 +1,53 @@
+# Batch throughput against the number of worker processes, on a corpus of --copies
+# copies of For_Review. Each copy sits in its own folder so the logs stay apart.
+# Scaling is bounded by the CPUs of the machine, which the table title reports.
+import os
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+
+from bench_utils import FOR_REVIEW_DIR, best_of, print_table
+from batch import BatchSummary, analyze_tree, iter_sources
+
+
+def build_corpus(work, copies):
+    corpus = Path(work) / "corpus"
+    for copy in range(copies):
+        folder = corpus / f"copy{copy}"
+        folder.mkdir(parents=True)
+        for path in iter_sources(str(FOR_REVIEW_DIR)):
+            shutil.copy(path, folder)
+    return corpus
+
+
+def run_batch(corpus, log_dir, workers):
+    summary = BatchSummary()
+    for result in analyze_tree(str(corpus), workers, log_dir):
+        summary.add(result)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--copies', type=int, default=20, help="copies of For_Review in the corpus")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work:
+        corpus = build_corpus(work, args.copies)
+        rows = []
+        baseline = None
+        expected_totals = None
+        for workers in args.workers:
+            seconds, summary = best_of(lambda: run_batch(corpus, Path(work) / f"logs{workers}", workers), repeat=3)
+            assert expected_totals is None or summary.totals == expected_totals
+            expected_totals = summary.totals
+            baseline = baseline or seconds
+            rows.append([workers, summary.files, f"{seconds:.2f}", f"{summary.files / seconds:.0f}", f"{baseline / seconds:.2f}x"])
+    print_table(f"Batch analysis of {args.copies} copies of For_Review ({os.cpu_count()} CPUs)",
+                ["workers", "files", "seconds", "files/s", "vs 1 worker"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# Build, incremental-refresh and query throughput of the cross-file clone
+# index on a generated corpus (10,000 files by default) in a temporary directory.
+# Every file starts with the same license header, whose window is boilerplate the
+# lookups skip (CLONE_MAX_WINDOW_FREQUENCY) instead of reading a row per file.
+#
+#   python benchmarks/bench_clone_index.py [--files 10000] [--lines 150]
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from bench_utils import print_table
+from clone_index import CloneIndex
+from source_buffer import SourceBuffer
+
+
+def write_corpus(root, file_count, lines_per_file, seed=11):
+    # Each file has the shared header, then mixes unique statements with blocks copied from a shared pool
+    rng = random.Random(seed)
+    shared_blocks = [[f"    shared_{block}_{line}(state, {line});" for line in range(rng.randint(5, 20))] for block in range(5000)]
+    total_lines = 0
+    for file_number in range(file_count):
+        directory = os.path.join(root, f"module_{file_number % 100:03d}")
+        os.makedirs(directory, exist_ok=True)
+        lines = ["// Copyright (c) ALLOT", "// All rights reserved.", "#include \"common.h\"",
+                 f"#include \"module_{file_number}.h\""]
+        while len(lines) < lines_per_file:
+            if rng.random() < 0.1:
+                lines.extend(rng.choice(shared_blocks))
+            else:
+                lines.append(f"    local_{file_number}_{len(lines)} = compute({len(lines)});")
+        with open(os.path.join(directory, f"file_{file_number}.cpp"), "w") as source_file:
+            source_file.write("\n".join(lines) + "\n")
+        total_lines += len(lines)
+    return total_lines
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=10000)
+    parser.add_argument("--lines", type=int, default=150)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workspace:
+        corpus = os.path.join(workspace, "corpus")
+        total_lines = write_corpus(corpus, args.files, args.lines)
+        with CloneIndex(os.path.join(workspace, "clone_index.db")) as index:
+            start = time.perf_counter()
+            index.update_tree(corpus)
+            build_seconds = time.perf_counter() - start
+            files, windows = index.stats()
+
+            start = time.perf_counter()
+            index.update_tree(corpus)
+            refresh_seconds = time.perf_counter() - start
+
+            query_paths = [os.path.join(corpus, f"module_{number % 100:03d}", f"file_{number}.cpp")
+                           for number in random.Random(3).sample(range(args.files), min(args.queries, args.files))]
+            sources = [SourceBuffer.from_path(path).lines for path in query_paths]
+            query_windows = sum(max(0, len(lines) - index.window_length + 1) for lines in sources)
+            clones = 0
+            start = time.perf_counter()
+            for path, lines in zip(query_paths, sources):
+                clones += len(index.find_clones(lines, exclude_path=path))
+            query_seconds = time.perf_counter() - start
+
+    rows = [
+        ["full build", f"{files:,} files / {windows:,} windows", f"{build_seconds:.2f}",
+         f"{files / build_seconds:,.0f} files/s, {total_lines / build_seconds:,.0f} lines/s"],
+        ["refresh, nothing changed", f"{files:,} files", f"{refresh_seconds:.2f}", f"{files / refresh_seconds:,.0f} files/s"],
+        ["query uploads", f"{len(sources)} files / {query_windows:,} windows, {clones:,} clones",
+         f"{query_seconds:.2f}", f"{query_windows / query_seconds:,.0f} windows/s"],
+    ]
+    print_table("Cross-file clone index", ["operation", "size", "seconds", "throughput"], rows)
+
+
+if __name__ == "__main__":
+    main()
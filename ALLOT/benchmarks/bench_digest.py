@@ -0,0 +1,63 @@
+# One recipient's --reports analysis reports: one email each (over a pooled MailTransport)
+# versus a DigestQueue sending one digest with a zip of the logs, against the local SMTP
+# stand-in. The logs come from analyzing For_Review; --rtt delays every server reply.
+import argparse
+import tempfile
+from pathlib import Path
+
+from bench_utils import FOR_REVIEW_DIR, best_of, print_table
+from smtp_standin import SMTPStandIn, client_ssl_context
+import Script_Analyzer
+from batch import analyze_tree
+from digest import DigestQueue
+from mail_transport import MailTransport
+
+RECIPIENT = 'to@example.com'
+
+
+def make_reports(work, count):
+    # (log path, counts) of analyzing For_Review, cycled up to count reports
+    log_dir = Path(work) / "logs"
+    results = list(analyze_tree(str(FOR_REVIEW_DIR), 1, log_dir))
+    logs = sorted(log_dir.glob("*.log"))
+    return [(logs[index % len(logs)], results[index % len(results)].counts) for index in range(count)]
+
+
+def one_email_each(reports):
+    transport = MailTransport(ssl_context=client_ssl_context())
+    for log_path, counts in reports:
+        Script_Analyzer.send_email('from@example.com', 'secret', RECIPIENT, log_path, counts, transport=transport)
+    transport.close()
+
+
+def one_digest(reports):
+    transport = MailTransport(ssl_context=client_ssl_context())
+    digest = DigestQueue('from@example.com', 'secret', window=3600, max_reports=len(reports), transport=transport)
+    for log_path, counts in reports:
+        digest.add(RECIPIENT, log_path, counts)
+    digest.close()
+    transport.close()
+    assert digest.digests == 1
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--reports', type=int, default=40)
+    parser.add_argument('--rtt', type=float, default=0.02, help="seconds added to every server reply")
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as work, SMTPStandIn(rtt=args.rtt) as server:
+        reports = make_reports(work, args.reports)
+        Script_Analyzer.SMTP_SERVER, Script_Analyzer.SMTP_PORT = '127.0.0.1', server.port
+        for name, send in [("one email per report", one_email_each), ("digest", one_digest)]:
+            before = dict(server.counts)
+            seconds, _ = best_of(lambda: send(reports), repeat=1)
+            rows.append([name, server.counts['messages'] - before['messages'],
+                         f"{(server.counts['bytes'] - before['bytes']) / 1024:.0f}", f"{seconds:.2f}"])
+    print_table(f"{args.reports} reports for one recipient, {args.rtt * 1000:.0f} ms rtt",
+                ["mode", "emails", "KiB sent", "seconds"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# Memory and CPU per finding on a generated script with --findings findings (two per line:
+# a TAB and a pointer not starting with 'p'). The line rules run once formatting every
+# message as it is found, as they did before Finding (str.format of the same templates
+# stands in for the former f-strings), and once keeping Finding objects whose messages
+# are rendered only when the log is written.
+import time
+import logging
+import argparse
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+from bench_utils import print_table
+from findings_collector import FINDING_MESSAGES, FindingsCollector
+from line_engine import LineEngine, LineRule
+from line_rules import build_line_rules
+from source_buffer import SourceBuffer
+
+
+def generated_source(findings):
+    return SourceBuffer(b''.join(f"\tint *value{number};\n".encode() for number in range(findings // 2)))
+
+
+def eager(level):
+    # The former LineRule.warn/error_finding: a (level, message) pair formatted as soon as the finding is made
+    def add_finding(self, rule, line=None, *args, column=None, counted=True):
+        self.findings.append((level, FINDING_MESSAGES[rule].format(*args, line=line, column=column)))
+        if counted:
+            self.count += 1
+    return add_finding
+
+
+def run_rules(source, formatted):
+    lazy = LineRule.warn, LineRule.error_finding
+    if formatted:
+        LineRule.warn, LineRule.error_finding = eager(logging.WARNING), eager(logging.ERROR)
+    try:
+        rules = build_line_rules(4, [])
+        LineEngine(rules).run(source)
+    finally:
+        LineRule.warn, LineRule.error_finding = lazy
+    return [finding for rule in rules for finding in rule.findings]
+
+
+def measure(source, formatted, log_file):
+    started = time.perf_counter()
+    findings = run_rules(source, formatted)
+    collect_seconds = time.perf_counter() - started
+
+    collector = FindingsCollector()
+    started = time.perf_counter()
+    if formatted:
+        for level, message in findings:
+            collector.log(level, message)
+    else:
+        collector.extend(findings)
+    collector.write(log_file)
+    write_seconds = time.perf_counter() - started
+    del findings, collector
+
+    # Memory in a second run: tracemalloc slows everything it traces
+    tracemalloc.start()
+    findings = run_rules(source, formatted)
+    kept, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(findings), kept, peak, collect_seconds, write_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--findings', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    source = generated_source(args.findings)
+    lines = len(source.stripped_lines)  # Split before measuring; the analyzer shares the lines between all checks
+    rows = []
+    with tempfile.TemporaryDirectory() as work:
+        for name, formatted in [("formatted strings", True), ("Finding, rendered on write", False)]:
+            log_file = Path(work) / f"{name}.log"
+            count, kept, peak, collect_seconds, write_seconds = measure(source, formatted, log_file)
+            rows.append([name, f"{count:,}", f"{kept / count:.0f}", f"{peak / 1e6:.0f}",
+                         f"{collect_seconds * 1e9 / count:.0f}", f"{write_seconds * 1e9 / count:.0f}",
+                         f"{log_file.stat().st_size / 1e6:.0f}"])
+    print_table(f"Line rules on {lines:,} generated lines",
+                ["findings kept as", "findings", "bytes/finding", "peak MB", "collect ns/finding",
+                 "write ns/finding", "log MB"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# check_code_reuse's original scan (every line tested for every function name
+# with a substring test) versus IdentifierIndex, which it now uses (one
+# tokenization pass, then dictionary lookups; calls only, outside comments and
+# strings), on HRM_Server.cpp repeated 50 times.
+import re
+
+from bench_utils import best_of, default_input, print_table
+from identifier_index import IdentifierIndex
+from source_buffer import SourceBuffer
+
+SCALE = 50
+
+
+def substring_scan(lines):
+    function_definitions = []
+    for line_number, line in enumerate(lines, start=1):
+        if line.startswith("int ") or line.startswith("void "):
+            function_name = re.search(r'\b[a-zA-Z_][a-zA-Z0-9_]*\s*\(', line)
+            if function_name:
+                function_definitions.append((function_name.group().strip(), line_number))
+
+    function_calls = {}
+    for line_number, line in enumerate(lines, start=1):
+        for function_name, _ in function_definitions:
+            if function_name in line:
+                function_calls.setdefault(function_name, []).append(line_number)
+    return function_definitions, function_calls
+
+
+def identifier_index(text):
+    index = IdentifierIndex.from_text(text)
+    return index.definitions, {name: index.calls_to(name) for name in index.definitions}
+
+
+def main():
+    source = SourceBuffer.from_path(default_input())
+    text = source.text * SCALE
+    lines = SourceBuffer(text.encode('utf-8')).lines
+    scan_seconds, (scan_definitions, _) = best_of(lambda: substring_scan(lines), repeat=3)
+    index_seconds, (index_definitions, _) = best_of(lambda: identifier_index(text), repeat=3)
+    rows = [
+        ["substring scan", len(scan_definitions), f"{scan_seconds:.3f}"],
+        ["IdentifierIndex", len(index_definitions), f"{index_seconds:.3f}"],
+    ]
+    print_table(f"Function definitions and call sites, {default_input()} x{SCALE} ({len(lines):,} lines)",
+                ["implementation", "definitions", "seconds"], rows)
+    print(f"\nspeedup: {scan_seconds / index_seconds:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# Upload throughput under concurrent load: --clients clients each upload --uploads scripts.
+# "inline" models the old endpoint: each of --http-workers request workers (processes, as
+# sync server workers are) runs the analysis and the email before it answers. "queued"
+# answers once the upload is saved and queued in a JobQueue of --job-workers processes.
+# Email sending is replaced by a --smtp-delay sleep standing in for the mail server.
+# With --url, the load goes to a running app instead (e.g. http://127.0.0.1:5000) and
+# each client polls its jobs' result endpoints until they finish.
+import os
+import json
+import time
+import uuid
+import shutil
+import argparse
+import tempfile
+import statistics
+import urllib.error
+import urllib.request
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from bench_utils import default_input, print_table
+import Script_Analyzer
+from jobs import JobQueue, run_script_job, start_worker
+
+
+def slow_mail_server(delay):
+    def send_email(*args, **kwargs):
+        time.sleep(delay)
+    return send_email
+
+
+def save_upload(work, script):
+    # What the endpoint does before analyzing: one folder per upload
+    folder = Path(work) / uuid.uuid4().hex
+    folder.mkdir()
+    shutil.copy(script, folder)
+    return str(folder / Path(script).name)
+
+
+def load(clients, uploads, upload):
+    # Runs clients x uploads calls of upload(); returns the per-request latencies and the wall-clock seconds
+    latencies = []
+
+    def client(_):
+        for _ in range(uploads):
+            started = time.perf_counter()
+            upload()
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(client, range(clients)))
+    return latencies, time.perf_counter() - started
+
+
+def percentile(values, fraction):
+    return sorted(values)[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def run_local(args, settings):
+    rows = []
+    total = args.clients * args.uploads
+    with tempfile.TemporaryDirectory() as work:
+        with ProcessPoolExecutor(max_workers=args.http_workers, initializer=start_worker, initargs=(settings,)) as http_workers:
+            latencies, seconds = load(args.clients, args.uploads,
+                                      lambda: http_workers.submit(run_script_job, save_upload(work, args.input), 'to@example.com').result())
+        rows.append(["inline", f"{statistics.median(latencies) * 1000:.0f}", f"{percentile(latencies, 0.95) * 1000:.0f}",
+                     f"{seconds:.1f}", f"{total / seconds:.1f}"])
+
+        with JobQueue(args.job_workers, max_queued=total, initializer=start_worker, initargs=(settings,)) as queue:
+            jobs = []
+            started = time.perf_counter()
+            latencies, _ = load(args.clients, args.uploads, lambda: jobs.append(
+                queue.submit('script', 'upload', run_script_job, save_upload(work, args.input), 'to@example.com')))
+            for job in jobs:
+                job.future.result()
+            seconds = time.perf_counter() - started
+        rows.append(["queued", f"{statistics.median(latencies) * 1000:.1f}", f"{percentile(latencies, 0.95) * 1000:.1f}",
+                     f"{seconds:.1f}", f"{total / seconds:.1f}"])
+    return rows
+
+
+def post_upload(url, script):
+    boundary = uuid.uuid4().hex
+    body = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"recipient_email\"\r\n\r\nto@example.com\r\n"
+            f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"{Path(script).name}\"\r\n"
+            f"Content-Type: application/octet-stream\r\n\r\n").encode() + Path(script).read_bytes() + f"\r\n--{boundary}--\r\n".encode()
+    request = urllib.request.Request(f"{url}/upload", body, {'Content-Type': f"multipart/form-data; boundary={boundary}"})
+    with urllib.request.urlopen(request) as response:
+        return json.load(response)
+
+
+def wait_for_result(url, result_url):
+    while True:
+        try:
+            with urllib.request.urlopen(f"{url}{result_url}") as response:
+                if response.status == 200:
+                    return json.load(response)
+        except urllib.error.HTTPError as e:
+            if e.code != 500:
+                raise
+            return json.load(e)
+        time.sleep(0.2)
+
+
+def run_remote(args):
+    results = []
+    started = time.perf_counter()
+    latencies, _ = load(args.clients, args.uploads, lambda: results.append(post_upload(args.url, args.input)))
+    finished = [wait_for_result(args.url, response['result_url']) for response in results]
+    seconds = time.perf_counter() - started
+    failed = sum(1 for result in finished if result['status'] != 'done')
+    total = args.clients * args.uploads
+    return [[f"{args.url} ({failed} failed)", f"{statistics.median(latencies) * 1000:.1f}",
+             f"{percentile(latencies, 0.95) * 1000:.1f}", f"{seconds:.1f}", f"{total / seconds:.1f}"]]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--uploads', type=int, default=5, help="uploads per client")
+    parser.add_argument('--http-workers', type=int, default=2, help="request workers of the inline endpoint")
+    parser.add_argument('--job-workers', type=int, default=2)
+    parser.add_argument('--smtp-delay', type=float, default=1.0, help="seconds one email takes")
+    parser.add_argument('--input', default=default_input())
+    parser.add_argument('--url', help="base URL of a running app to load instead of the in-process comparison")
+    args = parser.parse_args()
+
+    if args.url:
+        rows = run_remote(args)
+    else:
+        # Workers are forked from this process, so they inherit the stubbed mail server
+        Script_Analyzer.send_email = slow_mail_server(args.smtp_delay)
+        Script_Analyzer.print = lambda *args, **kwargs: None
+        settings = {'sender_email': 'from@example.com', 'sender_password': '', 'result_cache_size': 0, 'check_workers': 1}
+        rows = run_local(args, settings)
+    print_table(f"{args.clients} clients x {args.uploads} uploads of {Path(args.input).name}, {args.smtp_delay} s per email, "
+                f"{os.cpu_count()} CPUs", ["endpoint", "response p50 ms", "response p95 ms", "all done s", "uploads/s"], rows)
+
+
+if __name__ == "__main__":
+    main()
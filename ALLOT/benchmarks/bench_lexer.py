@@ -0,0 +1,37 @@
+# Lexing throughput of the shared C/C++ token stream, in MB/s of decoded source,
+# on each For_Review file and on HRM_Server.cpp repeated 50 times. Also times the
+# identifier index built from an already-lexed stream versus lexing from text.
+from bench_utils import FOR_REVIEW_DIR, best_of, default_input, print_table
+from cpp_lexer import TokenStream
+from identifier_index import IdentifierIndex
+from source_buffer import SourceBuffer
+
+SCALE = 50
+
+
+def throughput_row(name, source, repeat):
+    # Line offsets are computed up front so only the lexer itself is timed
+    source.line_offsets
+    seconds, stream = best_of(lambda: TokenStream.from_source(source), repeat=repeat)
+    megabytes = len(source.text.encode('utf-8', 'surrogatepass')) / 1e6
+    return [name, f"{len(source.lines):,}", f"{len(stream):,}", f"{seconds * 1000:.2f}", f"{megabytes / seconds:.1f}"]
+
+
+def main():
+    rows = []
+    for path in sorted(FOR_REVIEW_DIR.glob("*.cpp")):
+        rows.append(throughput_row(path.name, SourceBuffer.from_path(path), repeat=20))
+    text = SourceBuffer.from_path(default_input()).text * SCALE
+    scaled = SourceBuffer(text.encode('utf-8'))
+    rows.append(throughput_row(f"x{SCALE}", scaled, repeat=3))
+    print_table("Lexing throughput", ["input", "lines", "tokens", "ms", "MB/s"], rows)
+
+    stream = TokenStream.from_source(scaled)
+    text_seconds, _ = best_of(lambda: IdentifierIndex.from_text(scaled.text), repeat=3)
+    stream_seconds, _ = best_of(lambda: IdentifierIndex.from_stream(stream), repeat=3)
+    print_table(f"IdentifierIndex on x{SCALE}", ["built from", "seconds"],
+                [["text (lex + index)", f"{text_seconds:.3f}"], ["cached stream", f"{stream_seconds:.3f}"]])
+
+
+if __name__ == "__main__":
+    main()
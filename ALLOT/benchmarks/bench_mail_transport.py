@@ -0,0 +1,57 @@
+# Sending --messages report emails to a local SMTP stand-in: a new connection with STARTTLS,
+# AUTH and QUIT per email (the original send_email) versus MailTransport reusing one
+# authenticated session. --rtt delays every server reply to model a remote mail server.
+import time
+import smtplib
+import argparse
+
+from bench_utils import best_of, default_input, print_table
+from smtp_standin import SMTPStandIn, client_ssl_context
+import Script_Analyzer
+from mail_transport import MailTransport
+
+COUNTS = {'indentation_check': 22, 'naming_conventions_check': 70}
+
+
+class SessionPerMessage:
+    # The original send_email session handling, behind the MailTransport interface
+
+    def __init__(self, ssl_context):
+        self.ssl_context = ssl_context
+
+    def send(self, server, port, sender, password, recipients, message_text):
+        session = smtplib.SMTP(server, port)
+        session.starttls(context=self.ssl_context)
+        session.login(sender, password)
+        session.sendmail(sender, recipients, message_text)
+        session.quit()
+
+
+def send_reports(transport, messages, attachment):
+    for _ in range(messages):
+        Script_Analyzer.send_email('from@example.com', 'secret', 'to@example.com', attachment, COUNTS, transport=transport)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--messages', type=int, default=200)
+    parser.add_argument('--rtt', type=float, nargs='+', default=[0.0, 0.02], help="seconds added to every server reply")
+    args = parser.parse_args()
+
+    rows = []
+    for rtt in args.rtt:
+        with SMTPStandIn(rtt=rtt) as server:
+            Script_Analyzer.SMTP_SERVER, Script_Analyzer.SMTP_PORT = '127.0.0.1', server.port
+            for name, make_transport in [("session per email", lambda: SessionPerMessage(client_ssl_context())),
+                                         ("MailTransport", lambda: MailTransport(ssl_context=client_ssl_context()))]:
+                before = dict(server.counts)
+                seconds, _ = best_of(lambda: send_reports(make_transport(), args.messages, default_input()), repeat=1)
+                handshakes = server.counts['handshakes'] - before['handshakes']
+                rows.append([f"{rtt * 1000:.0f}", name, handshakes, f"{seconds:.2f}", f"{args.messages / seconds:.0f}"])
+            time.sleep(0.1)
+    print_table(f"{args.messages} report emails with {default_input()} attached",
+                ["rtt ms", "transport", "TLS handshakes", "seconds", "emails/s"], rows)
+
+
+if __name__ == "__main__":
+    main()
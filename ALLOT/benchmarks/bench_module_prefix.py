@@ -0,0 +1,51 @@
+# Scaling of the '<module>::' symbol-prefix check with the size of the module
+# list: the original startswith() loop over every module versus the
+# ModulePrefixMatcher trie, from MODULES_ALL (20 names) up to 5,000 names.
+from bench_utils import best_of, default_input, print_table
+from naming_rules import ModulePrefixMatcher
+from Script_Analyzer import MODULES_ALL
+from source_buffer import SourceBuffer
+
+MODULE_COUNTS = [20, 100, 500, 1000, 5000]
+
+
+def module_list(count):
+    extra = [f"{MODULES_ALL[index % len(MODULES_ALL)]}_Ext{index}" for index in range(max(0, count - len(MODULES_ALL)))]
+    return list(MODULES_ALL[:count]) + extra
+
+
+def startswith_loop(lines, modules):
+    matches = 0
+    for line in lines:
+        for module in modules:
+            if line.startswith(module + "::"):
+                matches += 1
+    return matches
+
+
+def trie_match(lines, matcher):
+    matches = 0
+    for line in lines:
+        matches += len(matcher.match(line))
+    return matches
+
+
+def main():
+    path = default_input()
+    lines = SourceBuffer.from_path(path).stripped_lines
+    rows = []
+    for count in MODULE_COUNTS:
+        modules = module_list(count)
+        build_seconds, matcher = best_of(lambda: ModulePrefixMatcher(modules), repeat=3)
+        loop_seconds, loop_matches = best_of(lambda: startswith_loop(lines, modules), repeat=3)
+        trie_seconds, trie_matches = best_of(lambda: trie_match(lines, matcher), repeat=3)
+        if loop_matches != trie_matches:
+            raise SystemExit(f"Match counts differ for {count} modules: {loop_matches} != {trie_matches}")
+        rows.append([count, trie_matches, f"{loop_seconds * 1000:.2f}", f"{build_seconds * 1000:.2f}",
+                     f"{trie_seconds * 1000:.2f}", f"{loop_seconds / trie_seconds:.1f}x"])
+    print_table(f"Module prefix matching on {path} ({len(lines)} lines)",
+                ["modules", "matches", "loop ms", "trie build ms", "trie ms", "speedup"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# Lines/sec of the naming-convention regexes on one file: the original
+# per-line re.match/re.search calls versus the precompiled NAMING_REGISTRY.
+import re
+
+from bench_utils import best_of, default_input, print_table
+from findings_collector import FINDING_MESSAGES
+from naming_rules import NAMING_REGISTRY, RESERVED_NAMES
+from source_buffer import SourceBuffer
+
+
+def uncompiled_findings(lines):
+    # The naming checks as they were written inline in check_naming_conventions
+    messages = []
+    for line_number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if re.match(r'^\s*(?:' + '|'.join(RESERVED_NAMES) + r')\s+[a-z_]\w*\s*;', line.strip()):
+            if not re.match(r'^\s*(?:' + '|'.join(RESERVED_NAMES) + r')\s+[a-z_]\w*\s*;', line.strip()):
+                messages.append(f"Variable/function not starting with lower-case letter found at line {line_number}")
+        if re.match(r'\b(class|struct|enum|union|namespace)\s', line):
+            if not re.match(r'\b(class|struct|enum|union|namespace)\s+[A-Z]\w*\s+\w+(?:::\w+)?\s*{?$', line):
+                messages.append(f"class names not starting with Upper-Case letter found at line {line_number}")
+        if (re.search(r'\bTYPE\s', line) and re.search(r';\s*END\s+TYPE\s', line)):
+            if not (re.search(r'\bTYPE\s*\(\s*[a-zA-Z]+\s*\)\s*;', line) and re.search(r';\s*END\s+TYPE\s+[a-zA-Z]+\s*;', line)):
+                messages.append(f"TYPE keyword not starting with Upper-Case letter found at line {line_number}")
+        if re.match(r'^#define\s+[A-Z_]+\s+', line):
+            if re.match(r'#define [A-Z_]+ .*', line):
+                messages.append(f"Constant not all upper-case found at line {line_number}")
+        if re.match(r'\b(g_[a-zA-Z_]\w*)\b', line):
+            messages.append(f"Global variable not starting with 'g_' found at line {line_number}")
+        if re.match(r'(\w+)::\1', line):
+            if not re.match(r'(\w+)::\1\s*\((.*?)\)\s*:\s*\w+\s*\([^)]*\)\s*(?:...).*m_\w+\s*\([^)]*\)*\s*{', line):
+                messages.append(f"Member not starting with 'm_' found at line {line_number}")
+        for match in re.finditer(r'(?<!/)\*\s*\w+', line):
+            word = match.group()[1:].lstrip()
+            if not word.startswith('p'):
+                messages.append(f"Pointer not starting with 'p', word: '{word}' and found at line {line_number}")
+    return messages
+
+
+def registry_findings(lines):
+    messages = []
+    for line_number, line in enumerate(lines, start=1):
+        for rule, args in NAMING_REGISTRY.findings(line.strip()):
+            messages.append(FINDING_MESSAGES[rule].format(*args, line=line_number))
+    return messages
+
+
+def main():
+    path = default_input()
+    lines = SourceBuffer.from_path(path).lines
+    rows = []
+    results = []
+    for name, function in [("uncompiled re calls", uncompiled_findings), ("NAMING_REGISTRY", registry_findings)]:
+        seconds, messages = best_of(lambda: function(lines), repeat=20)
+        results.append(messages)
+        rows.append([name, len(messages), f"{seconds * 1000:.2f}", f"{len(lines) / seconds:,.0f}"])
+    if results[0] != results[1]:
+        raise SystemExit("Naming findings differ between the two implementations")
+    print_table(f"Naming convention regexes on {path} ({len(lines)} lines)",
+                ["implementation", "findings", "best ms", "lines/sec"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# run_analysis latency with its report email sent directly (a warm MailTransport session)
+# versus spooled to an Outbox, against the local SMTP stand-in delaying every reply by
+# --rtt. A second run starts with the mail server down: direct sends lose the reports,
+# the outbox keeps them and delivers every one once the server is back.
+import time
+import logging
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+
+from bench_utils import FOR_REVIEW_DIR, print_table
+from smtp_standin import SMTPStandIn, client_ssl_context
+import Script_Analyzer
+from mail_transport import MailTransport
+from outbox import Outbox
+
+
+def analyze(script_path, log_folder, transport):
+    analyzer = Script_Analyzer.ScriptAnalyzer(script_path, 'to@example.com', 'from@example.com', 'secret',
+                                              log_folder=log_folder, mail_transport=transport)
+    started = time.perf_counter()
+    analyzer.run_analysis()
+    seconds = time.perf_counter() - started
+    return seconds, analyzer.error_count == 0
+
+
+def run(transport, analyses, log_folder):
+    script_path = FOR_REVIEW_DIR / "Testakhil.cpp"
+    results = [analyze(script_path, log_folder, transport) for _ in range(analyses)]
+    return [seconds for seconds, _ in results], sum(1 for _, ok in results if not ok)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--analyses', type=int, default=30)
+    parser.add_argument('--rtt', type=float, default=0.05, help="seconds added to every server reply")
+    args = parser.parse_args()
+
+    Script_Analyzer.print = lambda *args, **kwargs: None
+    logging.getLogger().setLevel(logging.CRITICAL)  # keeps the outbox's retry errors off the table
+    rows = []
+    with tempfile.TemporaryDirectory() as work:
+        log_folder = Path(work) / "logs"
+        with SMTPStandIn(rtt=args.rtt) as server:
+            Script_Analyzer.SMTP_SERVER, Script_Analyzer.SMTP_PORT = '127.0.0.1', server.port
+            transport = MailTransport(ssl_context=client_ssl_context())
+            latencies, lost = run(transport, args.analyses, log_folder)
+            rows.append(["direct, server up", f"{statistics.median(latencies) * 1000:.0f}", lost, server.counts['messages']])
+
+            outbox = Outbox(Path(work) / "outbox", transport=transport, poll_interval=0.1)
+            before = server.counts['messages']
+            latencies, lost = run(outbox, args.analyses, log_folder)
+            while outbox.pending():
+                time.sleep(0.05)
+            outbox.close()
+            rows.append(["outbox, server up", f"{statistics.median(latencies) * 1000:.0f}", lost,
+                         server.counts['messages'] - before])
+            port = server.port
+
+        # Nothing listens on the port now
+        transport = MailTransport(ssl_context=client_ssl_context())
+        latencies, lost = run(transport, args.analyses, log_folder)
+        rows.append(["direct, server down", f"{statistics.median(latencies) * 1000:.0f}", lost, 0])
+
+        outbox = Outbox(Path(work) / "outbox-down", transport=transport, retry_base=0.2, poll_interval=0.1)
+        latencies, lost = run(outbox, args.analyses, log_folder)
+        with SMTPStandIn(port=port, rtt=args.rtt) as server:
+            deadline = time.monotonic() + 60
+            while outbox.pending() and time.monotonic() < deadline:
+                time.sleep(0.05)
+            outbox.close()
+            rows.append(["outbox, server down then up", f"{statistics.median(latencies) * 1000:.0f}", lost,
+                         server.counts['messages']])
+    print_table(f"{args.analyses} analyses of Testakhil.cpp, {args.rtt * 1000:.0f} ms rtt",
+                ["email path", "analysis p50 ms", "reports lost", "delivered"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# Single-file run_analysis latency against the number of check workers, on HRM_Server.cpp
+# repeated --scale times. Report emails go to a transport that drops them. The checks are pure Python,
+# so thread workers only overlap the parts that release the GIL (file and SQLite I/O);
+# the table shows what that is worth on this machine.
+import os
+import argparse
+import tempfile
+from pathlib import Path
+
+from bench_utils import NullTransport, best_of, default_input, print_table
+import Script_Analyzer
+from source_buffer import SourceBuffer
+
+
+def analyze(script_path, max_workers, repetition_mode):
+    analyzer = Script_Analyzer.ScriptAnalyzer(script_path, 'recipient@example.com', 'sender@example.com', '',
+                                              repetition_mode=repetition_mode, max_workers=max_workers,
+                                              mail_transport=NullTransport())
+    analyzer.run_analysis()
+    return analyzer.counts
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scale', type=int, default=20, help="copies of the input in the generated file")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--repetition-mode', default='window', choices=['window', 'maximal'])
+    args = parser.parse_args()
+
+    Script_Analyzer.print = lambda *args, **kwargs: None
+    text = SourceBuffer.from_path(default_input()).text * args.scale
+    with tempfile.TemporaryDirectory() as work:
+        script_path = Path(work) / "generated.cpp"
+        script_path.write_text(text)
+        rows = []
+        baseline = None
+        expected_counts = None
+        for workers in args.workers:
+            seconds, counts = best_of(lambda: analyze(script_path, workers, args.repetition_mode), repeat=3)
+            assert expected_counts is None or counts == expected_counts
+            expected_counts = counts
+            baseline = baseline or seconds
+            rows.append([workers, f"{seconds * 1000:.0f}", f"{baseline / seconds:.2f}x"])
+    print_table(f"run_analysis latency, {default_input()} x{args.scale} ({text.count(chr(10)):,} lines, {os.cpu_count()} CPUs)",
+                ["max_workers", "ms", "vs 1 worker"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# Parsing preprocessed C with pycparser in-process (a fresh CParser and full AST per
+# file, as the naming visitors did) versus ParserPool (warm workers returning symbol
+# summaries, cached by content). Needs pycparser installed.
+import sys
+import pickle
+import argparse
+
+from bench_utils import best_of, print_table
+from symbol_summary import ParserPool, c_parser, collect_symbols
+
+
+def synthetic_unit(seed, functions):
+    # Plain C that pycparser accepts without system headers
+    parts = [f"int MODULE_unit{seed};", "struct Point { int x; int *yp; };"]
+    for index in range(functions):
+        parts.append(f"""
+int Compute{seed}_{index}(int value, char *name) {{
+    int Local = value;
+    int *p_local = &Local;
+    struct Point pt;
+    for (int i = 0; i < {index + 2}; i++) {{
+        Local += i * {seed + 1};
+        pt.x = Local;
+    }}
+    return Local + *p_local;
+}}""")
+    return "\n".join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--files', type=int, default=16)
+    parser.add_argument('--functions', type=int, default=200, help="function definitions per file")
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+    if c_parser is None:
+        sys.exit("pycparser is not installed")
+
+    units = [(synthetic_unit(seed, args.functions), f"unit{seed}.c") for seed in range(args.files)]
+
+    def in_process():
+        return [c_parser.CParser().parse(text, filename) for text, filename in units]
+
+    in_process_seconds, trees = best_of(in_process, repeat=1)
+    with ParserPool(max_workers=args.workers) as pool:
+        pool.summarize(*units[0])  # workers are started and warm before timing
+        pool_seconds, summaries = best_of(lambda: pool.summarize_many(units[1:]), repeat=1)
+        cached_seconds, _ = best_of(lambda: pool.summarize_many(units), repeat=3)
+        workers = pool.max_workers
+
+    assert [summary.symbols for summary in summaries] == [collect_symbols(tree).symbols for tree in trees[1:]]
+    rows = [
+        ["in-process CParser + AST", f"{in_process_seconds / len(units) * (len(units) - 1):.2f}"],
+        [f"ParserPool, {workers} warm workers", f"{pool_seconds:.2f}"],
+        ["ParserPool, cached", f"{cached_seconds:.4f}"],
+    ]
+    print_table(f"Parsing {len(units) - 1} files of {args.functions} functions", ["implementation", "seconds"], rows)
+    print(f"\npickled result per file: AST {len(pickle.dumps(trees[1])):,} bytes, summary {len(pickle.dumps(summaries[0])):,} bytes")
+
+
+if __name__ == "__main__":
+    main()
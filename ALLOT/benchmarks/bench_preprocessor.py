@@ -0,0 +1,62 @@
+# Preprocessing for repeated, concurrent uploads of the same script: the original
+# `cpp -o <stem>_processed.cpp` followed by a re-read of that file, once per parser-based
+# check, versus Preprocessor (cpp over pipes, cached by content and path, one run per key).
+import shutil
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+from bench_utils import FOR_REVIEW_DIR, best_of, print_table
+from preprocessor import Preprocessor
+
+CHECKS_PER_UPLOAD = 2  # check_naming_conventions and check_modularization each preprocessed the script
+
+
+def file_preprocess(script_path):
+    processed_file_path = script_path.parent / f"{script_path.stem}_processed.cpp"
+    subprocess.run(['cpp', '-o', str(processed_file_path), str(script_path)], check=True, capture_output=True)
+    return processed_file_path.read_text()
+
+
+def run_uploads(function, uploads, workers):
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(lambda _: [function() for _ in range(CHECKS_PER_UPLOAD)], range(uploads)))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--uploads', type=int, default=40)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--input', default=str(FOR_REVIEW_DIR / "Testakhil.cpp"), help="a script cpp can preprocess here")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work:
+        script_path = Path(work) / Path(args.input).name
+        shutil.copy(args.input, script_path)
+        raw = script_path.read_bytes()
+
+        file_seconds, _ = best_of(lambda: run_uploads(lambda: file_preprocess(script_path), args.uploads, args.workers), repeat=3)
+        preprocessors = []
+
+        def cached_uploads():
+            preprocessor = Preprocessor()
+            preprocessors.append(preprocessor)
+            return run_uploads(lambda: preprocessor.preprocess(script_path, raw), args.uploads, args.workers)
+
+        pipe_seconds, _ = best_of(cached_uploads, repeat=3)
+        stats = preprocessors[-1].stats()
+
+    calls = args.uploads * CHECKS_PER_UPLOAD
+    rows = [
+        ["cpp -o file + re-read", calls, calls, f"{file_seconds * 1000:.1f}"],
+        ["Preprocessor (pipe, cached)", stats['spawns'], 0, f"{pipe_seconds * 1000:.1f}"],
+    ]
+    print_table(f"{args.uploads} uploads of {Path(args.input).name}, {args.workers} concurrent, {CHECKS_PER_UPLOAD} checks each",
+                ["implementation", "cpp spawns", "files written", "ms"], rows)
+    print(f"\n{stats}")
+
+
+if __name__ == "__main__":
+    main()
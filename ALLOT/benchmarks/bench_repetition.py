@@ -0,0 +1,92 @@
+# Duplicate detection for check_modularization on generated sources with
+# copy-pasted blocks: the original dict keyed by tuples of line strings versus
+# find_repeated_windows (rolling hash over interned line ids), and the number
+# of warnings from fixed windows versus find_maximal_repeats (suffix array).
+#
+#   python benchmarks/bench_repetition.py [--lines 1000000] [--skip-tuple-dict]
+import argparse
+import random
+import tracemalloc
+
+from bench_utils import best_of, print_table
+from repetition import find_maximal_repeats, find_repeated_windows
+
+SEQUENCE_LENGTHS = [3, 10, 25, 50]
+REPETITION_THRESHOLD = 3
+
+
+def generated_lines(count, seed=7):
+    # Unique statements with copy-pasted blocks (10-60 lines, drawn from a small pool) mixed in
+    rng = random.Random(seed)
+    blocks = [[f"    step_{block}_{line}(ctx, {line});\n" for line in range(rng.randint(10, 60))] for block in range(200)]
+    lines = []
+    while len(lines) < count:
+        if rng.random() < 0.05:
+            lines.extend(rng.choice(blocks))
+        else:
+            lines.append(f"    value_{len(lines)} = compute({len(lines)});\n")
+    return lines[:count]
+
+
+def tuple_dict(lines, length):
+    repeated_sequences = {}
+    for start_index in range(len(lines) - length + 1):
+        sequence = tuple(lines[start_index:start_index + length])
+        if all(len(line.strip()) > 1 for line in sequence):
+            if sequence in repeated_sequences:
+                repeated_sequences[sequence].append(start_index)
+            else:
+                repeated_sequences[sequence] = [start_index]
+    return [(starts[0], starts) for starts in repeated_sequences.values() if len(starts) >= REPETITION_THRESHOLD]
+
+
+def rolling_hash(lines, length):
+    return find_repeated_windows(lines, length, REPETITION_THRESHOLD, eligible=lambda line: len(line.strip()) > 1)
+
+
+def maximal_repeats(lines, length):
+    return find_maximal_repeats(lines, length, REPETITION_THRESHOLD, eligible=lambda line: len(line.strip()) > 1)
+
+
+def peak_kib(function):
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=200000)
+    parser.add_argument("--skip-tuple-dict", action="store_true", help="only run the rolling hash (for very large inputs)")
+    args = parser.parse_args()
+
+    lines = generated_lines(args.lines)
+    rows = []
+    for length in SEQUENCE_LENGTHS:
+        rolling_seconds, rolling_groups = best_of(lambda: rolling_hash(lines, length), repeat=1)
+        rolling_peak = peak_kib(lambda: rolling_hash(lines, length))
+        if args.skip_tuple_dict:
+            rows.append([length, len(rolling_groups), "-", "-", f"{rolling_seconds:.2f}", f"{rolling_peak:,.0f}", "-"])
+            continue
+        tuple_seconds, tuple_groups = best_of(lambda: tuple_dict(lines, length), repeat=1)
+        tuple_peak = peak_kib(lambda: tuple_dict(lines, length))
+        if tuple_groups != rolling_groups:
+            raise SystemExit(f"Repeated windows differ at length {length}")
+        rows.append([length, len(rolling_groups), f"{tuple_seconds:.2f}", f"{tuple_peak:,.0f}",
+                     f"{rolling_seconds:.2f}", f"{rolling_peak:,.0f}", f"{tuple_seconds / rolling_seconds:.1f}x"])
+    print_table(f"Repeated windows in {len(lines):,} generated lines (threshold {REPETITION_THRESHOLD})",
+                ["length", "groups", "tuple s", "tuple peak KiB", "rolling s", "rolling peak KiB", "speedup"], rows)
+
+    rows = []
+    for length in SEQUENCE_LENGTHS:
+        window_seconds, windows = best_of(lambda: rolling_hash(lines, length), repeat=1)
+        maximal_seconds, repeats = best_of(lambda: maximal_repeats(lines, length), repeat=1)
+        rows.append([length, len(windows), f"{window_seconds:.2f}", len(repeats), f"{maximal_seconds:.2f}"])
+    print_table("Warnings per mode (REPETITION_MODE 'window' versus 'maximal')",
+                ["min length", "window warnings", "window s", "maximal warnings", "maximal s"], rows)
+
+
+if __name__ == "__main__":
+    main()
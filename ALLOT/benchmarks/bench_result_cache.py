@@ -0,0 +1,35 @@
+# run_analysis on the same script with a cold and a warm ResultCache. Email sending
+# goes to a transport that drops it, so no mail server is timed.
+import shutil
+import tempfile
+from pathlib import Path
+
+from bench_utils import NullTransport, best_of, default_input, print_table
+import Script_Analyzer
+from result_cache import ResultCache
+
+
+def analyze(script_path, cache):
+    analyzer = Script_Analyzer.ScriptAnalyzer(script_path, 'recipient@example.com', 'sender@example.com', '',
+                                              result_cache=cache, mail_transport=NullTransport())
+    analyzer.run_analysis()
+    return analyzer.cache_hit
+
+
+def main():
+    Script_Analyzer.print = lambda *args, **kwargs: None
+    with tempfile.TemporaryDirectory() as work:
+        script_path = Path(work) / Path(default_input()).name
+        shutil.copy(default_input(), script_path)
+        cache = ResultCache()
+        miss_seconds, _ = best_of(lambda: analyze(script_path, ResultCache()), repeat=5)
+        analyze(script_path, cache)
+        hit_seconds, hit = best_of(lambda: analyze(script_path, cache), repeat=5)
+    assert hit
+    print_table(f"run_analysis, {default_input()}", ["cache", "ms"],
+                [["miss", f"{miss_seconds * 1000:.1f}"], ["hit", f"{hit_seconds * 1000:.1f}"]])
+    print(f"\nspeedup: {miss_seconds / hit_seconds:.1f}x  {cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# Fills a ResultsStore with synthetic runs spread over 30 days (default 20,000 runs of
+# 2,000 files, 100 findings each = 2M findings), then times one run's write and the
+# "top files by a check this week" and per-check timing queries.
+import os
+import time
+import random
+import logging
+import argparse
+import tempfile
+
+from bench_utils import best_of, print_table
+from Script_Analyzer import CHECKS
+from results_store import ResultsStore, SECONDS_PER_DAY
+from findings_collector import Finding
+
+CHECK_NAMES = [check for check, _, _ in CHECKS]
+
+
+def synthetic_run(rng, file_count, findings_per_run, now):
+    path = f"/uploads/file_{rng.randrange(file_count)}.cpp"
+    started_at = now - rng.random() * 30 * SECONDS_PER_DAY
+    findings = []
+    for _ in range(findings_per_run):
+        check = rng.choice(CHECK_NAMES)
+        findings.append(Finding(check, 'indentation', rng.randrange(1, 2000), None, logging.WARNING, ()))
+    counts = dict.fromkeys(CHECK_NAMES, 0)
+    for finding in findings:
+        counts[finding.check] += 1
+    check_seconds = {check: rng.random() / 100 for check in CHECK_NAMES}
+    return path, counts, findings, started_at, check_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=20000)
+    parser.add_argument('--files', type=int, default=2000)
+    parser.add_argument('--findings', type=int, default=100, help="findings per run")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    now = time.time()
+    with tempfile.TemporaryDirectory() as work:
+        store_path = os.path.join(work, 'results.db')
+        with ResultsStore(store_path) as store:
+            fill_started = time.perf_counter()
+            for _ in range(args.runs):
+                path, counts, findings, started_at, check_seconds = synthetic_run(rng, args.files, args.findings, now)
+                store.record_run(path, None, 'bench', counts, findings, started_at, 0.01, check_seconds)
+            fill_seconds = time.perf_counter() - fill_started
+
+            week_ago = now - 7 * SECONDS_PER_DAY
+            run = synthetic_run(rng, args.files, args.findings, now)
+            write_seconds, _ = best_of(lambda: store.record_run(run[0], None, 'bench', run[1], run[2], run[3], 0.01, run[4]), repeat=5)
+            top_seconds, top = best_of(lambda: store.top_files('naming_conventions_check', week_ago), repeat=5)
+            timing_seconds, _ = best_of(lambda: store.check_timings(week_ago), repeat=5)
+            findings_seconds, _ = best_of(lambda: store.findings_of(1, 'indentation_check'), repeat=5)
+        size = os.path.getsize(store_path)
+
+    rows = [
+        ["record_run (one run)", f"{write_seconds * 1000:.2f}"],
+        ["top_files, naming_conventions_check, last 7 days", f"{top_seconds * 1000:.2f}"],
+        ["check_timings, last 7 days", f"{timing_seconds * 1000:.2f}"],
+        ["findings_of, one run and check", f"{findings_seconds * 1000:.2f}"],
+    ]
+    print(f"Filled {args.runs:,} runs / {args.runs * args.findings:,} findings in {fill_seconds:.1f} s ({size / 1e6:.0f} MB)")
+    print_table("ResultsStore queries", ["operation", "ms"], rows)
+    print(f"\ntop file: {top[0] if top else None}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# Compares eight independent open()/readlines() passes (one per check, as the
+# analyzer used to do) with one shared SourceBuffer on the same file.
+import builtins
+import tracemalloc
+
+from bench_utils import best_of, default_input, print_table
+from source_buffer import SourceBuffer
+
+CHECK_COUNT = 8
+
+
+class OpenCounter:
+    def __init__(self):
+        self.opens = 0
+        self._open = builtins.open
+
+    def __enter__(self):
+        counter = self
+
+        def counting_open(*args, **kwargs):
+            counter.opens += 1
+            return counter._open(*args, **kwargs)
+
+        builtins.open = counting_open
+        return self
+
+    def __exit__(self, *exc):
+        builtins.open = self._open
+
+
+def per_check_readlines(path):
+    line_lists = []
+    for _ in range(CHECK_COUNT - 1):
+        with open(path, "r") as script_file:
+            line_lists.append(script_file.readlines())
+    with open(path, "rb") as script_file:
+        line_lists.append(list(script_file))
+    return line_lists
+
+
+def shared_buffer(path):
+    source = SourceBuffer.from_path(path)
+    views = [source.lines for _ in range(CHECK_COUNT - 1)]
+    views.append(source.raw_lines)
+    return views
+
+
+def measure(name, function, path):
+    with OpenCounter() as counter:
+        function(path)
+    tracemalloc.start()
+    function(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    seconds, _ = best_of(lambda: function(path), repeat=20)
+    return [name, counter.opens, f"{peak / 1024:.1f}", f"{seconds * 1000:.3f}"]
+
+
+def main():
+    path = default_input()
+    rows = [
+        measure("per-check readlines()", per_check_readlines, path),
+        measure("shared SourceBuffer", shared_buffer, path),
+    ]
+    print_table(f"Source loading for {CHECK_COUNT} checks on {path}",
+                ["mode", "opens", "peak KiB", "best ms"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+# run_analysis on every file in For_Review/ and on synthetic inputs of --sizes lines, with email
+# sending turned off. Synthetic inputs come from synthetic_corpus (seeded with --seed), whose
+# expected counts are checked against the analyzer's, or with --scaled are the For_Review sources
+# repeated until the size is reached.
+# For each input: lines/sec, peak traced memory, and the time of each phase: reading the script,
+# the line-rule pass shared by several checks, then every check_* method. --json saves the
+# results; --compare prints the change against an earlier --json file.
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import subprocess
+import tracemalloc
+from pathlib import Path
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+
+from bench_utils import FOR_REVIEW_DIR, REPO_DIR, print_table
+import Script_Analyzer
+from source_buffer import SourceBuffer
+from synthetic_corpus import CorpusProfile, generate_unit
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+
+
+def corpus_inputs():
+    return sorted(path for path in FOR_REVIEW_DIR.iterdir() if path.suffix in ('.c', '.cpp', '.h'))
+
+
+def write_scaled_input(path, lines):
+    # The For_Review sources concatenated and repeated up to exactly `lines` lines
+    corpus = [line if line.endswith('\n') else line + '\n'
+              for source in corpus_inputs() for line in SourceBuffer.from_path(source).lines]
+    with open(path, 'w', newline='') as scaled:
+        for number in range(lines):
+            scaled.write(corpus[number % len(corpus)])
+    return path
+
+
+def write_generated_input(path, lines, seed):
+    # A synthetic_corpus unit of about `lines` lines; returns the counts the analyzer should report for it
+    unit = generate_unit(path.name, CorpusProfile(lines=lines), seed)
+    path.write_bytes(unit.text)
+    return unit.counts
+
+
+def analyze(script_path, log_folder):
+    analyzer = Script_Analyzer.ScriptAnalyzer(script_path, 'recipient@example.com', 'sender@example.com', '',
+                                              log_folder=log_folder, send_report=False)
+    phases = {}
+    started = time.perf_counter()
+    # The shared state the checks build on first use, timed on its own instead of inside the first check using it
+    for phase, build in [('read_source', lambda: analyzer.source.lines), ('line_rules', analyzer.run_line_rules)]:
+        phase_started = time.perf_counter()
+        build()
+        phases[phase] = time.perf_counter() - phase_started
+    # The analyzer's progress prints stay off the tables
+    with redirect_stdout(io.StringIO()):
+        analyzer.run_analysis()
+    seconds = time.perf_counter() - started
+    phases.update(analyzer.check_seconds)
+    return analyzer, seconds, phases
+
+
+def measure(name, script_path, log_folder, memory, expected=None):
+    analyzer, seconds, phases = analyze(script_path, log_folder)
+    lines = len(analyzer.source.lines)
+    result = {'input': name, 'lines': lines, 'bytes': len(analyzer.source.raw), 'seconds': seconds,
+              'lines_per_second': lines / seconds if seconds else None, 'phases': phases,
+              'counts': dict(analyzer.counts), 'findings': len(analyzer.log.entries), 'peak_bytes': None,
+              'expected_counts': expected, 'oracle': None if expected is None else expected == analyzer.counts}
+    if memory:
+        # Separate run: tracemalloc slows down what it traces
+        tracemalloc.start()
+        analyze(script_path, log_folder)
+        result['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR, capture_output=True,
+                                text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'), 'commit': commit,
+            'analyzer_version': Script_Analyzer.ANALYZER_VERSION, 'python': platform.python_version(),
+            'platform': platform.platform(), 'machine': platform.machine(), 'cpus': os.cpu_count()}
+
+
+def print_results(results, previous=None):
+    before = {result['input']: result for result in (previous or {}).get('results', [])}
+    rows = []
+    for result in results:
+        row = [result['input'], f"{result['lines']:,}", f"{result['seconds'] * 1000:.0f}",
+               f"{result['lines_per_second']:,.0f}",
+               f"{result['peak_bytes'] / 1e6:.1f}" if result['peak_bytes'] is not None else "-", result['findings'],
+               {None: "-", True: "ok", False: "MISMATCH"}[result.get('oracle')]]
+        if previous is not None:
+            old = before.get(result['input'])
+            row.append(f"{old['seconds'] / result['seconds']:.2f}x" if old else "new")
+        rows.append(row)
+    headers = ["input", "lines", "ms", "lines/sec", "peak MB", "findings", "counts"]
+    print_table("run_analysis", headers + (["speedup"] if previous is not None else []), rows)
+
+    phases = list(dict.fromkeys(phase for result in results for phase in result['phases']))
+    print_table("Milliseconds per phase", ["input", *(phase.removesuffix('_check') for phase in phases)],
+                [[result['input'], *(f"{result['phases'].get(phase, 0) * 1000:.1f}" for phase in phases)] for result in results])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='*', default=DEFAULT_SIZES, help="lines of the synthetic inputs")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the generated synthetic inputs")
+    parser.add_argument('--scaled', action='store_true', help="repeat the For_Review sources instead of generating inputs")
+    parser.add_argument('--no-corpus', action='store_true', help="skip the For_Review files")
+    parser.add_argument('--no-memory', action='store_true', help="skip the tracemalloc run of each input")
+    parser.add_argument('--json', help="save the results to this file")
+    parser.add_argument('--compare', help="results of an earlier --json run to compare with")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as work:
+        log_folder = Path(work) / "Logs"
+        inputs = [] if args.no_corpus else [(path.name, path, None) for path in corpus_inputs()]
+        for lines in args.sizes:
+            script_path = Path(work) / f"synthetic-{lines}.cpp"
+            if args.scaled:
+                inputs.append((f"scaled-{lines}", write_scaled_input(script_path, lines), None))
+            else:
+                inputs.append((f"synthetic-{lines}", script_path, write_generated_input(script_path, lines, args.seed)))
+        for name, script_path, expected in inputs:
+            results.append(measure(name, script_path, log_folder, not args.no_memory, expected))
+            print(f"{name}: {results[-1]['seconds']:.2f} s", file=sys.stderr)
+
+    previous = None
+    if args.compare:
+        with open(args.compare) as compare_file:
+            previous = json.load(compare_file)
+    print_results(results, previous)
+    if args.json:
+        with open(args.json, 'w') as json_file:
+            json.dump({'environment': environment(), 'results': results}, json_file, indent=1)
+    # Non-zero when a generated input's counts differ from what the generator expects
+    return 1 if any(result['oracle'] is False for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
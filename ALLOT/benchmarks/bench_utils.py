@@ -0,0 +1,43 @@
+import os
+import sys
+import time
+from pathlib import Path
+
+# Make the analyzer modules in ALLOT/ importable when a benchmark is run as a script
+ALLOT_DIR = Path(__file__).resolve().parent.parent
+REPO_DIR = ALLOT_DIR.parent
+FOR_REVIEW_DIR = REPO_DIR / "For_Review"
+if str(ALLOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ALLOT_DIR))
+
+
+def best_of(function, repeat=5):
+    # Best wall-clock time in seconds over `repeat` runs, plus the last return value
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
+
+
+def print_table(title, headers, rows):
+    widths = [max(len(str(value)) for value in column) for column in zip(headers, *rows)]
+    print(f"\n{title}")
+    print("  ".join(str(header).ljust(width) for header, width in zip(headers, widths)))
+    print("  ".join("-" * width for width in widths))
+    for row in rows:
+        print("  ".join(str(value).ljust(width) for value, width in zip(row, widths)))
+
+
+class NullTransport:
+    # Mail transport that drops every message, so report emails are built as usual but never sent
+    def send(self, server, port, sender, password, recipients, message_text):
+        pass
+
+
+def default_input():
+    return os.environ.get("BENCH_INPUT", str(FOR_REVIEW_DIR / "HRM_Server.cpp"))
@@ -0,0 +1,119 @@
+# A local SMTP stand-in for the mail benchmarks: EHLO, STARTTLS (with a throwaway
+# self-signed certificate made by openssl), AUTH PLAIN/LOGIN, MAIL/RCPT/DATA, RSET,
+# NOOP and QUIT. Every reply can be delayed by a round-trip time to model a remote
+# server. Messages and their bytes are counted, not kept.
+import ssl
+import socket
+import time
+import base64
+import tempfile
+import threading
+import subprocess
+import socketserver
+from pathlib import Path
+
+
+def client_ssl_context():
+    # The stand-in's certificate is self-signed, so clients skip verification
+    context = ssl.create_default_context()
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    return context
+
+
+class _Handler(socketserver.StreamRequestHandler):
+
+    def setup(self):
+        # Small replies go out at once, as a real server's do, instead of waiting on delayed ACKs
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        super().setup()
+
+    def reply(self, line):
+        time.sleep(self.server.rtt)
+        self.wfile.write(f"{line}\r\n".encode())
+        self.wfile.flush()
+
+    def read_line(self):
+        return self.rfile.readline().decode('utf-8', 'replace').rstrip('\r\n')
+
+    def start_tls(self):
+        self.request = self.server.tls_context.wrap_socket(self.request, server_side=True)
+        self.rfile = self.request.makefile('rb')
+        self.wfile = self.request.makefile('wb')
+
+    def handle(self):
+        self.server.count('connections')
+        self.reply("220 localhost SMTP stand-in")
+        while True:
+            line = self.read_line()
+            if not line:
+                return
+            command = line.split(' ', 1)[0].upper()
+            if command in ('EHLO', 'HELO'):
+                time.sleep(self.server.rtt)
+                self.wfile.write(b"250-localhost\r\n250-STARTTLS\r\n250-AUTH PLAIN LOGIN\r\n250 8BITMIME\r\n")
+                self.wfile.flush()
+            elif command == 'STARTTLS':
+                self.reply("220 Ready to start TLS")
+                self.start_tls()
+                self.server.count('handshakes')
+            elif command == 'AUTH':
+                if line.upper().startswith('AUTH LOGIN'):
+                    self.reply("334 " + base64.b64encode(b"Username:").decode())
+                    self.read_line()
+                    self.reply("334 " + base64.b64encode(b"Password:").decode())
+                    self.read_line()
+                self.server.count('logins')
+                self.reply("235 Authentication successful")
+            elif command == 'DATA':
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                tail = b"\r\n"
+                while not tail.endswith(b"\r\n.\r\n"):
+                    chunk = self.rfile.read1(65536)
+                    if not chunk:
+                        return
+                    tail = tail[-4:] + chunk
+                    self.server.count('bytes', len(chunk))
+                self.server.count('messages')
+                self.reply("250 OK: queued")
+            elif command == 'QUIT':
+                self.reply("221 Bye")
+                return
+            else:  # MAIL, RCPT, RSET, NOOP
+                self.reply("250 OK")
+
+
+class SMTPStandIn(socketserver.ThreadingTCPServer):
+    """Threaded SMTP stand-in on localhost; use as a context manager to run it in the background."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, port=0, rtt=0.0):
+        super().__init__(('127.0.0.1', port), _Handler)
+        self.rtt = rtt
+        self.counts = {'connections': 0, 'handshakes': 0, 'logins': 0, 'messages': 0, 'bytes': 0}
+        self._counts_lock = threading.Lock()
+        self._certificate_dir = tempfile.TemporaryDirectory()
+        certificate = Path(self._certificate_dir.name) / "standin.pem"
+        subprocess.run(['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1', '-subj', '/CN=localhost',
+                        '-keyout', str(certificate), '-out', str(certificate)], check=True, capture_output=True)
+        self.tls_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        self.tls_context.load_cert_chain(certificate)
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def count(self, name, amount=1):
+        with self._counts_lock:
+            self.counts[name] += amount
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+        self._certificate_dir.cleanup()
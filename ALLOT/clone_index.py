@@ -0,0 +1,255 @@
+import os
+import sys
+import sqlite3
+import argparse
+import threading
+from hashlib import blake2b
+from pathlib import Path
+
+from source_buffer import SourceBuffer
+
+CLONE_WINDOW_LENGTH = 3  # Lines per hashed window, same as SEQUENCE_LENGTH in Script_Analyzer
+SOURCE_EXTENSIONS = {'.c', '.cc', '.cpp', '.cxx', '.h', '.hh', '.hpp'}
+HASH_MODULUS = (1 << 61) - 1
+HASH_BASE = 1000003
+QUERY_BATCH_SIZE = 500
+# Windows indexed more often than this (boilerplate such as license headers or 'return 0;' runs) are
+# skipped by lookups, so a query never reads a large share of the table for one hash
+CLONE_MAX_WINDOW_FREQUENCY = 100
+
+
+def normalize_line(line):
+    # Whitespace differences (indentation, spacing, CRLF) do not hide a copy-paste
+    return ' '.join(line.split())
+
+
+def line_hash(normalized_line):
+    return int.from_bytes(blake2b(normalized_line.encode('utf-8', 'surrogatepass'), digest_size=8).digest(), 'big') % HASH_MODULUS
+
+
+def window_hashes(lines, length=CLONE_WINDOW_LENGTH):
+    # Yields (start index, hash) for every window of `length` lines that all have more than one character.
+    # The window hash rolls over stable per-line hashes, so it is the same in every process.
+    leading_power = pow(HASH_BASE, length - 1, HASH_MODULUS)
+    line_hashes = []
+    window_hash = 0
+    run = 0
+    for index, line in enumerate(lines):
+        normalized = normalize_line(line)
+        if len(normalized) <= 1:
+            line_hashes.append(0)
+            run = 0
+            window_hash = 0
+            continue
+        current = line_hash(normalized)
+        line_hashes.append(current)
+        if run >= length:
+            window_hash = (window_hash - line_hashes[index - length] * leading_power) % HASH_MODULUS
+        window_hash = (window_hash * HASH_BASE + current) % HASH_MODULUS
+        run += 1
+        if run >= length:
+            yield index - length + 1, window_hash
+
+
+class CloneIndex:
+    """Persistent index of hashed line windows across a source tree, stored in SQLite.
+
+    Files are added or refreshed incrementally (unchanged files are skipped
+    by size and mtime). A lookup is one indexed query per batch of windows,
+    so checking an upload costs about the same whatever the corpus size.
+    How often each hash is indexed is kept alongside, and hashes found more
+    than max_frequency times are left out of lookups as boilerplate.
+    """
+
+    def __init__(self, index_path, window_length=CLONE_WINDOW_LENGTH, max_frequency=CLONE_MAX_WINDOW_FREQUENCY):
+        self.index_path = str(index_path)
+        self.window_length = window_length
+        self.max_frequency = max_frequency
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.index_path, check_same_thread=False)
+        self._connection.executescript("""
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS files (
+                id INTEGER PRIMARY KEY,
+                path TEXT NOT NULL UNIQUE,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS windows (
+                hash INTEGER NOT NULL,
+                file_id INTEGER NOT NULL,
+                line INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS window_counts (
+                hash INTEGER PRIMARY KEY,
+                count INTEGER NOT NULL
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS windows_by_hash ON windows (hash);
+            CREATE INDEX IF NOT EXISTS windows_by_file ON windows (file_id);
+        """)
+        with self._connection:
+            if self._connection.execute("SELECT value FROM meta WHERE key = 'window_counts'").fetchone() is None:
+                # Index built before window counts were kept: count its windows once
+                self._connection.execute("INSERT OR REPLACE INTO window_counts (hash, count) SELECT hash, COUNT(*) FROM windows GROUP BY hash")
+                self._connection.execute("INSERT INTO meta (key, value) VALUES ('window_counts', '1')")
+            stored = self._connection.execute("SELECT value FROM meta WHERE key = 'window_length'").fetchone()
+            if stored is None:
+                self._connection.execute("INSERT INTO meta (key, value) VALUES ('window_length', ?)", (str(window_length),))
+            elif int(stored[0]) != window_length:
+                raise ValueError(f"Clone index {self.index_path} was built with {stored[0]}-line windows, not {window_length}")
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _remove_file(self, file_id):
+        removed = self._connection.execute("SELECT hash, COUNT(*) FROM windows WHERE file_id = ? GROUP BY hash", (file_id,)).fetchall()
+        self._connection.executemany("UPDATE window_counts SET count = count - ? WHERE hash = ?",
+                                     ((count, window_hash) for window_hash, count in removed))
+        self._connection.executemany("DELETE FROM window_counts WHERE hash = ? AND count <= 0",
+                                     ((window_hash,) for window_hash, _ in removed))
+        self._connection.execute("DELETE FROM windows WHERE file_id = ?", (file_id,))
+        self._connection.execute("DELETE FROM files WHERE id = ?", (file_id,))
+
+    def _add_file(self, path, source, size, mtime_ns):
+        existing = self._connection.execute("SELECT id FROM files WHERE path = ?", (path,)).fetchone()
+        if existing:
+            self._remove_file(existing[0])
+        file_id = self._connection.execute(
+            "INSERT INTO files (path, size, mtime_ns) VALUES (?, ?, ?)", (path, size, mtime_ns)).lastrowid
+        windows = list(window_hashes(source.lines, self.window_length))
+        self._connection.executemany(
+            "INSERT INTO windows (hash, file_id, line) VALUES (?, ?, ?)",
+            ((window_hash, file_id, start + 1) for start, window_hash in windows))
+        counts = {}
+        for _, window_hash in windows:
+            counts[window_hash] = counts.get(window_hash, 0) + 1
+        self._connection.executemany(
+            "INSERT INTO window_counts (hash, count) VALUES (?, ?) ON CONFLICT (hash) DO UPDATE SET count = count + excluded.count",
+            counts.items())
+
+    def add_file(self, path, source=None):
+        path = str(Path(path).resolve())
+        stat = os.stat(path)
+        source = source or SourceBuffer.from_path(path)
+        with self._lock, self._connection:
+            self._add_file(path, source, stat.st_size, stat.st_mtime_ns)
+
+    def update_tree(self, root, extensions=SOURCE_EXTENSIONS):
+        # Index new and changed source files under root and drop files that no longer exist there.
+        # Returns (files indexed, files unchanged, files removed).
+        root = str(Path(root).resolve())
+        indexed = unchanged = 0
+        seen = set()
+        with self._lock, self._connection:
+            known = {path: (file_id, size, mtime_ns) for file_id, path, size, mtime_ns in
+                     self._connection.execute("SELECT id, path, size, mtime_ns FROM files")}
+            for directory, _, file_names in os.walk(root):
+                for file_name in file_names:
+                    if os.path.splitext(file_name)[1].lower() not in extensions:
+                        continue
+                    path = os.path.join(directory, file_name)
+                    try:
+                        stat = os.stat(path)
+                        seen.add(path)
+                        previous = known.get(path)
+                        if previous and previous[1] == stat.st_size and previous[2] == stat.st_mtime_ns:
+                            unchanged += 1
+                            continue
+                        source = SourceBuffer.from_path(path)
+                        source.lines
+                    except (OSError, UnicodeDecodeError):
+                        # Deleted since the walk listed it (dropped from the index below if it was there) or unreadable
+                        continue
+                    self._add_file(path, source, stat.st_size, stat.st_mtime_ns)
+                    indexed += 1
+            removed = [file_id for path, (file_id, _, _) in known.items()
+                       if path not in seen and (path == root or path.startswith(root + os.sep))]
+            for file_id in removed:
+                self._remove_file(file_id)
+        return indexed, unchanged, len(removed)
+
+    def find_clones(self, lines, exclude_path=None):
+        """Blocks of `lines` that also appear in indexed files.
+
+        Returns (start line, end line, other path, other start line, other end
+        line) tuples, 1-based and inclusive, with overlapping windows that
+        line up in the same other file merged into one block. Windows indexed
+        more than max_frequency times are not looked up.
+        """
+        windows = {}
+        for start, window_hash in window_hashes(lines, self.window_length):
+            windows.setdefault(window_hash, []).append(start + 1)
+        if not windows:
+            return []
+        exclude_path = str(Path(exclude_path).resolve()) if exclude_path else None
+
+        # (other path, line offset) -> start lines of this file whose window matches there
+        alignments = {}
+        hashes = list(windows)
+        with self._lock:
+            for batch_start in range(0, len(hashes), QUERY_BATCH_SIZE):
+                batch = hashes[batch_start:batch_start + QUERY_BATCH_SIZE]
+                placeholders = ','.join('?' * len(batch))
+                rows = self._connection.execute(
+                    f"SELECT windows.hash, files.path, windows.line FROM window_counts "
+                    f"JOIN windows ON windows.hash = window_counts.hash JOIN files ON files.id = windows.file_id "
+                    f"WHERE window_counts.hash IN ({placeholders}) AND window_counts.count <= ?", [*batch, self.max_frequency])
+                for window_hash, path, other_line in rows:
+                    if path == exclude_path:
+                        continue
+                    for line in windows[window_hash]:
+                        alignments.setdefault((path, other_line - line), set()).add(line)
+
+        clones = []
+        for (path, offset), starts in alignments.items():
+            starts = sorted(starts)
+            block_start = previous = starts[0]
+            for start in starts[1:] + [None]:
+                if start is not None and start <= previous + self.window_length:
+                    previous = start
+                    continue
+                block_end = previous + self.window_length - 1
+                clones.append((block_start, block_end, path, block_start + offset, block_end + offset))
+                if start is not None:
+                    block_start = previous = start
+        clones.sort()
+        return clones
+
+    def stats(self):
+        with self._lock:
+            files = self._connection.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+            windows = self._connection.execute("SELECT COUNT(*) FROM windows").fetchone()[0]
+        return files, windows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or query the cross-file clone index.")
+    parser.add_argument('--index', default='clone_index.db', help="SQLite file holding the index")
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help="index new and changed sources under a directory")
+    build.add_argument('root')
+    query = commands.add_parser('query', help="report blocks of a file that also appear in indexed files")
+    query.add_argument('file')
+    args = parser.parse_args(argv)
+
+    with CloneIndex(args.index) as index:
+        if args.command == 'build':
+            indexed, unchanged, removed = index.update_tree(args.root)
+            files, windows = index.stats()
+            print(f"Indexed {indexed} files, {unchanged} unchanged, {removed} removed - {files} files / {windows} windows in {args.index}")
+        else:
+            lines = SourceBuffer.from_path(args.file).lines
+            for start, end, path, other_start, other_end in index.find_clones(lines, exclude_path=args.file):
+                print(f"Lines {start}-{end} also appear in {path}:{other_start}-{other_end}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
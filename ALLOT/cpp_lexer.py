@@ -0,0 +1,94 @@
+import re
+from array import array
+from bisect import bisect_right
+from collections import namedtuple
+
+# Token kinds, stored as one byte per token
+PREPROCESSOR, COMMENT, STRING, CHAR, IDENTIFIER, NUMBER, PUNCTUATOR, UNKNOWN = range(8)
+KIND_NAMES = ('preprocessor', 'comment', 'string', 'char', 'identifier', 'number', 'punctuator', 'unknown')
+
+# One alternation for the whole language; whitespace between tokens is skipped by finditer
+TOKEN_PATTERN = re.compile(r'''
+    (?P<preprocessor>^[ \t]*\#(?:\\\r?\n|/\*.*?\*/|[^\n])*)
+  | (?P<comment>//(?:\\\r?\n|[^\n])*|/\*.*?(?:\*/|\Z))
+  | (?P<string>(?:u8|u|U|L)?R"(?P<delimiter>[^()\\\s"]{0,16})\(.*?\)(?P=delimiter)"
+             |(?:u8|u|U|L)?"(?:\\.|[^"\\\n])*"?)
+  | (?P<char>(?:u8|u|U|L)?'(?:\\.|[^'\\\n])*'?)
+  | (?P<identifier>[A-Za-z_]\w*)
+  | (?P<number>\.?\d(?:[eEpP][+-]|'?[\w.])*)
+  | (?P<punctuator>
+        %:%:|\.\.\.|<<=|>>=|<=>|->\*|::|\.\*|->|\+\+|--|<<|>>|<=|>=|==|!=|&&|\|\||
+        [-+*/%&|^!=<>]=|\#\#|[{}\[\]()<>;:,.?~!+\-*/%&|^=\#]
+    )
+  | (?P<unknown>\S)
+''', re.VERBOSE | re.DOTALL | re.MULTILINE)
+
+GROUP_KINDS = {'preprocessor': PREPROCESSOR, 'comment': COMMENT, 'string': STRING, 'char': CHAR,
+               'identifier': IDENTIFIER, 'number': NUMBER, 'punctuator': PUNCTUATOR, 'unknown': UNKNOWN}
+
+Token = namedtuple('Token', 'kind text start end line column')
+
+
+class TokenStream:
+    """Compact token stream of one source text: kind, span, line and column per token.
+
+    Tokens live in parallel arrays rather than one object each; Token tuples
+    are only built when the stream is iterated or indexed. Comments, string
+    and char literals and whole preprocessor lines are tokens of their own
+    kinds, so code tokens never include text from them.
+    """
+
+    __slots__ = ('text', 'kinds', 'starts', 'ends', 'lines', 'columns')
+
+    def __init__(self, text, line_offsets=None):
+        self.text = text
+        self.kinds = bytearray()
+        self.starts = array('l')
+        self.ends = array('l')
+        self.lines = array('l')
+        self.columns = array('l')
+        if line_offsets is None:
+            line_offsets = [0] + [match.end() for match in re.finditer('\n', text)]
+        kinds, starts, ends, lines, columns = self.kinds, self.starts, self.ends, self.lines, self.columns
+        line = 1
+        next_offset = line_offsets[1] if len(line_offsets) > 1 else len(text) + 1
+        for match in TOKEN_PATTERN.finditer(text):
+            start, end = match.span()
+            if start >= next_offset:
+                line = bisect_right(line_offsets, start)
+                next_offset = line_offsets[line] if line < len(line_offsets) else len(text) + 1
+            kinds.append(GROUP_KINDS[match.lastgroup])
+            starts.append(start)
+            ends.append(end)
+            lines.append(line)
+            columns.append(start - line_offsets[line - 1] + 1)
+
+    @classmethod
+    def from_source(cls, source):
+        # Reuses the line offsets the SourceBuffer already computed
+        return cls(source.text, source.line_offsets)
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __getitem__(self, index):
+        start, end = self.starts[index], self.ends[index]
+        return Token(self.kinds[index], self.text[start:end], start, end, self.lines[index], self.columns[index])
+
+    def __iter__(self):
+        text = self.text
+        for kind, start, end, line, column in zip(self.kinds, self.starts, self.ends, self.lines, self.columns):
+            yield Token(kind, text[start:end], start, end, line, column)
+
+    def text_of(self, index):
+        return self.text[self.starts[index]:self.ends[index]]
+
+    def of_kind(self, *kinds):
+        text = self.text
+        for kind, start, end, line, column in zip(self.kinds, self.starts, self.ends, self.lines, self.columns):
+            if kind in kinds:
+                yield Token(kind, text[start:end], start, end, line, column)
+
+    def code(self):
+        # Tokens outside comments, literals and preprocessor lines
+        return self.of_kind(IDENTIFIER, NUMBER, PUNCTUATOR, UNKNOWN)
@@ -0,0 +1,139 @@
+import io
+import os
+import time
+import logging
+import zipfile
+import threading
+from collections import Counter, namedtuple
+from datetime import datetime
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+import Script_Analyzer
+from mail_transport import default_transport
+
+DIGEST_WINDOW = 3600  # Seconds a recipient's first held report waits before their digest is sent
+DIGEST_MAX_REPORTS = 40  # Held reports that send a recipient's digest at once, before the window ends
+
+# name: what was analyzed (script or archive name); log_path: the log or report file to attach
+Report = namedtuple('Report', 'name log_path counts')
+
+
+def zip_logs(reports):
+    # All log files of a digest in one deflated zip, named after the logs (numbered when two share a name)
+    buffer = io.BytesIO()
+    names = Counter(os.path.basename(report.log_path) for report in reports)
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for index, report in enumerate(reports, 1):
+            name = os.path.basename(report.log_path)
+            archive.write(report.log_path, name if names[name] == 1 else f"{index:02d}-{name}")
+    return buffer.getvalue()
+
+
+def send_digest(sender_email, sender_password, recipient_email, reports, transport=None):
+    """Email several reports at once: totals per check, issues per script and a zip of every log."""
+    message = MIMEMultipart()
+    message['From'] = sender_email
+    message['To'] = recipient_email
+    current_date = datetime.now().strftime('%d-%m-%Y')
+    message['Subject'] = f"Script Analysis Digest - {current_date} ({len(reports)} reports)"
+
+    totals = Counter()
+    for report in reports:
+        totals.update(report.counts)
+    body = f"Please find attached the logs of {len(reports)} script analyses.<br><br>"
+    body += "<u><b><font size='4.5' color='#000000'>Summary:</font></b></u><br><br>"
+    body += Script_Analyzer.counts_table((Script_Analyzer.CHECK_DISPLAY_NAMES.get(check, check), count)
+                                         for check, count in totals.items())
+    body += "<br><br>"
+    body += Script_Analyzer.counts_table(((report.name, sum(report.counts.values())) for report in reports),
+                                         headers=("Script", "Issues Found"))
+    body += "<br><br>Please Refer to the Attached Logs for the detailed Analysis<br><br>Regards<br>"
+    message.attach(MIMEText(body, 'html'))
+    Script_Analyzer.attach_file(message, f"Script-Analysis-Logs-{current_date}.zip", zip_logs(reports))
+
+    (transport or default_transport).send(Script_Analyzer.SMTP_SERVER, Script_Analyzer.SMTP_PORT, sender_email,
+                                          sender_password, recipient_email, message.as_string())
+
+
+class DigestQueue:
+    """Reports held per recipient and sent as one digest email.
+
+    A recipient's digest goes out window seconds after their first held
+    report, or as soon as max_reports are waiting. A background thread sends
+    the digests that are due, so add() never waits on the mail server;
+    close() sends whatever is still held.
+    """
+
+    def __init__(self, sender_email, sender_password, window=DIGEST_WINDOW, max_reports=DIGEST_MAX_REPORTS, transport=None):
+        self.sender_email = sender_email
+        self.sender_password = sender_password
+        self.window = window
+        self.max_reports = max_reports
+        self.transport = transport
+        self.reports = 0
+        self.digests = 0
+        self._held = {}  # recipient -> (monotonic time of the first held report, [Report])
+        self._closed = False
+        self._changed = threading.Condition()
+        self._sender = threading.Thread(target=self._send_when_due, name='digest-sender', daemon=True)
+        self._sender.start()
+
+    def add(self, recipient_email, log_path, counts, name=None):
+        report = Report(name or os.path.basename(log_path), str(log_path), dict(counts))
+        with self._changed:
+            if self._closed:
+                raise RuntimeError("DigestQueue is closed")
+            self.reports += 1
+            first_held, reports = self._held.setdefault(recipient_email, (time.monotonic(), []))
+            reports.append(report)
+            if len(reports) >= self.max_reports:
+                # Due at once; the sender thread sends it, so callers never wait on the mail server
+                self._held[recipient_email] = (float('-inf'), reports)
+            self._changed.notify()
+
+    def _take_due(self, now):
+        # Removes and returns the digests whose window has ended; called with the lock held
+        due = [recipient for recipient, (first_held, _) in self._held.items() if now - first_held >= self.window]
+        return [(recipient, self._held.pop(recipient)[1]) for recipient in due]
+
+    def _send_when_due(self):
+        while True:
+            with self._changed:
+                due = self._take_due(time.monotonic())
+                while not due and not self._closed:
+                    oldest = min((first_held for first_held, _ in self._held.values()), default=None)
+                    self._changed.wait(None if oldest is None else max(0.0, oldest + self.window - time.monotonic()))
+                    due = self._take_due(time.monotonic())
+                closed = self._closed
+            for recipient_email, reports in due:
+                self._send(recipient_email, reports)
+            if closed:
+                return
+
+    def _send(self, recipient_email, reports):
+        try:
+            send_digest(self.sender_email, self.sender_password, recipient_email, reports, self.transport)
+            with self._changed:
+                self.digests += 1
+        except Exception as e:
+            logging.error(f"Error sending the digest of {len(reports)} reports to {recipient_email}: {str(e)}")
+
+    def flush(self):
+        # Sends every held digest now, whatever its window
+        with self._changed:
+            held, self._held = self._held, {}
+        for recipient_email, (_, reports) in held.items():
+            self._send(recipient_email, reports)
+
+    def stats(self):
+        with self._changed:
+            return {'held': sum(len(reports) for _, reports in self._held.values()), 'recipients': len(self._held),
+                    'reports': self.reports, 'digests': self.digests}
+
+    def close(self):
+        with self._changed:
+            self._closed = True
+            self._changed.notify()
+        self._sender.join()
+        self.flush()
@@ -0,0 +1,172 @@
+import time
+import logging
+from array import array
+
+# Message of every finding rule, rendered only when a log or report is written.
+# {line} and {column} are the finding's position, {0}, {1}, ... its args.
+FINDING_MESSAGES = {
+    # include_directive_check
+    'include_missing': "Mandatory '#include ' directive missing at the beginning of the file.",
+    # total_lines_check
+    'too_many_lines': "Total number of lines ({0}) exceeds the recommended maximum of {1} lines.",
+    # indentation_check
+    'tab_used': "Indentation issue at line {line}: TAB space used. Convert TABs to spaces.",
+    'brace_placement': "Brace placement issue at line {line}: Opening brace should be on the same line as the control statement.",
+    'include_syntax': "Syntax issue at line {line}: Incorrect syntax - Include.",
+    'using_syntax': "Syntax issue at line {line}: Incorrect syntax - Using.",
+    'typedef_syntax': "Syntax issue at line {line}: Incorrect syntax - Typedef.",
+    'control_indentation': "Indentation issue at line {line}: Incorrect indentation for {0} statement.",
+    'indentation': "Indentation issue at line {line}: Incorrect indentation.",
+    # naming_conventions_check
+    'module_prefix': "Symbol with prefix '{0}::' found at line {line}",
+    'lower_case_name': "Variable/function not starting with lower-case letter found at line {line}",
+    'class_name_case': "class names not starting with Upper-Case letter found at line {line}",
+    'type_keyword_case': "TYPE keyword not starting with Upper-Case letter found at line {line}",
+    'constant_case': "Constant not all upper-case found at line {line}",
+    'global_prefix': "Global variable not starting with 'g_' found at line {line}",
+    'member_prefix': "Member not starting with 'm_' found at line {line}",
+    'pointer_prefix': "Pointer not starting with 'p', word: '{0}' and found at line {line}",
+    # modularization_check
+    'repeated_sequence': "Repetition detected: Sequence '{0}' repeated {1} times. Consider refactoring as a function. Lines: {2}",
+    'repeated_block': "Repetition detected: Block of {0} lines '{1}' repeated {2} times. Consider refactoring as a function. Lines: {3}",
+    # file_encoding_check
+    'not_utf8': "File is not UTF-8 encoded - Please save the file in UTF-8 Format: {0}",
+    # consistency_check
+    'mixed_indentation': "Inconsistent use of tabs and spaces for indentation at line {line}",
+    'index_error': "IndexError at line {line}: {0} - {1}",
+    'mixed_line_endings': 'Inconsistent line endings found in the script. Use either CRLF(line break "\r\n") or LF(line break "\n"), not both.',
+    # excess_whitespace_check
+    'excess_whitespace': "Excess whitespace detected: Line {line} '{0}' has more than one space between words.",
+    # cross_file_clone_check
+    'cross_file_clone': "Duplicate block: lines {line}-{0} also appear in {1}:{2}-{3}",
+}
+
+# Short description of every finding rule, without the placeholders of its message (e.g. for SARIF rules)
+RULE_DESCRIPTIONS = {
+    'include_missing': "Mandatory '#include' directive missing at the beginning of the file.",
+    'too_many_lines': "File has more lines than the recommended maximum.",
+    'tab_used': "TAB used for indentation; use spaces.",
+    'brace_placement': "Opening brace not on the same line as the control statement.",
+    'include_syntax': "Incorrect '#include' syntax.",
+    'using_syntax': "Incorrect 'Using' syntax (a line starting with 'Using' must be followed by a name).",
+    'typedef_syntax': "Incorrect 'typedef' syntax.",
+    'control_indentation': "Incorrect indentation of a control statement.",
+    'indentation': "Incorrect indentation.",
+    'module_prefix': "Symbol qualified with a module prefix ('<module>::').",
+    'lower_case_name': "Variable or function name not starting with a lower-case letter.",
+    'class_name_case': "Class name not starting with an upper-case letter.",
+    'type_keyword_case': "Type name not starting with an upper-case letter.",
+    'constant_case': "Constant name not all upper-case.",
+    'global_prefix': "Global variable not starting with 'g_'.",
+    'member_prefix': "Member not starting with 'm_'.",
+    'pointer_prefix': "Pointer not starting with 'p'.",
+    'repeated_sequence': "Sequence of lines repeated; consider refactoring it as a function.",
+    'repeated_block': "Block of lines repeated; consider refactoring it as a function.",
+    'not_utf8': "File is not UTF-8 encoded.",
+    'mixed_indentation': "Tabs and spaces mixed in indentation.",
+    'index_error': "Line could not be checked for consistency.",
+    'mixed_line_endings': "CRLF and LF line endings mixed in one file.",
+    'excess_whitespace': "More than one space between words.",
+    'cross_file_clone': "Block of lines also appears in another indexed file.",
+}
+
+
+class Finding:
+    """One log entry of an analysis, kept as its parts until a message is needed.
+
+    rule is a key of FINDING_MESSAGES, or None for a free-text entry whose
+    message is args[0]. line and column are 1-based, None when the entry is
+    not about one place in the script; severity is a logging level. A
+    finding is not changed once made, so the result cache hands the same
+    ones to every analysis it replays.
+    """
+
+    __slots__ = ('check', 'rule', 'line', 'column', 'severity', 'args')
+
+    def __init__(self, check, rule, line=None, column=None, severity=logging.WARNING, args=()):
+        self.check = check
+        self.rule = rule
+        self.line = line
+        self.column = column
+        self.severity = severity
+        self.args = args
+
+    @property
+    def message(self):
+        if self.rule is None:
+            return self.args[0]
+        return FINDING_MESSAGES[self.rule].format(*self.args, line=self.line, column=self.column)
+
+    def __repr__(self):
+        return f"Finding({self.check!r}, {self.rule!r}, line={self.line}, column={self.column}, severity={self.severity}, args={self.args!r})"
+
+
+class FindingsCollector:
+    """The log of one analysis, held in memory and written to its log file in one go.
+
+    Replaces the root logger for ScriptAnalyzer: every analysis has its own
+    collector, so analyses in different threads never share handlers or
+    files. Entries are Findings tagged with the check that was running when
+    they were logged, with their times in a parallel array; messages are
+    only rendered, in the '<time> - <LEVEL> - <message>' format of the
+    former basicConfig log, when the log is written.
+    """
+
+    __slots__ = ('entries', 'times', 'check', 'listener', '_written')
+
+    def __init__(self, check=None, listener=None):
+        self.entries = []  # Findings in the order they were logged
+        self.times = array('d')  # time.time() each entry was logged at
+        self.check = check  # Tag of the entries logged from now on
+        self.listener = listener  # Called with every entry as it is logged, e.g. to stream it as JSON
+        self._written = 0  # Entries already in the log file
+
+    def log(self, level, message, check=None):
+        self.entries.append(Finding(check or self.check, None, None, None, level, (message,)))
+        self.times.append(time.time())
+        if self.listener is not None:
+            self.listener(self.entries[-1])
+
+    def info(self, message):
+        self.log(logging.INFO, message)
+
+    def warning(self, message):
+        self.log(logging.WARNING, message)
+
+    def error(self, message):
+        self.log(logging.ERROR, message)
+
+    def report(self, rule, line=None, *args, column=None, severity=logging.WARNING):
+        # A finding of the running check; its message is rendered from FINDING_MESSAGES[rule] when written
+        self.entries.append(Finding(self.check, rule, line, column, severity, args))
+        self.times.append(time.time())
+        if self.listener is not None:
+            self.listener(self.entries[-1])
+
+    def extend(self, findings, times=None):
+        # Findings made elsewhere (line rules, the result cache), logged now unless their times are given
+        start = len(self.entries)
+        self.entries.extend(findings)
+        self.times.extend(times if times is not None else array('d', [time.time()]) * (len(self.entries) - start))
+        if self.listener is not None:
+            for finding in self.entries[start:]:
+                self.listener(finding)
+
+    def render(self, start=0):
+        lines = []
+        second = None
+        for finding, created in zip(self.entries[start:], self.times[start:]):
+            if int(created) != second:
+                # Entries come in bursts; the date part, as logging's default '%(asctime)s' has it, is made once a second
+                second = int(created)
+                date = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(second))
+            lines.append(f"{date},{int(created * 1000) % 1000:03d} - {logging.getLevelName(finding.severity)} - {finding.message}\n")
+        return ''.join(lines)
+
+    def write(self, log_file, trailer=''):
+        # Appends the entries not written yet, then trailer, with a single write
+        text = self.render(self._written) + trailer
+        self._written = len(self.entries)
+        if text:
+            with open(log_file, 'a') as file:
+                file.write(text)
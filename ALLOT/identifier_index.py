@@ -0,0 +1,137 @@
+import re
+
+from cpp_lexer import TokenStream, PREPROCESSOR, IDENTIFIER, NUMBER, PUNCTUATOR
+
+IDENTIFIER_PATTERN = re.compile(r'[A-Za-z_]\w*')
+
+# Punctuators that shape scopes and call sites; the rest of the stream is not needed here
+STRUCTURAL_PUNCTUATORS = {'::', '{', '}', '(', ')', '[', ']', ';', ','}
+STRUCTURAL_KINDS = {PREPROCESSOR: 'directive', IDENTIFIER: 'identifier', NUMBER: 'number', PUNCTUATOR: 'punct'}
+
+NOT_CALLS = {'if', 'for', 'while', 'switch', 'return', 'sizeof', 'catch', 'do', 'else', 'case',
+             'alignof', 'decltype', 'typeid', 'static_assert', 'new', 'delete', 'throw', 'defined'}
+
+
+class IdentifierIndex:
+    """Identifiers of one source file, collected in a single tokenization pass.
+
+    `occurrences` maps every identifier outside comments and string literals
+    to the lines it appears on, `definitions` maps each function defined in
+    the file to its line, and `calls` maps each calling function to the
+    functions it calls and the lines of those calls, giving a call graph the
+    checks can share.
+    """
+
+    def __init__(self, occurrences, definitions, calls):
+        self.occurrences = occurrences
+        self.definitions = definitions
+        self.calls = calls
+        self._call_sites = None
+
+    @classmethod
+    def from_tokens(cls, tokens):
+        # tokens: (kind, text, line) with kind 'directive', 'identifier', 'number' or 'punct'; comments and strings left out
+        occurrences = {}
+        definitions = {}
+        calls = {}
+        braces = []  # open braces: True for a class/struct/namespace body, False for any other block
+        depth = 0  # open braces that are not class/struct/namespace bodies
+        current_function = None
+        candidate = None  # (qualified name, line) of 'name(' seen outside any function
+        pending_function = None  # candidate whose parameter list has closed, waiting for '{' or ';'
+        declaring_scope = False
+        parens = 0
+        previous_kind = previous_text = None
+        qualified = []
+        for kind, text, line in tokens:
+            if kind == 'directive':
+                # Macro bodies are indexed for lookups but take no part in the file structure
+                for match in IDENTIFIER_PATTERN.finditer(text):
+                    occurrences.setdefault(match.group(), []).append(line + text.count('\n', 0, match.start()))
+                continue
+            if kind == 'identifier':
+                occurrences.setdefault(text, []).append(line)
+                qualified = qualified + [text] if previous_text == '::' and qualified else [text]
+                if depth == 0 and text in ('class', 'struct', 'union', 'namespace'):
+                    declaring_scope = True
+            elif text == '(':
+                if previous_kind == 'identifier' and previous_text not in NOT_CALLS:
+                    if depth == 0:
+                        if parens == 0 and pending_function is None:
+                            candidate = ('::'.join(qualified), line)
+                    elif current_function is not None:
+                        calls.setdefault(current_function, {}).setdefault(previous_text, []).append(line)
+                parens += 1
+            elif text == ')':
+                parens = max(parens - 1, 0)
+                if depth == 0 and parens == 0 and candidate is not None:
+                    pending_function, candidate = candidate, None
+            elif text == '{':
+                is_scope = depth == 0 and pending_function is None and declaring_scope
+                if depth == 0 and pending_function is not None:
+                    current_function = pending_function[0]
+                    definitions.setdefault(current_function, pending_function[1])
+                braces.append(is_scope)
+                if not is_scope:
+                    depth += 1
+                pending_function = candidate = None
+                declaring_scope = False
+                parens = 0
+            elif text == '}':
+                if braces and not braces.pop():
+                    depth -= 1
+                    if depth == 0:
+                        current_function = None
+            elif text == ';' and depth == 0:
+                # A prototype or declaration, not a definition
+                pending_function = candidate = None
+                declaring_scope = False
+                parens = 0
+            if kind != 'identifier' and text != '::':
+                qualified = []
+            previous_kind, previous_text = kind, text
+        return cls(occurrences, definitions, calls)
+
+    @classmethod
+    def from_stream(cls, stream):
+        return cls.from_tokens(tokenize(stream))
+
+    @classmethod
+    def from_text(cls, text):
+        return cls.from_stream(TokenStream(text))
+
+    def lines_of(self, identifier):
+        return self.occurrences.get(identifier, [])
+
+    def call_sites(self):
+        # Callee name -> every line it is called on, across all functions in the file
+        if self._call_sites is None:
+            call_sites = {}
+            for callees in self.calls.values():
+                for callee, lines in callees.items():
+                    call_sites.setdefault(callee, []).extend(lines)
+            for lines in call_sites.values():
+                lines.sort()
+            self._call_sites = call_sites
+        return self._call_sites
+
+    def calls_to(self, function_name):
+        # Match a qualified definition such as 'HRM_Server::start' by its last component
+        return self.call_sites().get(function_name.rsplit('::', 1)[-1], [])
+
+    def callers_of(self, function_name):
+        callee = function_name.rsplit('::', 1)[-1]
+        return sorted(caller for caller, callees in self.calls.items() if callee in callees)
+
+
+def tokenize(stream):
+    # (kind, text, line) for directives, identifiers, numbers and structural punctuation of a TokenStream
+    text = stream.text
+    for kind, start, end, line in zip(stream.kinds, stream.starts, stream.ends, stream.lines):
+        kind = STRUCTURAL_KINDS.get(kind)
+        if kind is None:
+            continue
+        token = text[start:end]
+        if kind == 'punct' and token not in STRUCTURAL_PUNCTUATORS:
+            continue
+        yield kind, token, line
@@ -0,0 +1,189 @@
+import os
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+
+import Script_Analyzer
+from archive import summarize_archive, write_archive_report
+from clone_index import CloneIndex
+from outbox import Outbox
+from report_formats import JsonLinesWriter
+from result_cache import ResultCache
+from results_store import ResultsStore
+
+JOB_WORKERS = 2  # Processes running queued analyses; each handles one upload at a time
+JOB_QUEUE_SIZE = 64  # Jobs queued or running at once; further uploads are refused until some finish
+JOB_HISTORY_SIZE = 1024  # Finished jobs whose status and result can still be polled
+
+
+class JobQueueFull(RuntimeError):
+    """The queue already holds its maximum number of unfinished jobs."""
+
+
+class Job:
+    """One queued upload: its id, what it analyzes and the future of its result."""
+
+    def __init__(self, job_id, kind, name, future):
+        self.id = job_id
+        self.kind = kind
+        self.name = name
+        self.future = future
+        self.submitted_at = time.time()
+        self.finished_at = None
+
+    @property
+    def status(self):
+        if self.future.running():
+            return 'running'
+        if not self.future.done():
+            return 'queued'
+        if self.future.cancelled() or self.future.exception() is not None:
+            return 'failed'
+        return 'done'
+
+    @property
+    def error(self):
+        if self.future.cancelled():
+            return "Job was cancelled"
+        if not self.future.done() or self.future.exception() is None:
+            return None
+        return str(self.future.exception())
+
+    @property
+    def result(self):
+        # The job's result once it is done, otherwise None
+        return self.future.result() if self.status == 'done' else None
+
+    def to_dict(self):
+        return {'id': self.id, 'kind': self.kind, 'name': self.name, 'status': self.status, 'error': self.error,
+                'submitted_at': self.submitted_at, 'finished_at': self.finished_at}
+
+
+class JobQueue:
+    """Bounded queue of analyses run by a pool of worker processes.
+
+    Uploads are submitted and return a Job at once; the analysis and the
+    email happen in a worker. Each worker is a separate process because the
+    checks are pure Python and would hold the GIL in turn as threads, so only
+    processes analyze several uploads at the same time. The initializer
+    runs once per worker, so caches and stores are opened once, not per job.
+    """
+
+    def __init__(self, max_workers=JOB_WORKERS, max_queued=JOB_QUEUE_SIZE, max_history=JOB_HISTORY_SIZE,
+                 initializer=None, initargs=()):
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.max_history = max_history
+        self.submitted = 0
+        self.rejected = 0
+        self._jobs = OrderedDict()  # job id -> Job, oldest first
+        self._unfinished = 0
+        self._lock = threading.Lock()
+        self._executor = ProcessPoolExecutor(max_workers=max_workers, initializer=initializer, initargs=initargs)
+
+    def submit(self, kind, name, function, *args, job_id=None):
+        with self._lock:
+            if self._unfinished >= self.max_queued:
+                self.rejected += 1
+                raise JobQueueFull(f"{self._unfinished} jobs are already waiting, try again later")
+            self._unfinished += 1
+            self.submitted += 1
+            job = Job(job_id or uuid.uuid4().hex, kind, name, self._executor.submit(function, *args))
+            self._jobs[job.id] = job
+            self._forget_old_jobs()
+        job.future.add_done_callback(lambda _: self._finish(job))
+        return job
+
+    def _finish(self, job):
+        with self._lock:
+            job.finished_at = time.time()
+            self._unfinished -= 1
+
+    def _forget_old_jobs(self):
+        # Drops the oldest finished jobs beyond max_history; unfinished ones are always kept
+        finished = len(self._jobs) - self._unfinished
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.future.done()][:max(0, finished - self.max_history)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self):
+        with self._lock:
+            return {'workers': self.max_workers, 'unfinished': self._unfinished, 'jobs': len(self._jobs),
+                    'submitted': self.submitted, 'rejected': self.rejected}
+
+    def close(self, wait=True):
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Settings and shared objects of the current worker process, set by start_worker
+_worker = {}
+
+
+def start_worker(settings):
+    """Initializer of the app's job workers: opens the cache, store and clone index once per process.
+
+    settings holds the values app.py reads from its environment: sender_email,
+    sender_password, result_cache_size, results_store_path, clone_index_path,
+    check_workers, archive_limits and outbox_dir.
+    """
+    _worker.update(settings)
+    _worker['result_cache'] = ResultCache(settings['result_cache_size'])
+    _worker['results_store'] = ResultsStore(settings['results_store_path']) if settings.get('results_store_path') else None
+    _worker['clone_index'] = CloneIndex(settings['clone_index_path']) if settings.get('clone_index_path') else None
+    # Reports are spooled here and sent by the app process's outbox sender
+    _worker['outbox'] = Outbox(settings['outbox_dir'], start_sender=False) if settings.get('outbox_dir') else None
+
+
+def run_script_job(file_path, recipient_email, send_report=True, findings_path=None):
+    """Analyze one uploaded script and email its log unless send_report is False; returns the counts and the log path.
+
+    With findings_path, every finding is also streamed there as a JSON line while the checks run.
+    """
+    with open(findings_path, 'w') if findings_path else nullcontext() as findings_file:
+        writer = JsonLinesWriter(findings_file, os.path.basename(file_path)) if findings_file else None
+        analyzer = Script_Analyzer.ScriptAnalyzer(file_path, recipient_email, _worker['sender_email'], _worker['sender_password'],
+                                                  clone_index=_worker['clone_index'], result_cache=_worker['result_cache'],
+                                                  results_store=_worker['results_store'], max_workers=_worker.get('check_workers'),
+                                                  send_report=send_report, mail_transport=_worker.get('outbox'),
+                                                  finding_writer=writer)
+        analyzer.run_analysis()
+    if analyzer.error_count:
+        raise RuntimeError(f"Analysis of {os.path.basename(file_path)} failed, see {analyzer.log_file.name}")
+    return {'counts': analyzer.counts, 'log_file': str(analyzer.log_file), 'cache_hit': analyzer.cache_hit,
+            'findings_file': findings_path}
+
+
+def run_archive_job(archive_path, recipient_email, log_dir, report_path, send_report=True, findings_path=None):
+    """Analyze the members of an uploaded archive and email the combined report unless send_report is False.
+
+    With findings_path, the findings of every member are also written there as JSON lines.
+    """
+    # Members are analyzed in this worker: it is one of the queue's processes already, and a pool
+    # started here would outlive the job and keep the app from exiting
+    with open(archive_path, 'rb') as stream:
+        summary, results = summarize_archive(stream, os.path.basename(archive_path), None, log_dir,
+                                             **_worker.get('archive_limits', {}))
+    write_archive_report(report_path, summary, results)
+    if findings_path:
+        with open(findings_path, 'w') as findings_file:
+            writer = JsonLinesWriter(findings_file)
+            for result in results:
+                for finding in result.findings:
+                    writer.add(result.path, finding)
+    if send_report:
+        Script_Analyzer.send_email(_worker['sender_email'], _worker['sender_password'], recipient_email, report_path,
+                                   dict(summary.totals), transport=_worker.get('outbox'))
+    return {'files': summary.files, 'files_with_issues': summary.files_with_issues, 'counts': dict(summary.totals),
+            'failed': [path for path, _ in summary.failed], 'report': str(report_path), 'findings_file': findings_path}
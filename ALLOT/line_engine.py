@@ -0,0 +1,99 @@
+import logging
+
+from findings_collector import Finding
+
+
+class SourceLine:
+    """One line of the script, stripped and classified once for every rule."""
+
+    __slots__ = ('number', 'text', 'stripped', 'is_blank', 'is_comment')
+
+    def __init__(self, number, text, stripped):
+        self.number = number
+        self.text = text
+        self.stripped = stripped
+        self.is_blank = not stripped
+        self.is_comment = stripped.startswith("//") or stripped.startswith("/*")
+
+
+class LineRule:
+    """Base class for a line-local check fed by the LineEngine.
+
+    A rule keeps its own state between lines and collects its findings as
+    Finding objects so the owning check can log them in order.
+    start() sees the whole SourceBuffer before the first line, for what the
+    normalized lines no longer show (e.g. the raw line endings).
+    visit() returns True once the rule needs no further lines.
+    """
+
+    check = None
+
+    def __init__(self):
+        self.findings = []
+        self.count = 0
+        self.error = None
+
+    def warn(self, rule, line=None, *args, column=None, counted=True):
+        # rule is a FINDING_MESSAGES key; the message is only rendered when the log is written
+        self.findings.append(Finding(self.check, rule, line, column, logging.WARNING, args))
+        if counted:
+            self.count += 1
+
+    def error_finding(self, rule, line=None, *args, column=None, counted=True):
+        self.findings.append(Finding(self.check, rule, line, column, logging.ERROR, args))
+        if counted:
+            self.count += 1
+
+    def start(self, source):
+        pass
+
+    def visit(self, line):
+        raise NotImplementedError
+
+    def finish(self):
+        pass
+
+    def apply_count(self, counts):
+        counts[self.check] += self.count
+
+
+class LineEngine:
+    """Walks the script once and hands every line to all registered rules.
+
+    A rule that raises is stopped and keeps the exception in rule.error; the
+    other rules carry on, as the separate per-check loops used to.
+    """
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+
+    def run(self, source):
+        active = []
+        for rule in self.rules:
+            try:
+                rule.start(source)
+                active.append(rule)
+            except Exception as e:
+                rule.error = e
+        for number, (text, stripped) in enumerate(zip(source.lines, source.stripped_lines), start=1):
+            if not active:
+                break
+            line = SourceLine(number, text, stripped)
+            finished = []
+            for rule in active:
+                try:
+                    if rule.visit(line):
+                        finished.append(rule)
+                except Exception as e:
+                    rule.error = e
+                    finished.append(rule)
+            if finished:
+                active = [rule for rule in active if rule not in finished]
+
+        for rule in self.rules:
+            if rule.error is None:
+                try:
+                    rule.finish()
+                except Exception as e:
+                    rule.error = e
+        return {rule.check: rule for rule in self.rules}
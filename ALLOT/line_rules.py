@@ -0,0 +1,180 @@
+import re
+
+from line_engine import LineRule
+from naming_rules import NAMING_REGISTRY, module_prefix_matcher
+
+INCLUDE_SYNTAX = re.compile(r'^#include\s+\S+')
+USING_SYNTAX = re.compile(r'^Using\s+\S+')
+TYPEDEF_SYNTAX = re.compile(r'^typedef\s+\S+\s+\S+;')
+CONTROL_STRUCTURES = ["if", "else if", "else", "switch", "for", "while", "do", "case", "default"]
+EXCESS_WHITESPACE = re.compile(r'\\s{2,}')
+
+
+class IncludeDirectiveRule(LineRule):
+    check = 'include_directive_check'
+
+    def __init__(self):
+        super().__init__()
+        self.first_non_comment_line = None
+
+    def visit(self, line):
+        if line.is_blank or line.is_comment:
+            return False
+        self.first_non_comment_line = line
+        return True
+
+    def finish(self):
+        if not self.first_non_comment_line or not self.first_non_comment_line.stripped.startswith("#include "):
+            self.error_finding('include_missing')
+
+    def apply_count(self, counts):
+        if self.count:
+            counts[self.check] = 1
+
+
+class IndentationRule(LineRule):
+    check = 'indentation_check'
+
+    def __init__(self, indentation_spaces):
+        super().__init__()
+        self.indentation_spaces = indentation_spaces
+        self.inside_function = False
+        self.indentation_level = 0
+
+    def visit(self, line):
+        if line.is_blank or line.is_comment:
+            return False
+        text = line.text
+        stripped = line.stripped
+        line_number = line.number
+
+        if "\t" in text:
+            self.warn('tab_used', line_number, column=text.index("\t") + 1)
+
+        if "{" in text and not stripped.endswith("{"):
+            self.warn('brace_placement', line_number, column=text.index("{") + 1)
+
+        if stripped.startswith("#include"):
+            if not INCLUDE_SYNTAX.match(stripped):
+                self.warn('include_syntax', line_number, counted=False)
+            return False
+
+        if stripped.startswith("Using"):
+            if not USING_SYNTAX.match(stripped):
+                self.warn('using_syntax', line_number, counted=False)
+            return False
+
+        if stripped.startswith("typedef"):
+            if not TYPEDEF_SYNTAX.match(stripped):
+                self.warn('typedef_syntax', line_number, counted=False)
+            return False
+
+        if "{" in text and "(" in text and not self.inside_function:
+            if stripped.endswith("{"):
+                self.inside_function = True
+                return False
+
+        if self.inside_function:
+            for control_structure in CONTROL_STRUCTURES:
+                if control_structure in stripped:
+                    if not text.startswith(" " * self.indentation_spaces * self.indentation_level):
+                        self.warn('control_indentation', line_number, control_structure)
+                    if stripped.endswith("{"):
+                        self.indentation_level += 1
+                if stripped.startswith("}"):
+                    self.indentation_level -= 1
+                    if self.indentation_level == 0:
+                        self.inside_function = False
+                        continue
+
+        if "do" in stripped and "{" in stripped:
+            self.indentation_level += 1
+        if "while" in stripped and ";" in stripped and "do" not in stripped:
+            self.indentation_level -= 1
+
+        if not text.startswith(" " * self.indentation_spaces * self.indentation_level) and stripped not in ["{", "}"]:
+            self.warn('indentation', line_number)
+        return False
+
+
+class NamingConventionsRule(LineRule):
+    check = 'naming_conventions_check'
+
+    def __init__(self, modules, registry=NAMING_REGISTRY):
+        super().__init__()
+        self.module_matcher = module_prefix_matcher(tuple(modules))
+        self.registry = registry
+
+    def visit(self, line):
+        line_number = line.number
+        line = line.stripped
+
+        # Check for symbols prefix corresponding to all module names
+        for module in self.module_matcher.match(line):
+            self.warn('module_prefix', line_number, module)
+
+        # Remaining naming rules, precompiled and prefiltered by the registry
+        for rule, args in self.registry.findings(line):
+            self.warn(rule, line_number, *args)
+        return False
+
+
+class ConsistencyRule(LineRule):
+    check = 'consistency_check'
+
+    def __init__(self):
+        super().__init__()
+        self.indentation_type = None
+        self.line_endings = set()
+
+    def start(self, source):
+        # Line endings come from the raw bytes: the lines the rules see all end in '\n'
+        self.line_endings = source.line_endings()
+
+    def visit(self, line):
+        text = line.text
+        line_number = line.number
+
+        # Check for consistent use of tabs or spaces for indentation, judged by the first character of
+        # each indented line; unindented and blank lines say nothing about the style
+        try:
+            leading_whitespace = len(text) - len(text.lstrip())
+            if 0 < leading_whitespace < len(text):
+                if text[0] == '\t':
+                    if self.indentation_type is None:
+                        self.indentation_type = 'tabs'
+                    elif self.indentation_type != 'tabs':
+                        self.warn('mixed_indentation', line_number)
+                else:
+                    if self.indentation_type is None:
+                        self.indentation_type = 'spaces'
+                    elif self.indentation_type != 'spaces':
+                        self.warn('mixed_indentation', line_number)
+        except IndexError as ie:
+            self.error_finding('index_error', line_number, text, str(ie))
+        return False
+
+    def finish(self):
+        if len(self.line_endings) > 1:
+            self.warn('mixed_line_endings')
+
+
+class ExcessWhitespaceRule(LineRule):
+    check = 'excess_whitespace_check'
+
+    def visit(self, line):
+        stripped_line = line.stripped
+        if stripped_line and EXCESS_WHITESPACE.search(stripped_line):
+            self.warn('excess_whitespace', line.number, stripped_line)
+        return False
+
+
+def build_line_rules(indentation_spaces, modules):
+    # One instance of every line-local rule, in the order run_analysis reports them
+    return [
+        IncludeDirectiveRule(),
+        IndentationRule(indentation_spaces),
+        NamingConventionsRule(modules),
+        ConsistencyRule(),
+        ExcessWhitespaceRule(),
+    ]
@@ -0,0 +1,115 @@
+import os
+import socket
+import time
+import smtplib
+import threading
+
+MAIL_IDLE_TIMEOUT = 60  # Seconds a session may sit unused before it is reopened; servers drop idle clients
+MAIL_SOCKET_TIMEOUT = 30  # Seconds to wait on the server for connects and replies
+
+
+class _Session:
+    # One authenticated SMTP connection and the lock serializing its use
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.smtp = None
+        self.last_used = 0.0
+
+
+class MailTransport:
+    """Authenticated SMTP sessions kept open per (server, port, sender) and reused for every message.
+
+    Connecting, STARTTLS and AUTH happen once per session instead of once
+    per email. A session unused for idle_timeout seconds is closed and
+    reopened, and a message that finds its reused session dropped by the
+    server is sent again once over a fresh one.
+    """
+
+    def __init__(self, idle_timeout=MAIL_IDLE_TIMEOUT, timeout=MAIL_SOCKET_TIMEOUT, ssl_context=None):
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.ssl_context = ssl_context
+        self.connects = 0
+        self.messages = 0
+        self._sessions = {}  # (server, port, sender) -> _Session
+        self._lock = threading.Lock()
+
+    def _session(self, key):
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = self._sessions[key] = _Session()
+            return session
+
+    def _connect(self, server, port, sender, password):
+        smtp = smtplib.SMTP(server, port, timeout=self.timeout)
+        try:
+            # A message's last TLS record would otherwise wait on the server's delayed ACK of the previous ones
+            smtp.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            smtp.starttls(context=self.ssl_context)  # Enable security
+            smtp.login(sender, password)  # Login
+        except BaseException:
+            smtp.close()
+            raise
+        self.connects += 1
+        return smtp
+
+    @staticmethod
+    def _drop(session, quit_session=False):
+        if session.smtp is None:
+            return
+        try:
+            if quit_session:
+                session.smtp.quit()  # Terminate the session
+        except (smtplib.SMTPException, OSError):
+            pass
+        finally:
+            session.smtp.close()
+            session.smtp = None
+
+    def send(self, server, port, sender, password, recipients, message_text):
+        session = self._session((server, port, sender))
+        with session.lock:
+            if session.smtp is not None and time.monotonic() - session.last_used > self.idle_timeout:
+                self._drop(session, quit_session=True)
+            reused = session.smtp is not None
+            while True:
+                if session.smtp is None:
+                    session.smtp = self._connect(server, port, sender, password)
+                try:
+                    session.smtp.sendmail(sender, recipients, message_text)  # Send email
+                    break
+                except (smtplib.SMTPServerDisconnected, ConnectionError):
+                    self._drop(session)
+                    if not reused:
+                        raise
+                    # The server closed the idle session on its side: retry once on a new one
+                    reused = False
+            session.last_used = time.monotonic()
+            self.messages += 1
+
+    def stats(self):
+        with self._lock:
+            return {'sessions': sum(1 for session in self._sessions.values() if session.smtp is not None),
+                    'connects': self.connects, 'messages': self.messages}
+
+    def close(self):
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            with session.lock:
+                self._drop(session, quit_session=True)
+
+    def _forget_sessions(self):
+        # In a forked child the sockets belong to the parent; start over without touching them
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+
+# Shared by every report sent from this process
+default_transport = MailTransport()
+# Windows has no fork, and its spawned children import this module afresh
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=default_transport._forget_sessions)
@@ -0,0 +1,166 @@
+import re
+from functools import lru_cache
+
+RESERVED_NAMES = ['int', 'short', 'long', 'long long', 'float', 'double', 'long double', 'char', 'wchar_t', 'char16_t', 'char32_t', 'bool', 'void', 'enum', 'struct', 'union']
+
+
+class ModulePrefixMatcher:
+    """Prefix trie over module names, finding every '<module>::' a line starts with.
+
+    Built once per module list; a line is scanned character by character
+    only as far as it keeps following a trie path, so the cost per line does
+    not grow with the number of modules. Matches come back in module-list
+    order, once per occurrence of the module in the list.
+    """
+
+    _END = object()
+
+    def __init__(self, modules):
+        self.modules = tuple(modules)
+        self.root = {}
+        for index, module in enumerate(self.modules):
+            node = self.root
+            for char in module:
+                node = node.setdefault(char, {})
+            node.setdefault(self._END, []).append(index)
+
+    def match(self, line):
+        matches = None
+        node = self.root
+        position = 0
+        length = len(line)
+        while True:
+            indexes = node.get(self._END)
+            if indexes is not None and line.startswith("::", position):
+                matches = (matches or []) + indexes
+            if position == length:
+                break
+            node = node.get(line[position])
+            if node is None:
+                break
+            position += 1
+        if not matches:
+            return ()
+        return [self.modules[index] for index in sorted(matches)]
+
+
+@lru_cache(maxsize=32)
+def module_prefix_matcher(modules):
+    # Matchers are cached per module tuple so each configured list is compiled once
+    return ModulePrefixMatcher(modules)
+
+
+class NamingPattern:
+    """One naming-convention rule with its regexes compiled once.
+
+    A line is a candidate only if it starts with one of `prefixes` (when
+    given) and contains every string in `contains`. The rule fires when all
+    `triggers` match and not all `exemptions` do; each entry is a
+    (method, compiled pattern) pair where method is 'match' or 'search'.
+    Findings are (rule, args) pairs, rule being a FINDING_MESSAGES key.
+    """
+
+    def __init__(self, rule, triggers, exemptions=(), prefixes=None, contains=()):
+        self.rule = rule
+        self.triggers = tuple((getattr(re.compile(pattern), method)) for method, pattern in triggers)
+        self.exemptions = tuple((getattr(re.compile(pattern), method)) for method, pattern in exemptions)
+        self.prefixes = tuple(prefixes) if prefixes else None
+        self.contains = tuple(contains)
+
+    def accepts(self, line):
+        if self.prefixes is not None and not line.startswith(self.prefixes):
+            return False
+        for text in self.contains:
+            if text not in line:
+                return False
+        return True
+
+    def findings(self, line):
+        for trigger in self.triggers:
+            if not trigger(line):
+                return ()
+        if self.exemptions and all(exemption(line) for exemption in self.exemptions):
+            return ()
+        return ((self.rule, ()),)
+
+
+class PointerPattern(NamingPattern):
+    # Reports every '*name' on the line whose name does not start with 'p'
+
+    def __init__(self):
+        super().__init__('pointer_prefix', triggers=(), contains=('*',))
+        self.pointer = re.compile(r'(?<!/)\*\s*\w+')
+
+    def findings(self, line):
+        findings = []
+        for match in self.pointer.finditer(line):
+            word = match.group()[1:].lstrip()
+            if not word.startswith('p'):
+                findings.append((self.rule, (word,)))
+        return findings
+
+
+class NamingRegistry:
+    """Naming patterns indexed by the first character a candidate line can start with.
+
+    Patterns without a prefix apply to every line and are filtered by their
+    `contains` strings; the per-character tuples keep registry order so the
+    findings of a line come out in the same order as the checks are listed.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = tuple(patterns)
+        self.unprefixed = tuple(pattern for pattern in self.patterns if pattern.prefixes is None)
+        first_chars = {prefix[:1] for pattern in self.patterns if pattern.prefixes for prefix in pattern.prefixes}
+        self.by_first_char = {
+            char: tuple(pattern for pattern in self.patterns
+                        if pattern.prefixes is None or any(prefix.startswith(char) for prefix in pattern.prefixes))
+            for char in first_chars
+        }
+
+    def candidates(self, line):
+        return self.by_first_char.get(line[:1], self.unprefixed)
+
+    def findings(self, line):
+        findings = []
+        for pattern in self.candidates(line):
+            if pattern.accepts(line):
+                findings.extend(pattern.findings(line))
+        return findings
+
+
+NAMING_PATTERNS = [
+    # Lower-case variables/functions with reserved data types (the exemption
+    # repeats the trigger, so this rule never reports; kept as it was)
+    NamingPattern('lower_case_name',
+                  triggers=[('match', r'^\s*(?:' + '|'.join(RESERVED_NAMES) + r')\s+[a-z_]\w*\s*;')],
+                  exemptions=[('match', r'^\s*(?:' + '|'.join(RESERVED_NAMES) + r')\s+[a-z_]\w*\s*;')],
+                  prefixes=RESERVED_NAMES),
+    # Upper-case types/classes
+    NamingPattern('class_name_case',
+                  triggers=[('match', r'\b(class|struct|enum|union|namespace)\s')],
+                  exemptions=[('match', r'\b(class|struct|enum|union|namespace)\s+[A-Z]\w*\s+\w+(?:::\w+)?\s*{?$')],
+                  prefixes=['class', 'struct', 'enum', 'union', 'namespace']),
+    # Upper case type/class name or the TYPE keyword convention
+    NamingPattern('type_keyword_case',
+                  triggers=[('search', r'\bTYPE\s'), ('search', r';\s*END\s+TYPE\s')],
+                  exemptions=[('search', r'\bTYPE\s*\(\s*[a-zA-Z]+\s*\)\s*;'), ('search', r';\s*END\s+TYPE\s+[a-zA-Z]+\s*;')],
+                  contains=['TYPE', 'END']),
+    # Upper-case constants
+    NamingPattern('constant_case',
+                  triggers=[('match', r'^#define\s+[A-Z_]+\s+'), ('match', r'#define [A-Z_]+ .*')],
+                  prefixes=['#define']),
+    # Global variables starting with 'g_'
+    NamingPattern('global_prefix',
+                  triggers=[('match', r'\b(g_[a-zA-Z_]\w*)\b')],
+                  prefixes=['g_']),
+    # Members starting with 'm_'
+    NamingPattern('member_prefix',
+                  triggers=[('match', r'(\w+)::\1')],
+                  exemptions=[('match', r'(\w+)::\1\s*\((.*?)\)\s*:\s*\w+\s*\([^)]*\)\s*(?:...).*m_\w+\s*\([^)]*\)*\s*{')],
+                  contains=['::']),
+    # Pointers starting with 'p'
+    PointerPattern(),
+]
+
+NAMING_REGISTRY = NamingRegistry(NAMING_PATTERNS)
@@ -0,0 +1,194 @@
+import os
+import json
+import time
+import uuid
+import logging
+import smtplib
+import threading
+from pathlib import Path
+
+from mail_transport import default_transport
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+OUTBOX_RETRY_BASE = 30  # Seconds before the first retry of a failed email; doubles after each further failure
+OUTBOX_RETRY_MAX = 3600  # Longest wait between two attempts
+OUTBOX_MAX_ATTEMPTS = 12  # Attempts before an email is moved to failed/ for a person to look at
+OUTBOX_POLL_INTERVAL = 5  # Seconds between spool scans, which pick up emails spooled by other processes
+
+
+def _fsync_directory(path):
+    # Makes a rename or new file in the directory survive a crash
+    descriptor = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+
+
+def _try_lock(lock_file):
+    # Takes an exclusive lock on lock_file without waiting; False when another process holds it
+    try:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+    except (BlockingIOError, PermissionError):
+        return False
+    return True
+
+
+def _unlock(lock_file):
+    if fcntl is not None:
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+    else:
+        lock_file.seek(0)
+        msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def is_permanent(error):
+    # Refused recipients will be refused again; everything else (network, 4xx, login) is retried
+    return isinstance(error, smtplib.SMTPRecipientsRefused)
+
+
+class Outbox:
+    """Durable spool of outgoing emails, drained by a background sender with exponential backoff.
+
+    send() has MailTransport's signature, so send_email can spool through
+    it: the message is written to tmp/, fsync'd and renamed into queue/, and
+    send() returns without touching the network. Passwords are never
+    written to the spool; the sender uses the ones passed in passwords or
+    given to send() in this process. Senders in several processes may share
+    a spool directory: a lock file lets only one of them drain it at a time.
+    """
+
+    def __init__(self, spool_dir, passwords=None, transport=None, start_sender=True, retry_base=OUTBOX_RETRY_BASE,
+                 retry_max=OUTBOX_RETRY_MAX, max_attempts=OUTBOX_MAX_ATTEMPTS, poll_interval=OUTBOX_POLL_INTERVAL):
+        self.spool_dir = Path(spool_dir)
+        self.transport = transport or default_transport
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.spooled = 0
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+        self._passwords = dict(passwords or {})  # sender -> password, kept in memory only
+        for folder in ('tmp', 'queue', 'failed'):
+            (self.spool_dir / folder).mkdir(parents=True, exist_ok=True)
+        self._delivering = threading.Lock()
+        self._wakeup = threading.Condition()
+        self._closed = False
+        self._woken = False  # Set by send() and wake(), so a wake-up during a drain is not lost
+        self._sender = None
+        if start_sender:
+            self._sender = threading.Thread(target=self._send_when_due, name='outbox-sender', daemon=True)
+            self._sender.start()
+
+    def _write(self, folder, name, entry):
+        # Atomic and durable: a reader sees the whole entry or none of it, even after a crash
+        temporary = self.spool_dir / 'tmp' / name
+        with open(temporary, 'w') as spool_file:
+            json.dump(entry, spool_file)
+            spool_file.flush()
+            os.fsync(spool_file.fileno())
+        os.replace(temporary, self.spool_dir / folder / name)
+        _fsync_directory(self.spool_dir / folder)
+
+    def send(self, server, port, sender, password, recipients, message_text):
+        # Spools the email and returns its spool name once it is on disk
+        now = time.time()
+        name = f"{time.time_ns():020d}-{uuid.uuid4().hex}.json"
+        entry = {'server': server, 'port': port, 'sender': sender, 'recipients': recipients, 'message': message_text,
+                 'created_at': now, 'attempts': 0, 'next_attempt': now, 'last_error': None}
+        self._write('queue', name, entry)
+        with self._wakeup:
+            self._passwords[sender] = password
+            self.spooled += 1
+            self._woken = True
+            self._wakeup.notify()
+        return name
+
+    def pending(self):
+        return sorted(path.name for path in (self.spool_dir / 'queue').glob('*.json'))
+
+    def deliver_due(self, now=None):
+        """Tries every spooled email whose next attempt is due, oldest first; returns how many were sent."""
+        with self._delivering, open(self.spool_dir / 'sender.lock', 'w') as lock_file:
+            if not _try_lock(lock_file):
+                return 0  # Another process is draining the spool
+            try:
+                return self._deliver_due(now)
+            finally:
+                _unlock(lock_file)
+
+    def _deliver_due(self, now):
+        sent = 0
+        for name in self.pending():
+            path = self.spool_dir / 'queue' / name
+            try:
+                with open(path) as spool_file:
+                    entry = json.load(spool_file)
+            except FileNotFoundError:
+                continue
+            if entry['next_attempt'] > (now or time.time()) or entry['sender'] not in self._passwords:
+                continue
+            try:
+                self.transport.send(entry['server'], entry['port'], entry['sender'], self._passwords[entry['sender']],
+                                    entry['recipients'], entry['message'])
+            except Exception as e:
+                self._reschedule(name, entry, e)
+                continue
+            path.unlink()
+            sent += 1
+            self.sent += 1
+        return sent
+
+    def _reschedule(self, name, entry, error):
+        entry['attempts'] += 1
+        entry['last_error'] = str(error)
+        if is_permanent(error) or entry['attempts'] >= self.max_attempts:
+            self._write('failed', name, entry)
+            (self.spool_dir / 'queue' / name).unlink()
+            self.failed += 1
+            logging.error(f"Giving up on email to {entry['recipients']} after {entry['attempts']} attempts: {str(error)}")
+            return
+        entry['next_attempt'] = time.time() + min(self.retry_base * 2 ** (entry['attempts'] - 1), self.retry_max)
+        self._write('queue', name, entry)
+        self.retried += 1
+
+    def _send_when_due(self):
+        while True:
+            try:
+                self.deliver_due()
+            except Exception as e:
+                logging.error(f"Error while draining the outbox: {str(e)}")
+            with self._wakeup:
+                if self._closed:
+                    return
+                if not self._woken:
+                    self._wakeup.wait(self.poll_interval)
+                self._woken = False
+
+    def wake(self):
+        # Drains the spool now, e.g. after another process spooled an email
+        with self._wakeup:
+            self._woken = True
+            self._wakeup.notify()
+
+    def stats(self):
+        return {'pending': len(self.pending()), 'spooled': self.spooled, 'sent': self.sent, 'retried': self.retried,
+                'failed': self.failed}
+
+    def close(self):
+        # Stops the sender; emails still spooled are sent by the next one started on this directory
+        with self._wakeup:
+            self._closed = True
+            self._wakeup.notify()
+        if self._sender is not None:
+            self._sender.join()
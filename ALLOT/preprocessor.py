@@ -0,0 +1,119 @@
+import hashlib
+import threading
+import subprocess
+from pathlib import Path
+from collections import OrderedDict
+
+CPP_COMMAND = ('cpp',)
+PREPROCESS_CACHE_SIZE = 64  # Preprocessed translation units kept in memory
+# cpp picks the language from the file name, which it does not see on stdin
+CPP_LANGUAGES = {'.cc': 'c++', '.cpp': 'c++', '.cxx': 'c++', '.hh': 'c++', '.hpp': 'c++'}
+
+
+class PreprocessError(Exception):
+    def __init__(self, path, returncode, stderr):
+        super().__init__(f"cpp exited with status {returncode} for {path}")
+        self.path = path
+        self.returncode = returncode
+        self.stderr = stderr
+
+
+class _Flight:
+    # One cpp run in progress; later callers for the same key wait for its result
+    __slots__ = ('done', 'text', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.text = None
+        self.error = None
+
+
+class Preprocessor:
+    """Runs cpp over a script through pipes and caches the output in memory.
+
+    The script bytes are written to cpp's stdin and its output is read from
+    stdout, so nothing is written next to the upload and the parser gets
+    the text directly. Results are cached by (content hash, script path,
+    include directories, defines); concurrent requests for a key that is being
+    preprocessed wait for that single cpp run instead of starting their own.
+    """
+
+    def __init__(self, command=CPP_COMMAND, max_entries=PREPROCESS_CACHE_SIZE):
+        self.command = tuple(command)
+        self.max_entries = max_entries
+        self.spawns = 0
+        self.hits = 0
+        self.shared = 0  # requests served by another thread's cpp run
+        self._cache = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def key(self, path, raw, include_dirs=(), defines=()):
+        # The output names the script in its line markers, and the script's directory is on the
+        # quoted-include path, so the same bytes at another path are preprocessed on their own
+        return hashlib.sha256(raw).hexdigest(), str(Path(path)), tuple(include_dirs), tuple(sorted(defines))
+
+    def preprocess(self, path, raw, include_dirs=(), defines=()):
+        # Preprocessed text of `raw` (the bytes of the script at `path`); raises PreprocessError when cpp fails
+        key = self.key(path, raw, include_dirs, defines)
+        with self._lock:
+            text = self._cache.get(key)
+            if text is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return text
+            flight = self._in_flight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._in_flight[key] = _Flight()
+            else:
+                self.shared += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.text
+
+        try:
+            flight.text = self._run_cpp(path, raw, include_dirs, defines)
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+                if flight.error is None:
+                    self._cache[key] = flight.text
+                    while len(self._cache) > self.max_entries:
+                        self._cache.popitem(last=False)
+            flight.done.set()
+        return flight.text
+
+    def _run_cpp(self, path, raw, include_dirs, defines):
+        path = Path(path)
+        # Quoted includes resolve against the script's directory even though cpp reads stdin,
+        # and the leading line marker keeps the script's name in cpp's output and messages
+        command = [*self.command, '-x', CPP_LANGUAGES.get(path.suffix.lower(), 'c'), '-iquote', str(path.parent)]
+        command += [f'-I{include_dir}' for include_dir in include_dirs]
+        command += [f'-D{define}' for define in defines]
+        command.append('-')
+        with self._lock:
+            self.spawns += 1
+        marker = f'# 1 "{path}"\n'.encode('utf-8', 'surrogateescape')
+        result = subprocess.run(command, input=marker + raw, capture_output=True)
+        if result.returncode != 0:
+            raise PreprocessError(path, result.returncode, result.stderr.decode('utf-8', 'replace'))
+        return result.stdout.decode('utf-8', 'replace')
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._cache), 'spawns': self.spawns, 'hits': self.hits, 'shared': self.shared}
+
+
+# Shared by every analyzer in the process, so repeated and concurrent uploads reuse cpp runs
+default_preprocessor = Preprocessor()
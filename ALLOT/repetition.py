@@ -0,0 +1,195 @@
+from array import array
+
+# Rabin-Karp parameters: arithmetic modulo the Mersenne prime 2**61 - 1
+HASH_MODULUS = (1 << 61) - 1
+HASH_BASE = 1000003
+
+
+def intern_lines(lines):
+    # Map every distinct line to a small integer id, in order of first appearance.
+    # Returns the id of each line and the number of times each id occurs.
+    ids = {}
+    line_ids = array('l')
+    id_counts = array('l')
+    for line in lines:
+        line_id = ids.get(line)
+        if line_id is None:
+            line_id = ids[line] = len(id_counts)
+            id_counts.append(0)
+        id_counts[line_id] += 1
+        line_ids.append(line_id)
+    return line_ids, id_counts
+
+
+def find_repeated_windows(lines, length, min_count, eligible=None):
+    """Find every window of `length` consecutive lines that occurs at least `min_count` times.
+
+    Lines are interned to integer ids and windows are compared by a rolling
+    hash over those ids, so no per-window tuple of strings is ever built.
+    Hash matches are verified against the ids to rule out collisions. A line
+    seen fewer than `min_count` times cannot be part of a reported window,
+    so windows containing one are never hashed or stored.
+
+    Returns (first start index, [start indexes]) pairs, 0-based, in order of
+    each window's first occurrence.
+    """
+    if length < 1 or len(lines) < length:
+        return []
+    line_ids, id_counts = intern_lines(lines)
+    candidate = bytearray(
+        id_counts[line_id] >= min_count and (eligible is None or eligible(line))
+        for line_id, line in zip(line_ids, lines)
+    )
+
+    leading_power = pow(HASH_BASE, length - 1, HASH_MODULUS)
+    buckets = {}  # hash -> list of groups sharing it (more than one only on a collision)
+    groups = []   # [first start, starts], in first-occurrence order
+    window_hash = 0
+    run = 0  # number of consecutive candidate lines ending at the current index
+    for index, line_id in enumerate(line_ids):
+        if not candidate[index]:
+            run = 0
+            window_hash = 0
+            continue
+        if run >= length:
+            window_hash = (window_hash - (line_ids[index - length] + 1) * leading_power) % HASH_MODULUS
+        window_hash = (window_hash * HASH_BASE + line_id + 1) % HASH_MODULUS
+        run += 1
+        if run < length:
+            continue
+
+        start = index - length + 1
+        bucket = buckets.get(window_hash)
+        if bucket is None:
+            group = [start, [start]]
+            buckets[window_hash] = [group]
+            groups.append(group)
+            continue
+        for group in bucket:
+            first = group[0]
+            if line_ids[first:first + length] == line_ids[start:start + length]:
+                group[1].append(start)
+                break
+        else:
+            group = [start, [start]]
+            bucket.append(group)
+            groups.append(group)
+
+    return [(first, starts) for first, starts in groups if len(starts) >= min_count]
+
+
+def suffix_array(sequence):
+    # Prefix doubling that only re-sorts groups of suffixes still tied on their first
+    # `step` items (Larsson-Sadakane). A suffix's rank is the start of its group in the
+    # array. Source lines are mostly unique, so most suffixes settle in the first sort.
+    length = len(sequence)
+    suffixes = sorted(range(length), key=sequence.__getitem__)
+    rank = [0] * length
+    groups = []
+    group_start = 0
+    for position in range(1, length + 1):
+        if position == length or sequence[suffixes[position]] != sequence[suffixes[group_start]]:
+            for index in suffixes[group_start:position]:
+                rank[index] = group_start
+            if position - group_start > 1:
+                groups.append((group_start, position))
+            group_start = position
+
+    step = 1
+    while groups:
+        unsettled = []
+        for start, end in groups:
+            members = suffixes[start:end]
+            keys = {index: rank[index + step] if index + step < length else -1 for index in members}
+            members.sort(key=keys.__getitem__)
+            suffixes[start:end] = members
+            group_start = start
+            for position in range(start + 1, end + 1):
+                if position == end or keys[members[position - start]] != keys[members[group_start - start]]:
+                    for index in members[group_start - start:position - start]:
+                        rank[index] = group_start
+                    if position - group_start > 1:
+                        unsettled.append((group_start, position))
+                    group_start = position
+        groups = unsettled
+        step *= 2
+    return suffixes
+
+
+def lcp_array(sequence, suffixes):
+    # Kasai et al.: lcp[i] is the common prefix length of suffixes[i - 1] and suffixes[i]
+    length = len(sequence)
+    rank = [0] * length
+    for position, index in enumerate(suffixes):
+        rank[index] = position
+    lcp = [0] * length
+    common = 0
+    for index in range(length):
+        if rank[index] == 0:
+            common = 0
+            continue
+        other = suffixes[rank[index] - 1]
+        while index + common < length and other + common < length and sequence[index + common] == sequence[other + common]:
+            common += 1
+        lcp[rank[index]] = common
+        if common:
+            common -= 1
+    return lcp
+
+
+def find_maximal_repeats(lines, min_length, min_count, eligible=None):
+    """Find every maximal block of at least `min_length` lines repeated `min_count` or more times.
+
+    A block is reported once, at its full length, instead of as every
+    overlapping fixed-size window inside it. Lines that are not eligible, or
+    that occur fewer than `min_count` times, are replaced by unique ids so no
+    block can span them. Repeats come from the LCP intervals of a suffix
+    array over the interned lines; an interval is kept only when its
+    occurrences are not all preceded by the same line (left-maximal).
+
+    Returns (length, [start indexes]) pairs, 0-based, ordered by first occurrence.
+    """
+    if min_length < 1 or len(lines) < min_length:
+        return []
+    line_ids, id_counts = intern_lines(lines)
+    next_id = len(id_counts)
+    sequence = []
+    for line_id, line in zip(line_ids, lines):
+        if id_counts[line_id] >= min_count and (eligible is None or eligible(line)):
+            sequence.append(line_id)
+        else:
+            sequence.append(next_id)
+            next_id += 1
+
+    suffixes = suffix_array(sequence)
+    lcp = lcp_array(sequence, suffixes)
+    length = len(sequence)
+
+    # changes[k] counts the suffixes up to position k whose preceding line differs
+    # from the previous suffix's, so "all occurrences share a left neighbour" is O(1)
+    def left_of(index):
+        return sequence[index - 1] if index > 0 else -1
+
+    changes = [0] * length
+    for position in range(1, length):
+        previous, current = left_of(suffixes[position - 1]), left_of(suffixes[position])
+        changes[position] = changes[position - 1] + (current == -1 or current != previous)
+
+    repeats = []
+    stack = [(0, 0)]  # (common prefix length, left bound) of the open LCP intervals
+    for position in range(1, length + 1):
+        common = lcp[position] if position < length else 0
+        left_bound = position - 1
+        while common < stack[-1][0]:
+            interval_length, left_bound = stack.pop()
+            right_bound = position - 1
+            occurrences = right_bound - left_bound + 1
+            if interval_length >= min_length and occurrences >= min_count:
+                left_maximal = left_of(suffixes[left_bound]) == -1 or changes[right_bound] != changes[left_bound]
+                if left_maximal:
+                    repeats.append((interval_length, sorted(suffixes[left_bound:right_bound + 1])))
+        if common > stack[-1][0]:
+            stack.append((common, left_bound))
+
+    repeats.sort(key=lambda repeat: (repeat[1][0], -repeat[0]))
+    return repeats
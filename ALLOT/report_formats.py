@@ -0,0 +1,125 @@
+import io
+import json
+import logging
+from pathlib import Path
+
+from findings_collector import RULE_DESCRIPTIONS
+
+SARIF_VERSION = '2.1.0'
+SARIF_SCHEMA = 'https://json.schemastore.org/sarif-2.1.0.json'
+TOOL_NAME = 'ALLOT Script Analyzer'
+SARIF_LEVELS = {'WARNING': 'warning', 'ERROR': 'error', 'CRITICAL': 'error'}
+
+
+def finding_record(path, finding):
+    # One finding as a flat JSON object: what each JSON line holds and what SARIF is built from
+    return {'path': str(path), 'check': finding.check, 'rule': finding.rule, 'line': finding.line,
+            'column': finding.column, 'level': logging.getLevelName(finding.severity), 'message': finding.message}
+
+
+def read_json_lines(path):
+    # Records of a JSON Lines file, one at a time
+    with open(path) as lines:
+        for line in lines:
+            if line.strip():
+                yield json.loads(line)
+
+
+def artifact_uri(path):
+    path = Path(path)
+    return path.as_uri() if path.is_absolute() else path.as_posix()
+
+
+class JsonLinesWriter:
+    """Writes each WARNING or ERROR finding to stream as one JSON object per line, as it is logged.
+
+    add() has the signature ScriptAnalyzer expects of a finding_writer; only
+    the line being written is held in memory. With path given, findings are
+    reported under that name (e.g. an upload's file name) instead of the
+    analyzed file's path.
+    """
+
+    def __init__(self, stream, path=None):
+        self.stream = stream
+        self.path = path
+        self.findings = 0
+
+    def add(self, path, finding):
+        if finding.severity >= logging.WARNING:
+            self.add_record(finding_record(self.path or path, finding))
+
+    def add_record(self, record):
+        self.stream.write(json.dumps(record) + '\n')
+        self.findings += 1
+
+    def close(self):
+        self.stream.flush()
+
+
+class SarifWriter:
+    """Streams a SARIF 2.1.0 log with one run to stream, a result at a time.
+
+    Results are written as findings arrive; the tool section with the rules
+    that were seen and the error messages not tied to a rule (failed checks,
+    cpp errors) follow the results and are written by close(), so memory
+    stays bounded by the number of rules and errors, not of findings. As in
+    JsonLinesWriter, path given here replaces the analyzed file's path in
+    the results, so an upload's server-side location is not reported.
+    """
+
+    def __init__(self, stream, tool_version=None, path=None):
+        self.stream = stream
+        self.tool_version = tool_version
+        self.path = path
+        self.findings = 0
+        self._rules = {}  # rule -> check, in first-seen order
+        self._notifications = []
+        self.stream.write(f'{{"version": "{SARIF_VERSION}", "$schema": "{SARIF_SCHEMA}", "runs": [{{"results": [')
+
+    def add(self, path, finding):
+        if finding.severity >= logging.WARNING:
+            self.add_record(finding_record(self.path or path, finding))
+
+    def add_record(self, record):
+        level = SARIF_LEVELS.get(record['level'], 'warning')
+        if record['rule'] is None:
+            # Not a finding about the script but a check or the analysis failing
+            self._notifications.append({'level': level, 'message': {'text': record['message']},
+                                        'locations': [{'physicalLocation': {'artifactLocation': {'uri': artifact_uri(record['path'])}}}],
+                                        'properties': {'check': record['check']}})
+            return
+        self._rules.setdefault(record['rule'], record['check'])
+        location = {'artifactLocation': {'uri': artifact_uri(record['path'])}}
+        if record['line'] is not None:
+            location['region'] = {'startLine': record['line']}
+            if record['column'] is not None:
+                location['region']['startColumn'] = record['column']
+        result = {'ruleId': record['rule'], 'level': level, 'message': {'text': record['message']},
+                  'locations': [{'physicalLocation': location}], 'properties': {'check': record['check']}}
+        self.stream.write((', ' if self.findings else '') + json.dumps(result))
+        self.findings += 1
+
+    def close(self):
+        driver = {'name': TOOL_NAME,
+                  'rules': [{'id': rule, 'shortDescription': {'text': RULE_DESCRIPTIONS.get(rule, rule)},
+                             'properties': {'check': check}} for rule, check in self._rules.items()]}
+        if self.tool_version is not None:
+            driver['version'] = self.tool_version
+        invocation = {'executionSuccessful': not any(notification['level'] == 'error' for notification in self._notifications),
+                      'toolExecutionNotifications': self._notifications}
+        self.stream.write(f'], "tool": {json.dumps({"driver": driver})}, "invocations": [{json.dumps(invocation)}]}}]}}\n')
+        self.stream.flush()
+
+
+def iter_sarif(records, tool_version=None):
+    # SARIF text of JSON Lines records in chunks, e.g. for a streamed HTTP response
+    buffer = io.StringIO()
+    writer = SarifWriter(buffer, tool_version)
+    for record in records:
+        writer.add_record(record)
+        if buffer.tell() >= 65536:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    writer.close()
+    yield buffer.getvalue()
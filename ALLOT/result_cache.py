@@ -0,0 +1,65 @@
+import threading
+from collections import OrderedDict
+
+RESULT_CACHE_SIZE = 256  # Analyses kept in memory before the least recently used is evicted
+
+
+def result_key(content_hash, fingerprint):
+    # Same bytes analyzed with the same analyzer version and settings give the same findings
+    return f"{content_hash}:{fingerprint}"
+
+
+class CachedAnalysis:
+    """Counts and logged Findings of one analysis, enough to replay it without running the checks."""
+
+    __slots__ = ('counts', 'findings')
+
+    def __init__(self, counts, findings):
+        self.counts = dict(counts)
+        self.findings = tuple(findings)
+
+    def replay(self, analyzer):
+        analyzer.log.extend(self.findings)
+        analyzer.counts.update(self.counts)
+
+
+class ResultCache:
+    """Thread-safe LRU cache of analyses keyed by content hash and analyzer configuration."""
+
+    def __init__(self, max_entries=RESULT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'max_entries': self.max_entries,
+                    'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
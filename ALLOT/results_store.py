@@ -0,0 +1,158 @@
+import sys
+import time
+import logging
+import sqlite3
+import argparse
+import threading
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+class ResultsStore:
+    """SQLite store of analysis runs, their per-check counts and timings, and their findings.
+
+    Each run is written in one transaction. Per-check counts live in their
+    own small table, so ranking files by a check over a time range reads
+    one row per run and check instead of aggregating the findings table.
+    """
+
+    def __init__(self, store_path):
+        self.store_path = str(store_path)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.store_path, check_same_thread=False)
+        self._connection.executescript("""
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY,
+                file_hash TEXT,
+                path TEXT NOT NULL,
+                config_version TEXT NOT NULL,
+                started_at REAL NOT NULL,
+                seconds REAL NOT NULL,
+                cache_hit INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS check_counts (
+                run_id INTEGER NOT NULL,
+                check_name TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                seconds REAL,
+                PRIMARY KEY (run_id, check_name)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS findings (
+                run_id INTEGER NOT NULL,
+                check_name TEXT,
+                rule TEXT,
+                line INTEGER,
+                level TEXT NOT NULL,
+                message TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS runs_by_path ON runs (path, started_at);
+            CREATE INDEX IF NOT EXISTS runs_by_hash ON runs (file_hash);
+            CREATE INDEX IF NOT EXISTS runs_by_time ON runs (started_at);
+            CREATE INDEX IF NOT EXISTS check_counts_by_check ON check_counts (check_name, run_id);
+            CREATE INDEX IF NOT EXISTS findings_by_run ON findings (run_id);
+            CREATE INDEX IF NOT EXISTS findings_by_check ON findings (check_name, run_id);
+        """)
+        # Stores created before findings had rule ids
+        if 'rule' not in [column[1] for column in self._connection.execute("PRAGMA table_info(findings)")]:
+            self._connection.execute("ALTER TABLE findings ADD COLUMN rule TEXT")
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def record_run(self, path, file_hash, config_version, counts, findings, started_at, seconds,
+                   check_seconds=None, cache_hit=False):
+        """Store one run with its counts and its findings (Finding objects); returns the run id.
+
+        Only WARNING and ERROR findings are kept, with their rule id and line
+        number (None for messages not tied to a rule or a line).
+        """
+        check_seconds = check_seconds or {}
+        with self._lock, self._connection:
+            run_id = self._connection.execute(
+                "INSERT INTO runs (file_hash, path, config_version, started_at, seconds, cache_hit) VALUES (?, ?, ?, ?, ?, ?)",
+                (file_hash, str(path), config_version, started_at, seconds, int(cache_hit))).lastrowid
+            self._connection.executemany(
+                "INSERT INTO check_counts (run_id, check_name, count, seconds) VALUES (?, ?, ?, ?)",
+                ((run_id, check, counts.get(check, 0), check_seconds.get(check))
+                 for check in dict.fromkeys([*counts, *check_seconds])))
+            self._connection.executemany(
+                "INSERT INTO findings (run_id, check_name, rule, line, level, message) VALUES (?, ?, ?, ?, ?, ?)",
+                ((run_id, finding.check, finding.rule, finding.line, logging.getLevelName(finding.severity), finding.message)
+                 for finding in findings if finding.severity >= logging.WARNING))
+        return run_id
+
+    def top_files(self, check, since, limit=10):
+        # (path, count) of the files with the most `check` issues in their latest run since `since`
+        with self._lock:
+            return self._connection.execute("""
+                SELECT runs.path, check_counts.count
+                FROM (SELECT MAX(id) AS run_id FROM runs WHERE started_at >= ? GROUP BY path) AS latest
+                JOIN runs ON runs.id = latest.run_id
+                JOIN check_counts ON check_counts.run_id = latest.run_id AND check_counts.check_name = ?
+                WHERE check_counts.count > 0
+                ORDER BY check_counts.count DESC, runs.path
+                LIMIT ?
+            """, (since, check, limit)).fetchall()
+
+    def check_timings(self, since):
+        # (check, runs, average seconds, slowest seconds) over the runs since `since` that ran the checks.
+        # CROSS JOIN keeps SQLite on the time index instead of scanning every check_counts row.
+        with self._lock:
+            return self._connection.execute("""
+                SELECT check_counts.check_name, COUNT(*), AVG(check_counts.seconds), MAX(check_counts.seconds)
+                FROM runs CROSS JOIN check_counts ON check_counts.run_id = runs.id
+                WHERE runs.started_at >= ? AND check_counts.seconds IS NOT NULL
+                GROUP BY check_counts.check_name
+                ORDER BY AVG(check_counts.seconds) DESC
+            """, (since,)).fetchall()
+
+    def runs_of(self, path, limit=20):
+        # (run id, started at, seconds, cache hit) of the latest runs of one file
+        with self._lock:
+            return self._connection.execute(
+                "SELECT id, started_at, seconds, cache_hit FROM runs WHERE path = ? ORDER BY started_at DESC LIMIT ?",
+                (str(path), limit)).fetchall()
+
+    def findings_of(self, run_id, check=None):
+        # (check, rule, line, level, message) of one run, optionally for a single check
+        query = "SELECT check_name, rule, line, level, message FROM findings WHERE run_id = ?"
+        parameters = [run_id]
+        if check is not None:
+            query += " AND check_name = ?"
+            parameters.append(check)
+        with self._lock:
+            return self._connection.execute(query + " ORDER BY rowid", parameters).fetchall()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the analysis results store.")
+    parser.add_argument('--store', default='results.db', help="SQLite file holding the results")
+    commands = parser.add_subparsers(dest='command', required=True)
+    top = commands.add_parser('top', help="files with the most issues of one check")
+    top.add_argument('check')
+    top.add_argument('--days', type=float, default=7)
+    top.add_argument('--limit', type=int, default=10)
+    timings = commands.add_parser('timings', help="average and slowest time of each check")
+    timings.add_argument('--days', type=float, default=7)
+    args = parser.parse_args(argv)
+
+    since = time.time() - args.days * SECONDS_PER_DAY
+    with ResultsStore(args.store) as store:
+        if args.command == 'top':
+            for path, count in store.top_files(args.check, since, args.limit):
+                print(f"{count:8d}  {path}")
+        else:
+            for check, runs, average, slowest in store.check_timings(since):
+                print(f"{check.ljust(25)} {runs:6d} runs  avg {average * 1000:8.2f} ms  max {slowest * 1000:8.2f} ms")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
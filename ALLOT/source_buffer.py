@@ -0,0 +1,114 @@
+import locale
+from pathlib import Path
+
+
+class SourceBuffer:
+    """Read-only view of a script, read from disk once and shared by every check.
+
+    Text, line offsets and line views are built lazily and cached. Decoding
+    mirrors open(path, "r") (locale encoding, strict errors, universal
+    newlines) so the checks see the same lines readlines() gave them.
+    """
+
+    __slots__ = ('_path', '_raw', '_encoding', '_text', '_line_offsets',
+                 '_lines', '_stripped_lines', '_raw_lines')
+
+    def __init__(self, raw, path=None, encoding=None):
+        self._path = Path(path) if path is not None else None
+        self._raw = bytes(raw)
+        self._encoding = encoding or locale.getpreferredencoding(False)
+        self._text = None
+        self._line_offsets = None
+        self._lines = None
+        self._stripped_lines = None
+        self._raw_lines = None
+
+    def __setattr__(self, name, value):
+        if not name.startswith('_'):
+            raise AttributeError(f"SourceBuffer is read-only: cannot set '{name}'")
+        object.__setattr__(self, name, value)
+
+    @classmethod
+    def from_path(cls, path, encoding=None):
+        # The only place the script is opened; raises FileNotFoundError as open() does
+        with open(path, 'rb') as script_file:
+            return cls(script_file.read(), path=path, encoding=encoding)
+
+    @property
+    def path(self):
+        return self._path
+
+    @property
+    def raw(self):
+        return self._raw
+
+    @property
+    def encoding(self):
+        return self._encoding
+
+    @property
+    def text(self):
+        # Raises UnicodeDecodeError on every access for badly encoded files,
+        # so each check keeps reporting its own decode error as before
+        if self._text is None:
+            text = self._raw.decode(self._encoding)
+            if '\r' in text:
+                text = text.replace('\r\n', '\n').replace('\r', '\n')
+            self._text = text
+        return self._text
+
+    @property
+    def line_offsets(self):
+        # Start offset of every line in self.text, found without slicing the lines out
+        if self._line_offsets is None:
+            text = self.text
+            offsets = [0] if text else []
+            position = text.find('\n')
+            while position != -1 and position + 1 < len(text):
+                offsets.append(position + 1)
+                position = text.find('\n', position + 1)
+            self._line_offsets = tuple(offsets)
+        return self._line_offsets
+
+    @property
+    def lines(self):
+        # Same result as readlines() in text mode: split on '\n' only, line endings kept
+        if self._lines is None:
+            parts = self.text.split('\n')
+            lines = [part + '\n' for part in parts[:-1]]
+            if parts[-1]:
+                lines.append(parts[-1])
+            self._lines = tuple(lines)
+        return self._lines
+
+    @property
+    def stripped_lines(self):
+        if self._stripped_lines is None:
+            self._stripped_lines = tuple(line.strip() for line in self.lines)
+        return self._stripped_lines
+
+    @property
+    def raw_lines(self):
+        # Same result as iterating a file opened in 'rb' mode
+        if self._raw_lines is None:
+            parts = self._raw.split(b'\n')
+            raw_lines = [part + b'\n' for part in parts[:-1]]
+            if parts[-1]:
+                raw_lines.append(parts[-1])
+            self._raw_lines = tuple(raw_lines)
+        return self._raw_lines
+
+    def line_endings(self):
+        # Kinds of line ending in the raw bytes, 'CRLF' and/or 'LF', which text and lines normalize away
+        crlf = self._raw.count(b'\r\n')
+        return {ending for ending, count in (('CRLF', crlf), ('LF', self._raw.count(b'\n') - crlf)) if count}
+
+    def line(self, line_number):
+        # Single 1-based line sliced from the text without building the full line list
+        offsets = self.line_offsets
+        start = offsets[line_number - 1]
+        end = offsets[line_number] if line_number < len(offsets) else len(self.text)
+        return self.text[start:end]
+
+    def __len__(self):
+        return len(self.lines)
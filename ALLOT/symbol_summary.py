@@ -0,0 +1,184 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+try:
+    from pycparser import c_parser
+except ImportError:  # Optional: only the AST-based checks need it
+    c_parser = None
+
+SUMMARY_CACHE_SIZE = 256  # Symbol summaries kept in memory, keyed by the hash of the preprocessed text
+
+# Declarator node class -> symbol kind
+DECLARATOR_KINDS = {'TypeDecl': 'variable', 'PtrDecl': 'pointer', 'ArrayDecl': 'array', 'FuncDecl': 'function_declaration',
+                    'Struct': 'struct', 'Union': 'union', 'Enum': 'enum'}
+
+# kind: 'function' for a definition, otherwise a DECLARATOR_KINDS value; scope: '' at file scope, else the
+# enclosing function, prototype and struct names joined by '::', with '<anonymous struct>' or '<anonymous union>'
+# for an unnamed aggregate; line: None when pycparser has no coordinate
+Symbol = namedtuple('Symbol', 'kind scope name line')
+
+
+class SymbolSummary:
+    """Declarations of one translation unit, in the order an AST visitor would meet them.
+
+    Function definitions appear as 'function' symbols followed by the
+    declarations in their bodies; their own declarators and parameters are
+    not repeated. This is all the naming checks read from the AST, and it
+    pickles to a small fraction of the tree's size.
+    """
+
+    __slots__ = ('symbols',)
+
+    def __init__(self, symbols):
+        self.symbols = tuple(symbols)
+
+    def __reduce__(self):
+        return SymbolSummary, (self.symbols,)
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def __iter__(self):
+        return iter(self.symbols)
+
+    def at_file_scope(self):
+        return [symbol for symbol in self.symbols if symbol.scope == '' and symbol.kind != 'function']
+
+    def module_prefix(self):
+        # The last file-scope declaration named MODULE_*, as the naming visitors pick it
+        prefix = None
+        for symbol in self.at_file_scope():
+            if symbol.name and symbol.name.startswith('MODULE_'):
+                prefix = symbol.name
+        return prefix
+
+
+def declarator_name(node):
+    # Name declared by a (possibly nested) declarator, e.g. 'f' for the FuncDecl of 'int *f(void)'
+    while node is not None and type(node).__name__ != 'TypeDecl':
+        node = getattr(node, 'type', None)
+    return node.declname if node is not None else None
+
+
+def nested_scope(scope, name):
+    return f"{scope}::{name}" if scope else name
+
+
+def collect_symbols(ast):
+    symbols = []
+
+    def visit(node, scope):
+        node_type = type(node).__name__
+        if node_type == 'FuncDef':
+            name = node.decl.name
+            symbols.append(Symbol('function', scope, name, node.decl.coord.line if node.decl.coord else None))
+            visit(node.body, nested_scope(scope, name))
+            return
+        if node_type == 'FuncDecl':
+            # Parameters of a prototype belong to the function, not to the enclosing scope
+            if node.args is not None:
+                visit(node.args, nested_scope(scope, declarator_name(node.type)))
+            visit(node.type, scope)
+            return
+        if node_type == 'Decl':
+            kind = DECLARATOR_KINDS.get(type(node.type).__name__)
+            if kind is not None:
+                symbols.append(Symbol(kind, scope, node.name, node.coord.line if node.coord else None))
+        elif node_type in ('Struct', 'Union') and node.decls is not None:
+            # Members of an unnamed struct or union are not file-scope declarations either
+            scope = nested_scope(scope, node.name or f"<anonymous {node_type.lower()}>")
+        for _, child in node.children():
+            visit(child, scope)
+
+    visit(ast, '')
+    return SymbolSummary(symbols)
+
+
+_worker_parser = None
+
+
+def _start_worker():
+    # Runs once per pool process so every parse reuses the imported pycparser and its parser tables
+    global _worker_parser
+    _worker_parser = c_parser.CParser()
+
+
+def require_pycparser():
+    if c_parser is None:
+        raise RuntimeError("pycparser is required for AST-based checks (pip install pycparser)")
+
+
+def summarize_text(text, filename=''):
+    # In-process parse, for a one-off file where starting a ParserPool would cost more than it saves
+    require_pycparser()
+    parser = _worker_parser or c_parser.CParser()
+    return collect_symbols(parser.parse(text, filename))
+
+
+class ParserPool:
+    """Warm pycparser worker processes that turn preprocessed text into symbol summaries.
+
+    Summaries are cached by the SHA-256 of the text, so analysing the same
+    script again skips parsing entirely. A text already being parsed is not
+    submitted twice: later callers share the pending future.
+    """
+
+    def __init__(self, max_workers=None, max_entries=SUMMARY_CACHE_SIZE):
+        require_pycparser()
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_entries = max_entries
+        self.parses = 0
+        self.hits = 0
+        self._futures = OrderedDict()  # text hash -> Future of its SymbolSummary
+        self._lock = threading.Lock()
+        self._executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_start_worker)
+
+    def submit(self, text, filename=''):
+        key = hashlib.sha256(text.encode('utf-8', 'surrogatepass')).hexdigest()
+        with self._lock:
+            future = self._futures.get(key)
+            if future is not None:
+                self._futures.move_to_end(key)
+                self.hits += 1
+                return future
+            self.parses += 1
+            future = self._executor.submit(summarize_text, text, filename)
+            self._futures[key] = future
+            while len(self._futures) > self.max_entries:
+                self._futures.popitem(last=False)
+        future.add_done_callback(partial(self._forget_failed, key))
+        return future
+
+    def _forget_failed(self, key, future):
+        # Failed parses are not cached, so the next request for the text gets a fresh attempt
+        if not future.cancelled() and future.exception() is None:
+            return
+        with self._lock:
+            if self._futures.get(key) is future:
+                del self._futures[key]
+
+    def summarize(self, text, filename=''):
+        return self.submit(text, filename).result()
+
+    def summarize_many(self, items):
+        # items: (text, filename) pairs, parsed in parallel; summaries come back in the same order
+        futures = [self.submit(text, filename) for text, filename in items]
+        return [future.result() for future in futures]
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._futures), 'workers': self.max_workers, 'parses': self.parses, 'hits': self.hits}
+
+    def close(self):
+        self._executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
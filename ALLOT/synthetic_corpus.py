@@ -0,0 +1,347 @@
+import io
+import os
+import sys
+import json
+import random
+import argparse
+from contextlib import redirect_stdout
+from collections import Counter, namedtuple
+
+import Script_Analyzer
+from Script_Analyzer import EXPECTED_LINE_COUNT, MODULES_ALL, REPETITION_THRESHOLD, SEQUENCE_LENGTH
+from line_rules import CONTROL_STRUCTURES
+
+# Letters of the unique name suffixes; without 'd' and 'w' no name can contain "do" or "while",
+# which the indentation check treats as loop keywords wherever they appear in a line
+SUFFIX_LETTERS = 'abcefghijklmnopqrstuvxyz'
+WORDS = ['count', 'total', 'index', 'limit', 'value', 'buffer', 'status', 'offset', 'length', 'result',
+         'state', 'sample', 'timer', 'event', 'score', 'level', 'range', 'flag', 'slot', 'peer']
+IDENTIFIER_STYLES = ('snake', 'camel', 'hungarian')
+CORPUS_MANIFEST = 'expected.json'
+
+# lines: lines per translation unit (a unit ends after the function that reaches it);
+# nesting_depth: deepest if-block in a function; tab_rate: indented lines using tabs instead of spaces;
+# crlf_rate: lines ending in CRLF instead of LF; duplicate_density: share of the lines that are copies of a
+# repeated block of duplicate_length lines, each block appearing duplicate_copies times;
+# identifier_style: 'snake', 'camel' or 'hungarian' (p/g_/m_ prefixes); module_prefix_rate: statements
+# calling '<module>::' of MODULES_ALL; inline_brace_rate: statements with a '{' not ending the line;
+# header_rate: share of the files of a tree that are headers (include guard instead of an #include);
+# same_line_brace_rate: functions whose '{' ends the line with their '(', e.g. 'int f(int x) {';
+# pattern_rate: statements holding the regex string "\\ss+", which the excess whitespace check reports
+CorpusProfile = namedtuple('CorpusProfile', 'lines nesting_depth tab_rate crlf_rate duplicate_density duplicate_length '
+                           'duplicate_copies identifier_style module_prefix_rate inline_brace_rate header_rate '
+                           'same_line_brace_rate pattern_rate',
+                           defaults=(2000, 3, 0.05, 0.01, 0.05, 5, 3, 'snake', 0.05, 0.02, 0.2, 0.1, 0.02))
+
+# text: the unit's bytes; lines: its line count; counts: what ScriptAnalyzer reports for it with default
+# settings; maximal_modularization: its modularization_check count with repetition_mode='maximal'
+SyntheticUnit = namedtuple('SyntheticUnit', 'name text lines counts maximal_modularization')
+
+
+def suffix(number):
+    # Unique letters-only suffix: digits would stop the constant and pointer rules from matching
+    letters = ''
+    while True:
+        number, remainder = divmod(number, len(SUFFIX_LETTERS))
+        letters = SUFFIX_LETTERS[remainder] + letters
+        if number == 0:
+            return letters
+        number -= 1
+
+
+class _UnitWriter:
+    """Lines of one translation unit with the count each line adds to every check.
+
+    Every generated construct knows what it adds: a tab in the indentation
+    or a '{' not ending the line is one indentation finding, a statement
+    starting with '<module>::' or 'g_', a pointer not starting with 'p', a
+    '#define' of an upper-case constant with a value and a class header are
+    one naming finding each, and a "\\ss+" pattern string is one excess
+    whitespace finding. Every line that may repeat is a single character or
+    blank, so only the planted blocks count as repetitions.
+
+    A function header holding both '(' and '{' starts the indentation
+    check's function-body tracking. The first one of a unit opens an
+    if-block on its own line too and plants a statement at column 0 in it,
+    one indentation finding. Closing that block drives the tracked level
+    below zero, where it stays for the rest of the file, so later
+    same-line functions add nothing.
+    """
+
+    def __init__(self, profile, rng):
+        self.profile = profile
+        self.rng = rng
+        self.lines = []
+        self.counts = Counter()
+        self.names = 0
+        self.tracking_started = False  # Whether a same-line function has started the function-body tracking
+
+    def name(self, word=None, kind='local'):
+        word = word or self.rng.choice(WORDS)
+        unique = suffix(self.names)
+        self.names += 1
+        style = self.profile.identifier_style
+        if style == 'camel':
+            name = f"{word}{unique.capitalize()}"
+            return name[0].upper() + name[1:] if kind == 'type' else name
+        if kind == 'type':
+            return f"{word.capitalize()}_{unique}"
+        if style == 'hungarian':
+            prefix = {'pointer': 'p', 'global': 'g_', 'member': 'm_'}.get(kind, '')
+            return f"{prefix}{word}_{unique}" if prefix != 'p' else f"p{word.capitalize()}_{unique}"
+        return f"{word}_{unique}"
+
+    def indent(self, depth):
+        if depth and self.rng.random() < self.profile.tab_rate:
+            return '\t' * depth
+        return '    ' * depth
+
+    def add(self, depth, text, comment=False, **counts):
+        line = self.indent(depth) + text if text else ''
+        if '\t' in line and not comment:
+            counts['indentation_check'] = counts.get('indentation_check', 0) + 1
+        self.lines.append(line)
+        self.counts.update(counts)
+
+    def add_block(self, lines, counts):
+        self.lines.extend(lines)
+        self.counts.update(counts)
+
+    def statement(self, depth, variables, globals_):
+        # One unique statement line of a function body
+        profile = self.profile
+        roll = self.rng.random()
+        value = self.rng.choice(variables)
+        if roll < profile.module_prefix_rate:
+            module = self.rng.choice(MODULES_ALL)
+            self.add(depth, f"{module}::{self.name('notify').replace('notify', 'Notify', 1)}({value});",
+                     naming_conventions_check=1)
+        elif roll < profile.module_prefix_rate + profile.inline_brace_rate:
+            self.add(depth, f"int {self.name('table')}[] = {{{value}, 2, 3}};", indentation_check=1)
+        elif roll < profile.module_prefix_rate + profile.inline_brace_rate + 0.05 and globals_:
+            # Assignment to a global: reported when its name starts with 'g_'
+            target = self.rng.choice(globals_)
+            self.add(depth, f"{target} = {value} + {self.rng.randint(1, 99)}; // {self.name('note')}",
+                     naming_conventions_check=1 if target.startswith('g_') else 0)
+        elif roll < profile.module_prefix_rate + profile.inline_brace_rate + 0.10:
+            pointer = self.name(kind='pointer')
+            self.add(depth, f"int *{pointer} = &{value};",
+                     naming_conventions_check=0 if pointer.startswith('p') else 1)
+        elif roll < profile.module_prefix_rate + profile.inline_brace_rate + 0.15:
+            self.add(depth, f"// {self.name('step')} of the computation", comment=True)
+        elif roll < profile.module_prefix_rate + profile.inline_brace_rate + 0.15 + profile.pattern_rate:
+            # The C string "\\ss+" holds a backslash followed by 'ss', which is what the excess whitespace pattern matches
+            pointer = self.name('pattern', kind='pointer')
+            self.add(depth, f'const char *{pointer} = "\\\\ss+";', excess_whitespace_check=1,
+                     naming_conventions_check=0 if pointer.startswith('p') else 1)
+        else:
+            variable = self.name()
+            self.add(depth, f"int {variable} = {value} + {self.rng.randint(1, 99)};")
+            variables.append(variable)
+
+    def if_block(self, depth, variables, globals_, max_depth, budget):
+        self.add(depth, f"if ({self.rng.choice(variables)} > {self.rng.randint(0, 99)})")
+        self.add(depth, "{")
+        for _ in range(max(1, budget)):
+            if depth < max_depth and self.rng.random() < 0.2:
+                self.if_block(depth + 1, list(variables), globals_, max_depth, budget // 2)
+            else:
+                self.statement(depth + 1, list(variables), globals_)
+        self.add(depth, "}")
+
+    def plain_name(self, word):
+        # A name without a control keyword in it, so the tracked lines match only their own keyword
+        while True:
+            name = self.name(word)
+            if not any(keyword in name for keyword in CONTROL_STRUCTURES):
+                return name
+
+    def tracking_probe(self, parameter):
+        # First same-line function of the unit: one if-block opened on its line, holding a statement at
+        # column 0 while the tracked level is 1; the block's '}' then sends the level below zero
+        self.add_block([f"    if ({parameter} > {self.rng.randint(0, 99)}) {{",
+                        f"{parameter} = {self.rng.randint(0, 99)};",
+                        "    }"], {'indentation_check': 1})
+        self.tracking_started = True
+
+
+def _duplicate_block(writer, block_number):
+    # Distinct, repetition-eligible statement lines at depth 1, identical in every copy
+    lines = []
+    counts = Counter()
+    for _ in range(writer.profile.duplicate_length):
+        line = f"{writer.indent(1)}{writer.name('audit')} += {block_number + 1};"
+        if '\t' in line:
+            counts['indentation_check'] += 1
+        lines.append(line)
+    return lines, counts
+
+
+def mixed_indentation(lines):
+    # Indented lines whose indentation starts with the other character than the unit's first indented line;
+    # the generator indents a line with tabs only or spaces only
+    styles = [line[0] for line in lines if line[:1] in ('\t', ' ')]
+    return sum(1 for style in styles[1:] if style != styles[0])
+
+
+def generate_unit(name, profile=CorpusProfile(), seed=0, header=False):
+    """One translation unit (or header) and the counts ScriptAnalyzer is expected to report for it."""
+    rng = random.Random(f"{seed}:{name}")
+    writer = _UnitWriter(profile, rng)
+    writer.add(0, f"// {name}: synthetic unit, seed {seed}", comment=True)
+    writer.add(0, "")
+    if header:
+        guard = f"GEN_{writer.name('unit').upper()}_H"
+        writer.add(0, f"#ifndef {guard}")
+        writer.add(0, f"#define {guard}")
+    else:
+        for include in ('<stdio.h>', '<stdlib.h>', '"gen_common.h"'):
+            writer.add(0, f"#include {include}")
+    writer.add(0, "")
+
+    for _ in range(3):
+        constant = writer.name('limit').upper() if profile.identifier_style != 'camel' else f"k{writer.name('limit').capitalize()}"
+        # The naming check reports upper-case constants that have a value
+        writer.add(0, f"#define {constant} {rng.randint(1, 999)}",
+                   naming_conventions_check=1 if constant.isupper() else 0)
+    globals_ = [writer.name(kind='global') for _ in range(3)]
+    for global_name in globals_:
+        writer.add(0, f"int {global_name} = 0;")
+    writer.add(0, "")
+
+    block_count = round(profile.lines * profile.duplicate_density / (profile.duplicate_length * profile.duplicate_copies)) \
+        if profile.duplicate_length >= SEQUENCE_LENGTH else 0
+    pending_copies = []
+    for block_number in range(block_count):
+        pending_copies.extend([_duplicate_block(writer, block_number)] * profile.duplicate_copies)
+    rng.shuffle(pending_copies)
+
+    functions = 0
+    while len(writer.lines) < profile.lines or pending_copies:
+        if functions % 10 == 0:
+            # The naming check reports every class header without a second word after the name
+            writer.add(0, f"class {writer.name('widget', 'type')}", naming_conventions_check=1)
+            writer.add(0, "{")
+            writer.add(0, "public:")
+            writer.add(1, f"int {writer.name('value', 'member')};")
+            writer.add(0, "};")
+            writer.add(0, "")
+        functions += 1
+        same_line = rng.random() < profile.same_line_brace_rate
+        parameter = writer.plain_name('input') if same_line and not writer.tracking_started else writer.name('input')
+        if same_line:
+            writer.add(0, f"int {writer.name('compute')}(int {parameter}) {{")
+            if not writer.tracking_started:
+                writer.tracking_probe(parameter)
+        else:
+            writer.add(0, f"int {writer.name('compute')}(int {parameter})")
+            writer.add(0, "{")
+        variables = [parameter]
+        for _ in range(rng.randint(3, 12)):
+            if pending_copies and rng.random() < 0.3:
+                # Unique lines around every copy keep windows that cross its edges from repeating
+                writer.statement(1, variables, globals_)
+                writer.add_block(*pending_copies.pop())
+                writer.add(1, f"int {writer.name()} = {parameter};")
+            elif profile.nesting_depth and rng.random() < 0.25:
+                writer.if_block(1, variables, globals_, profile.nesting_depth, rng.randint(1, 6))
+            else:
+                writer.statement(1, variables, globals_)
+        writer.add(1, f"return {rng.choice(variables)};")
+        writer.add(0, "}")
+        writer.add(0, "")
+    if header:
+        writer.add(0, "#endif")
+
+    line_count = len(writer.lines)
+    endings = ['\r\n' if rng.random() < profile.crlf_rate else '\n' for _ in writer.lines]
+    counts = {
+        'total_lines_check': 1 if line_count > EXPECTED_LINE_COUNT else 0,
+        'indentation_check': writer.counts['indentation_check'],
+        'naming_conventions_check': writer.counts['naming_conventions_check'],
+        # Every window of SEQUENCE_LENGTH lines inside a block is reported once
+        'modularization_check': block_count * (profile.duplicate_length - SEQUENCE_LENGTH + 1)
+        if profile.duplicate_copies >= REPETITION_THRESHOLD else 0,
+        'consistency_check': mixed_indentation(writer.lines) + (1 if len(set(endings)) > 1 else 0),
+        'excess_whitespace_check': writer.counts['excess_whitespace_check'],
+        'file_encoding_check': 0,
+    }
+    if header:
+        counts['include_directive_check'] = 1
+    maximal = block_count if profile.duplicate_copies >= REPETITION_THRESHOLD else 0
+    text = ''.join(line + ending for line, ending in zip(writer.lines, endings))
+    return SyntheticUnit(name, text.encode('utf-8'), line_count, counts, maximal)
+
+
+def write_tree(root, files, profile=CorpusProfile(), seed=0, folders=4):
+    """Write `files` units under root in up to `folders` module folders, plus a manifest of their expected counts."""
+    rng = random.Random(seed)
+    manifest = {'seed': seed, 'profile': profile._asdict(), 'files': {}}
+    for number in range(files):
+        header = rng.random() < profile.header_rate
+        folder = f"module_{suffix(number % folders)}"
+        relative_path = f"{folder}/unit_{suffix(number)}.{'h' if header else 'cpp'}"
+        unit = generate_unit(relative_path, profile, seed, header)
+        os.makedirs(os.path.join(root, folder), exist_ok=True)
+        with open(os.path.join(root, relative_path), 'wb') as unit_file:
+            unit_file.write(unit.text)
+        manifest['files'][relative_path] = {'lines': unit.lines, 'counts': unit.counts,
+                                            'maximal_modularization': unit.maximal_modularization}
+    with open(os.path.join(root, CORPUS_MANIFEST), 'w') as manifest_file:
+        json.dump(manifest, manifest_file, indent=1)
+    return manifest
+
+
+def verify_tree(root, log_dir, repetition_mode=None):
+    """Analyze every file of a written tree; returns (path, expected counts, actual counts) of the mismatches."""
+    with open(os.path.join(root, CORPUS_MANIFEST)) as manifest_file:
+        manifest = json.load(manifest_file)
+    mismatches = []
+    for relative_path, expected in manifest['files'].items():
+        analyzer = Script_Analyzer.ScriptAnalyzer(os.path.join(root, relative_path), None, None, None,
+                                                  repetition_mode=repetition_mode, log_folder=log_dir, send_report=False)
+        analyzer.run_analysis()
+        counts = dict(expected['counts'])
+        if repetition_mode == 'maximal':
+            counts['modularization_check'] = expected['maximal_modularization']
+        if analyzer.counts != counts:
+            mismatches.append((relative_path, counts, dict(analyzer.counts)))
+    return mismatches
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a seeded synthetic C/C++ tree with the counts each file should get.")
+    parser.add_argument('root')
+    parser.add_argument('--files', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--folders', type=int, default=4)
+    for field, default in CorpusProfile._field_defaults.items():
+        option = '--' + field.replace('_', '-')
+        if field == 'identifier_style':
+            parser.add_argument(option, choices=IDENTIFIER_STYLES, default=default)
+        else:
+            parser.add_argument(option, type=type(default), default=default)
+    parser.add_argument('--verify', action='store_true',
+                        help="analyze the tree in both repetition modes and compare with the expected counts")
+    args = parser.parse_args(argv)
+
+    profile = CorpusProfile(**{field: getattr(args, field) for field in CorpusProfile._fields})
+    manifest = write_tree(args.root, args.files, profile, args.seed, args.folders)
+    lines = sum(entry['lines'] for entry in manifest['files'].values())
+    print(f"Wrote {len(manifest['files'])} files, {lines:,} lines, to {args.root}")
+    if not args.verify:
+        return 0
+    failed = False
+    for repetition_mode in ('window', 'maximal'):
+        # The analyzer's progress prints would bury the mismatches
+        with redirect_stdout(io.StringIO()):
+            mismatches = verify_tree(args.root, os.path.join(args.root, 'Logs'), repetition_mode)
+        for relative_path, expected, actual in mismatches:
+            print(f"{relative_path} ({repetition_mode}): expected {expected}, got {actual}")
+        print(f"{repetition_mode}: {len(manifest['files']) - len(mismatches)} of {len(manifest['files'])} files match their expected counts")
+        failed = failed or bool(mismatches)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -10,7 +10,12 @@ from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.mime.base import MIMEBase
 from email import encoders
-from pycparser import c_ast, parse_file
+
+# Shared analyzer helpers (preprocessor, symbol_summary) from the ALLOT package (pip install -e . at the repository root)
+from preprocessor import PreprocessError, default_preprocessor
+from symbol_summary import summarize_text
+from mail_transport import default_transport
+from outbox import Outbox, is_permanent
 
 # Set global configuration values
 SENDER_EMAIL = 'vaishnavi.m@thinkpalm.com'
@@ -18,6 +23,7 @@ SENDER_PASSWORD = 'Malu$123'
 RECIPIENT_EMAIL = 'manu.m@thinkpalm.com'
 SMTP_SERVER = 'smtp-mail.outlook.com'
 SMTP_PORT = 587
+OUTBOX_DIR = Path(__file__).resolve().parent / 'Outbox'  # Report emails that could not be sent, retried by the next run
 
 # Set global indentation, line count and iteration values
 INDENTATION_SPACES = 4
@@ -151,43 +157,29 @@ class ScriptAnalyzer:
     def check_naming_conventions(self):
         try:
             processed_script = self.preprocess_cpp_file()
-            ast = parse_file(processed_script)
-
-            class NamingConventionVisitor(c_ast.NodeVisitor):
-                def __init__(self):
-                    self.module_prefix = None
-
-                def visit_FileAST(self, node):
-                    if node.ext:
-                        for ext in node.ext:
-                            if isinstance(ext, c_ast.Decl):
-                                if ext.name and ext.name.startswith('MODULE_'):
-                                    self.module_prefix = ext.name
-                        self.generic_visit(node)
-
-                def visit_FuncDef(self, node):
-                    if not node.decl.name[0].islower():
-                        logging.warning(f"Function {node.decl.name} does not start with a lowercase letter")
-                    self.visit(node.body)
-
-                def visit_Decl(self, node):
-                    if isinstance(node.type, c_ast.TypeDecl):
-                        if node.name.islower():
-                            logging.warning(f"Variable {node.name} does not start with an uppercase letter")
-                        elif node.name.upper() == node.name:
-                            logging.warning(f"Constant {node.name} should not be all uppercase")
-                        elif self.module_prefix and not node.name.startswith(self.module_prefix):
-                            logging.warning(f"Symbol {node.name} should have a prefix '{self.module_prefix}'")
-                    elif isinstance(node.type, c_ast.PtrDecl):
-                        if not node.name.startswith('p_'):
-                            logging.warning(f"Pointer variable {node.name} should start with 'p_'")
-                    elif isinstance(node.type, c_ast.Struct):
-                        if not node.name[0].isupper():
-                            logging.warning(f"Type/Class {node.name} does not start with an uppercase letter")
-                    self.generic_visit(node)
-
-            v = NamingConventionVisitor()
-            v.visit(ast)
+            if processed_script is None:
+                raise RuntimeError(f"Preprocessing failed for {self.script_path}")
+            # One script per run: parsed in this process into a symbol summary, no worker pool to start
+            summary = summarize_text(processed_script, str(self.script_path))
+            module_prefix = summary.module_prefix()
+
+            for symbol in summary:
+                if symbol.kind == 'function':
+                    if not symbol.name[0].islower():
+                        logging.warning(f"Function {symbol.name} does not start with a lowercase letter")
+                elif symbol.kind == 'variable':
+                    if symbol.name.islower():
+                        logging.warning(f"Variable {symbol.name} does not start with an uppercase letter")
+                    elif symbol.name.upper() == symbol.name:
+                        logging.warning(f"Constant {symbol.name} should not be all uppercase")
+                    elif module_prefix and not symbol.name.startswith(module_prefix):
+                        logging.warning(f"Symbol {symbol.name} should have a prefix '{module_prefix}'")
+                elif symbol.kind == 'pointer':
+                    if not symbol.name.startswith('p_'):
+                        logging.warning(f"Pointer variable {symbol.name} should start with 'p_'")
+                elif symbol.kind == 'struct':
+                    if not symbol.name[0].isupper():
+                        logging.warning(f"Type/Class {symbol.name} does not start with an uppercase letter")
 
         except FileNotFoundError:
             logging.error(f"File not found: {self.script_path}")
@@ -195,18 +187,19 @@ class ScriptAnalyzer:
             logging.error(f"Error during naming conventions check: {str(e)}")
 
     def preprocess_cpp_file(self):
-        processed_file_path = self.script_path.parent / f"{self.script_path.stem}_processed.cpp"
+        # cpp output is read from a pipe and cached by content, so no *_processed.cpp is written
         try:
-            command = ['cpp', '-o', str(processed_file_path), str(self.script_path)]
-            result = subprocess.run(command, check=True, capture_output=True, text=True)
-        except subprocess.CalledProcessError as e:
+            with open(self.script_path, 'rb') as script_file:
+                raw = script_file.read()
+            return default_preprocessor.preprocess(self.script_path, raw)
+        except PreprocessError as e:
             logging.error(f"Error during preprocessing: {e}")
             if e.stderr:
                 logging.error(f"cpp error: {e.stderr}")
         except Exception as e:
             logging.error(f"Error during preprocessing: {str(e)}")
 
-        return processed_file_path
+        return None
 
     def check_modularization(self):
         try:
@@ -325,6 +318,29 @@ class ScriptAnalyzer:
         except Exception as e:
             logging.error(f"Error checking memory leaks: {str(e)}")
 
+def spool_email(sender_email, sender_password, recipient_email, message_text):
+    # Keeps an email that could not be sent in the outbox, so the next run sends it
+    try:
+        outbox = Outbox(OUTBOX_DIR, start_sender=False)
+        outbox.send(SMTP_SERVER, SMTP_PORT, sender_email, sender_password, recipient_email, message_text)
+        print(f"Email queued in {OUTBOX_DIR}; {len(outbox.pending())} email(s) waiting to be sent")
+    except OSError as e:
+        print(f"Could not queue the email: {e}")
+        logging.error(f"Error occurred while queuing email: {e}")
+
+def send_waiting_emails(sender_email, sender_password):
+    # Sends what earlier runs left in the outbox, now that the server is reachable
+    if not (OUTBOX_DIR / 'queue').is_dir():
+        return
+    try:
+        outbox = Outbox(OUTBOX_DIR, passwords={sender_email: sender_password}, start_sender=False)
+        sent = outbox.deliver_due()
+    except OSError as e:
+        logging.error(f"Error occurred while sending queued emails: {e}")
+        return
+    if sent:
+        print(f"{sent} earlier email(s) sent from {OUTBOX_DIR}")
+
 def send_email(sender_email, sender_password, recipient_email, attachment_path):
 
     # Create a multipart message
@@ -352,13 +368,10 @@ def send_email(sender_email, sender_password, recipient_email, attachment_path):
         message.attach(part)
         attachment.close()  # Close the file after reading
 
-    # Connect to the SMTP server and send the email
+    # Connect to the SMTP server and send the email; if that fails it is spooled and sent by the next run
+    message_text = message.as_string()
     try:
-        server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT)
-        server.starttls()
-        server.login(sender_email, sender_password)
-        server.sendmail(sender_email, recipient_email, message.as_string())
-        server.quit()
+        default_transport.send(SMTP_SERVER, SMTP_PORT, sender_email, sender_password, recipient_email, message_text)
         print("Email sent successfully!")
 
     except (smtplib.SMTPException, IOError, OSError, Exception) as e:
@@ -371,6 +384,11 @@ def send_email(sender_email, sender_password, recipient_email, attachment_path):
         else:
             print(f"Unexpected error: {e}")
         logging.error(f"Error occurred while sending email: {e}")
+        if not is_permanent(e):
+            spool_email(sender_email, sender_password, recipient_email, message_text)
+        return
+
+    send_waiting_emails(sender_email, sender_password)
 
 if __name__ == "__main__":
     script_path = input('Enter the Full Path to the Script that needs to be Reviewed (<Filename>.cpp)): \n')
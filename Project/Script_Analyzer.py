@@ -10,7 +10,10 @@ from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.mime.base import MIMEBase
 from email import encoders
-from pycparser import c_ast, parse_file
+
+# Shared analyzer helpers (preprocessor, symbol_summary) from the ALLOT package (pip install -e . at the repository root)
+from preprocessor import PreprocessError, default_preprocessor
+from symbol_summary import summarize_text
 
 # Set global configuration values
 SMTP_SERVER = 'smtp-mail.outlook.com'
@@ -168,43 +171,29 @@ class ScriptAnalyzer:
     def check_naming_conventions(self):
         try:
             processed_script = self.preprocess_cpp_file()
-            ast = parse_file(processed_script)
-
-            class NamingConventionVisitor(c_ast.NodeVisitor):
-                def __init__(self):
-                    self.module_prefix = None
-
-                def visit_FileAST(self, node):
-                    if node.ext:
-                        for ext in node.ext:
-                            if isinstance(ext, c_ast.Decl):
-                                if ext.name and ext.name.startswith('MODULE_'):
-                                    self.module_prefix = ext.name
-                        self.generic_visit(node)
-
-                def visit_FuncDef(self, node):
-                    if not node.decl.name[0].islower():
-                        logging.warning(f"Function {node.decl.name} does not start with a lowercase letter")
-                    self.visit(node.body)
-
-                def visit_Decl(self, node):
-                    if isinstance(node.type, c_ast.TypeDecl):
-                        if node.name.islower():
-                            logging.warning(f"Variable {node.name} does not start with an uppercase letter")
-                        elif node.name.upper() == node.name:
-                            logging.warning(f"Constant {node.name} should not be all uppercase")
-                        elif self.module_prefix and not node.name.startswith(self.module_prefix):
-                            logging.warning(f"Symbol {node.name} should have a prefix '{self.module_prefix}'")
-                    elif isinstance(node.type, c_ast.PtrDecl):
-                        if not node.name.startswith('p_'):
-                            logging.warning(f"Pointer variable {node.name} should start with 'p_'")
-                    elif isinstance(node.type, c_ast.Struct):
-                        if not node.name[0].isupper():
-                            logging.warning(f"Type/Class {node.name} does not start with an uppercase letter")
-                    self.generic_visit(node)
-
-            v = NamingConventionVisitor()
-            v.visit(ast)
+            if processed_script is None:
+                raise RuntimeError(f"Preprocessing failed for {self.script_path}")
+            # One script per run: parsed in this process into a symbol summary, no worker pool to start
+            summary = summarize_text(processed_script, str(self.script_path))
+            module_prefix = summary.module_prefix()
+
+            for symbol in summary:
+                if symbol.kind == 'function':
+                    if not symbol.name[0].islower():
+                        logging.warning(f"Function {symbol.name} does not start with a lowercase letter")
+                elif symbol.kind == 'variable':
+                    if symbol.name.islower():
+                        logging.warning(f"Variable {symbol.name} does not start with an uppercase letter")
+                    elif symbol.name.upper() == symbol.name:
+                        logging.warning(f"Constant {symbol.name} should not be all uppercase")
+                    elif module_prefix and not symbol.name.startswith(module_prefix):
+                        logging.warning(f"Symbol {symbol.name} should have a prefix '{module_prefix}'")
+                elif symbol.kind == 'pointer':
+                    if not symbol.name.startswith('p_'):
+                        logging.warning(f"Pointer variable {symbol.name} should start with 'p_'")
+                elif symbol.kind == 'struct':
+                    if not symbol.name[0].isupper():
+                        logging.warning(f"Type/Class {symbol.name} does not start with an uppercase letter")
 
         except FileNotFoundError:
             logging.error(f"File not found: {self.script_path}")
@@ -212,18 +201,19 @@ class ScriptAnalyzer:
             logging.error(f"Error during naming conventions check: {str(e)}")
 
     def preprocess_cpp_file(self):
-        processed_file_path = self.script_path.parent / f"{self.script_path.stem}_processed.cpp"
+        # cpp output is read from a pipe and cached by content, so no *_processed.cpp is written
         try:
-            command = ['cpp', '-o', str(processed_file_path), str(self.script_path)]
-            result = subprocess.run(command, check=True, capture_output=True, text=True)
-        except subprocess.CalledProcessError as e:
+            with open(self.script_path, 'rb') as script_file:
+                raw = script_file.read()
+            return default_preprocessor.preprocess(self.script_path, raw)
+        except PreprocessError as e:
             logging.error(f"Error during preprocessing: {e}")
             if e.stderr:
                 logging.error(f"cpp error: {e.stderr}")
         except Exception as e:
             logging.error(f"Error during preprocessing: {str(e)}")
 
-        return processed_file_path
+        return None
 
     def check_modularization(self):
         try: